@@ -4,119 +4,49 @@ Script para adicionar macro VBA ao arquivo Excel.
 Arquivos .xlsm são arquivos ZIP com estrutura Office Open XML.
 """
 
-import zipfile
+import argparse
 import os
-import shutil
-from xml.etree import ElementTree as ET
+import sys
+
+import metricas
+from pacote_xlsm import DATA_REPRODUTIVEL, gerar_xlsm, ler_vba_project
 
 def adicionar_macro_ao_xlsm():
     """Adiciona a macro VBA ao arquivo XLSM."""
 
+    xlsx_file = 'template_importacao_clientes.xlsx'
     xlsm_file = 'template_importacao_clientes.xlsm'
     bas_file = 'Importar_Clientes.bas'
-
-    # Lê o código VBA
-    with open(bas_file, 'r', encoding='utf-8') as f:
-        vba_code = f.read()
-
-    # Remove "Attribute VB_Name" line for processing
-    vba_lines = [line for line in vba_code.split('\n') if not line.startswith('Attribute')]
-    vba_clean = '\n'.join(vba_lines)
-
-    # Diretório temporário
-    temp_dir = 'temp_xlsm'
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
-    os.makedirs(temp_dir)
-
-    # Descompacta o XLSM
-    print(f"📦 Descompactando {xlsm_file}...")
-    with zipfile.ZipFile(xlsm_file, 'r') as zip_ref:
-        zip_ref.extractall(temp_dir)
-
-    # Cria a estrutura VBA
-    print("🔧 Criando estrutura VBA...")
-
-    # Cria diretórios necessários
-    xl_dir = os.path.join(temp_dir, 'xl')
-    os.makedirs(xl_dir, exist_ok=True)
-
-    # Atualiza [Content_Types].xml para incluir VBA
-    content_types_path = os.path.join(temp_dir, '[Content_Types].xml')
-    if os.path.exists(content_types_path):
-        tree = ET.parse(content_types_path)
-        root = tree.getroot()
-
-        # Define namespace
-        ns = {'ct': 'http://schemas.openxmlformats.org/package/2006/content-types'}
-        ET.register_namespace('', ns['ct'])
-
-        # Adiciona override para vbaProject.bin se não existir
-        override_exists = False
-        for override in root.findall('ct:Override', ns):
-            if override.get('PartName') == '/xl/vbaProject.bin':
-                override_exists = True
-                break
-
-        if not override_exists:
-            override = ET.Element('{%s}Override' % ns['ct'])
-            override.set('PartName', '/xl/vbaProject.bin')
-            override.set('ContentType', 'application/vnd.ms-office.vbaProject')
-            root.append(override)
-
-            tree.write(content_types_path, encoding='UTF-8', xml_declaration=True)
-            print("   ✓ [Content_Types].xml atualizado")
-
-    # Atualiza xl/_rels/workbook.xml.rels para incluir relação com VBA
-    rels_dir = os.path.join(xl_dir, '_rels')
-    os.makedirs(rels_dir, exist_ok=True)
-    workbook_rels_path = os.path.join(rels_dir, 'workbook.xml.rels')
-
-    if os.path.exists(workbook_rels_path):
-        tree = ET.parse(workbook_rels_path)
-        root = tree.getroot()
-
-        ns = {'r': 'http://schemas.openxmlformats.org/package/2006/relationships'}
-        ET.register_namespace('', ns['r'])
-
-        # Verifica se já existe relação com vbaProject
-        vba_rel_exists = False
-        for rel in root.findall('r:Relationship', ns):
-            if rel.get('Target') == 'vbaProject.bin':
-                vba_rel_exists = True
-                break
-
-        if not vba_rel_exists:
-            # Encontra o próximo ID disponível
-            max_id = 0
-            for rel in root.findall('r:Relationship', ns):
-                rel_id = rel.get('Id', 'rId0')
-                try:
-                    num = int(rel_id.replace('rId', ''))
-                    max_id = max(max_id, num)
-                except:
-                    pass
-
-            new_id = f'rId{max_id + 1}'
-
-            rel = ET.Element('{%s}Relationship' % ns['r'])
-            rel.set('Id', new_id)
-            rel.set('Type', 'http://schemas.microsoft.com/office/2006/relationships/vbaProject')
-            rel.set('Target', 'vbaProject.bin')
-            root.append(rel)
-
-            tree.write(workbook_rels_path, encoding='UTF-8', xml_declaration=True)
-            print("   ✓ workbook.xml.rels atualizado")
-
-    # NOTA: A criação do vbaProject.bin requer um compilador VBA
-    # que não está facilmente disponível em Linux/Python
-    print("\n⚠️  AVISO: Não é possível criar vbaProject.bin automaticamente em Linux")
-    print("   Para finalizar, você precisará:")
-    print("   1. Abrir o arquivo XLSM no Excel (Windows ou Mac)")
-    print("   2. Pressionar ALT + F11 para abrir o VBA Editor")
-    print("   3. Ir em File > Import File")
-    print(f"   4. Selecionar o arquivo: {bas_file}")
-    print("   5. Salvar o arquivo")
+    vba_file = 'vbaProject.bin'
+
+    # Origem: o .xlsx gerado por criar_template_excel.py (ou o próprio .xlsm)
+    origem = xlsx_file if os.path.exists(xlsx_file) else xlsm_file
+    vba_project = ler_vba_project(vba_file) if os.path.exists(vba_file) else None
+
+    # Reescreve o ZIP em uma passada: só [Content_Types].xml e
+    # workbook.xml.rels são ajustados em memória; as abas são copiadas sem
+    # descompactar
+    print(f"📦 Gerando {xlsm_file} a partir de {origem}...")
+    temporario = xlsm_file + '.tmp'
+    with metricas.atuais().etapa('xlsm'):
+        copiados, ajustados = gerar_xlsm(origem, temporario, vba_project, data_hora=DATA_REPRODUTIVEL)
+        os.replace(temporario, xlsm_file)
+    print(f"   ✓ {ajustados} partes XML ajustadas, {copiados} copiadas sem recompressão")
+
+    if vba_project is not None:
+        print(f"   ✓ {vba_file} incorporado")
+    else:
+        # NOTA: A criação do vbaProject.bin requer um compilador VBA
+        # que não está facilmente disponível em Linux/Python
+        print(f"\n⚠️  AVISO: {vba_file} não encontrado - a macro precisa ser importada no Excel")
+        print("   Para finalizar, você precisará:")
+        print("   1. Abrir o arquivo XLSM no Excel (Windows ou Mac)")
+        print("   2. Pressionar ALT + F11 para abrir o VBA Editor")
+        print("   3. Ir em File > Import File")
+        print(f"   4. Selecionar o arquivo: {bas_file}")
+        print("   5. Salvar o arquivo")
+        print("   Depois, outros arquivos podem reaproveitar a macro do XLSM salvo:")
+        print(f"   python3 pacote_xlsm.py outro.xlsx outro.xlsm --vba {xlsm_file}")
 
     # Cria arquivo de instruções
     with open('COMO_ADICIONAR_MACRO.txt', 'w', encoding='utf-8') as f:
@@ -201,16 +131,29 @@ def adicionar_macro_ao_xlsm():
 
     print(f"\n📄 Arquivo de instruções criado: COMO_ADICIONAR_MACRO.txt")
 
-    # Limpa diretório temporário
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
-
     print("\n✅ Processo concluído!")
     print(f"📁 Arquivos prontos:")
     print(f"   • {xlsm_file} (template com instruções)")
     print(f"   • {bas_file} (código VBA)")
     print(f"   • COMO_ADICIONAR_MACRO.txt (guia completo)")
 
-if __name__ == '__main__':
+
+def main(argv=None):
+    """Função principal (trabalha na pasta do script)."""
+    parser = argparse.ArgumentParser(description='Gera o template .xlsm a partir do .xlsx.')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+    if args.metricas:
+        args.metricas = os.path.abspath(args.metricas)
+
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    adicionar_macro_ao_xlsm()
+    metricas.iniciar(args)
+    try:
+        adicionar_macro_ao_xlsm()
+    finally:
+        metricas.finalizar(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""
+Benchmarks das ferramentas de templates (conversão, template e .xlsm).
+
+Gera planilhas sintéticas realistas de clientes e vendas (10 mil, 100 mil ou
+1 milhão de linhas), executa cada cenário em um processo novo e grava tempo,
+linhas/s e pico de memória (RSS) em JSON, que pode ser comparado com uma
+execução de referência.
+
+Uso (a partir da pasta templates/):
+    python3 -m benchmarks
+    python3 -m benchmarks --tamanhos 10k 100k 1m --saida resultados.json
+    python3 -m benchmarks --comparar baseline.json
+"""
@@ -0,0 +1,120 @@
+"""
+Executa os benchmarks e grava/compara os resultados em JSON.
+
+Veja benchmarks/__init__.py para exemplos de uso.
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.cenarios import CENARIOS, executar, preparar
+
+TAMANHOS_PADRAO = ['10k', '100k']
+TOLERANCIA = 0.10
+
+
+def interpretar_tamanho(texto):
+    """'10k' → 10000, '1m' → 1000000, '2500' → 2500."""
+    texto = texto.strip().lower()
+    multiplicador = {'k': 1000, 'm': 1000000}.get(texto[-1:], 1)
+    return int(float(texto.rstrip('km')) * multiplicador)
+
+
+def medir(nome, pasta, linhas):
+    """Executa o cenário em um processo novo, para o pico de RSS ser só dele."""
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+        return pool.submit(executar, nome, pasta, linhas).result()
+
+
+def comparar(resultados, referencia, tolerancia=TOLERANCIA):
+    """
+    Compara com a execução de referência (mesmo cenário e tamanho).
+
+    Devolve [(cenario, linhas, tempo atual / tempo referência, regrediu?)].
+    """
+    anteriores = {(r['cenario'], r['linhas']): r for r in referencia['resultados']}
+    comparacoes = []
+    for resultado in resultados:
+        anterior = anteriores.get((resultado['cenario'], resultado['linhas']))
+        if not anterior or not anterior['segundos']:
+            continue
+        razao = resultado['segundos'] / anterior['segundos']
+        comparacoes.append((resultado['cenario'], resultado['linhas'], razao, razao > 1 + tolerancia))
+    return comparacoes
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(prog='python3 -m benchmarks',
+                                     description='Benchmarks de conversão, template e .xlsm.')
+    parser.add_argument('--tamanhos', nargs='+', default=TAMANHOS_PADRAO,
+                        help=f'Linhas por planilha: 10k, 100k, 1m... (padrão: {" ".join(TAMANHOS_PADRAO)})')
+    parser.add_argument('--cenarios', nargs='+', choices=sorted(CENARIOS), default=list(CENARIOS),
+                        help='Cenários a executar (padrão: todos)')
+    parser.add_argument('--pasta', help='Pasta para as planilhas sintéticas (reaproveitadas entre execuções)')
+    parser.add_argument('--saida', default='resultados_benchmark.json', help='Arquivo JSON de resultados')
+    parser.add_argument('--comparar', metavar='REFERENCIA', help='JSON de uma execução anterior')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f'Piora de tempo aceita na comparação (padrão: {TOLERANCIA:.2f} = {TOLERANCIA * 100:.0f}%%)')
+    args = parser.parse_args(argv)
+
+    tamanhos = [interpretar_tamanho(t) for t in args.tamanhos]
+    temporaria = None if args.pasta else tempfile.TemporaryDirectory(prefix='benchmark_')
+    pasta = args.pasta or temporaria.name
+    os.makedirs(pasta, exist_ok=True)
+
+    resultados = []
+    try:
+        for linhas in tamanhos:
+            print(f"🛠️  Preparando planilhas sintéticas com {linhas:,} linhas...")
+            preparar(pasta, linhas, cenarios=args.cenarios)
+            for nome in args.cenarios:
+                try:
+                    resultado = medir(nome, pasta, linhas)
+                except Exception as e:
+                    print(f"   ❌ {nome}: {e}")
+                    continue
+                resultados.append(resultado)
+                memoria = resultado['pico_rss_mb']
+                memoria = f"{memoria:7.0f} MB" if memoria is not None else '      -'
+                print(f"   {nome:<20} {resultado['segundos']:8.2f}s "
+                      f"{resultado['linhas_por_segundo'] or 0:>12,} linhas/s  {memoria}")
+    finally:
+        if temporaria:
+            temporaria.cleanup()
+
+    documento = {
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, ensure_ascii=False, indent=2)
+    print(f"📁 Resultados: {args.saida}")
+
+    if not args.comparar:
+        return 0
+
+    with open(args.comparar, encoding='utf-8') as f:
+        referencia = json.load(f)
+    regressoes = 0
+    print(f"\n📊 Comparação com {args.comparar}:")
+    for nome, linhas, razao, regrediu in comparar(resultados, referencia, args.tolerancia):
+        regressoes += regrediu
+        marca = '❌' if regrediu else '✅'
+        print(f"   {marca} {nome:<20} {linhas:>9,} linhas: {razao:5.2f}x o tempo da referência")
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
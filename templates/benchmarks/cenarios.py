@@ -0,0 +1,146 @@
+"""
+Cenários medidos pelo benchmark.
+
+Cada cenário recebe a pasta de trabalho e o número de linhas, assume que as
+planilhas sintéticas e as entradas geradas por outros cenários (.txt
+convertido, template preenchido) já existem (ver `preparar`, que roda fora da
+medição) e devolve quantas linhas processou. `executar` mede tempo e pico de memória e deve rodar em um
+processo novo por cenário.
+"""
+
+import os
+import sys
+import time
+
+from benchmarks.geradores import gerar_planilha_clientes, gerar_planilha_vendas
+
+
+def caminho(pasta, nome, linhas):
+    return os.path.join(pasta, f'{nome}_{linhas}.xlsx')
+
+
+def caminho_txt(pasta, linhas):
+    return os.path.join(pasta, f'Clientes_{linhas}.txt')
+
+
+def caminho_template(pasta, linhas):
+    return os.path.join(pasta, f'template_{linhas}.xlsx')
+
+
+def _gerar_se_faltar(destino, gerar):
+    if not os.path.exists(destino):
+        temporario = destino + '.tmp'
+        gerar(temporario)
+        os.replace(temporario, destino)
+
+
+def preparar(pasta, linhas, semente=42, cenarios=()):
+    """
+    Gera (se ainda não existirem) as planilhas de clientes e vendas com
+    `linhas` linhas e as entradas dos `cenarios` que dependem de outros: o
+    .txt convertido (template_preenchido) e o template .xlsx (pacote_xlsm).
+    """
+    for nome, gerador in (('clientes', gerar_planilha_clientes), ('vendas', gerar_planilha_vendas)):
+        _gerar_se_faltar(caminho(pasta, nome, linhas), lambda destino: gerador(destino, linhas, semente))
+
+    cenarios = set(cenarios)
+    if cenarios & {'template_preenchido', 'pacote_xlsm'}:
+        from converter_clientes import converter_arquivo
+        from leitor_xlsx import ler_linhas_xml
+
+        _gerar_se_faltar(caminho_txt(pasta, linhas), lambda destino: converter_arquivo(
+            caminho(pasta, 'clientes', linhas), destino, leitor=ler_linhas_xml))
+    if 'pacote_xlsm' in cenarios:
+        from criar_template_excel import exportar_base_clientes
+
+        _gerar_se_faltar(caminho_template(pasta, linhas),
+                         lambda destino: exportar_base_clientes(caminho_txt(pasta, linhas), destino))
+
+
+def conversao_xml(pasta, linhas):
+    """Planilha de clientes → .txt da macro com o leitor XML direto."""
+    from converter_clientes import converter_arquivo
+    from leitor_xlsx import ler_linhas_xml
+
+    destino = caminho_txt(pasta, linhas)
+    return converter_arquivo(caminho(pasta, 'clientes', linhas), destino, leitor=ler_linhas_xml)['linhas']
+
+
+def conversao_openpyxl(pasta, linhas):
+    """Mesma conversão com o openpyxl read-only (referência)."""
+    from converter_clientes import converter_arquivo, ler_linhas_openpyxl
+
+    destino = os.path.join(pasta, f'Clientes_{linhas}_openpyxl.txt')
+    return converter_arquivo(caminho(pasta, 'clientes', linhas), destino, leitor=ler_linhas_openpyxl)['linhas']
+
+
+def vendas_numpy(pasta, linhas):
+    """Leitura + transformação vetorizada da planilha de vendas."""
+    from transformar_vendas import ler_lotes_vendas, transformar_lote
+
+    total = 0
+    for numeros, colunas in ler_lotes_vendas(caminho(pasta, 'vendas', linhas)):
+        total += transformar_lote(numeros, colunas)['total']
+    return total
+
+
+def template_preenchido(pasta, linhas):
+    """Template de importação preenchido a partir do .txt convertido."""
+    from criar_template_excel import exportar_base_clientes
+
+    return exportar_base_clientes(caminho_txt(pasta, linhas), caminho_template(pasta, linhas))
+
+
+def pacote_xlsm(pasta, linhas):
+    """Template preenchido .xlsx → .xlsm em uma passada pelo ZIP."""
+    from pacote_xlsm import gerar_xlsm
+
+    gerar_xlsm(caminho_template(pasta, linhas), os.path.join(pasta, f'template_{linhas}.xlsm'),
+               b'vbaProject sintetico')
+    return linhas
+
+
+CENARIOS = {
+    'conversao_xml': conversao_xml,
+    'conversao_openpyxl': conversao_openpyxl,
+    'vendas_numpy': vendas_numpy,
+    'template_preenchido': template_preenchido,
+    'pacote_xlsm': pacote_xlsm,
+}
+
+
+def pico_rss_mb():
+    """
+    Pico de memória residente do processo em MB (None se indisponível).
+
+    No Linux usa o VmHWM de /proc: o ru_maxrss de um processo criado por
+    fork+exec herda o pico do processo pai.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def executar(nome, pasta, linhas):
+    """Roda um cenário (no processo filho) e devolve a medição."""
+    inicio = time.perf_counter()
+    processadas = CENARIOS[nome](pasta, linhas)
+    segundos = time.perf_counter() - inicio
+    return {
+        'cenario': nome,
+        'linhas': linhas,
+        'linhas_processadas': processadas,
+        'segundos': round(segundos, 4),
+        'linhas_por_segundo': round(processadas / segundos) if segundos else None,
+        'pico_rss_mb': pico_rss_mb(),
+    }
@@ -0,0 +1,240 @@
+"""
+Geradores de planilhas sintéticas de clientes e vendas.
+
+As planilhas são gravadas direto em XML (sem openpyxl): gerar 1 milhão de
+linhas de vendas pelo workbook write-only levaria minutos. Os textos vão para
+a tabela de strings compartilhadas, como nos arquivos salvos pelo Excel. O conteúdo imita o
+ERP: cidades com acento, CNPJ/CPF formatados com dígitos verificadores
+válidos, CEP com hífen e valores de vendas com vírgula decimal em texto.
+"""
+
+import datetime
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter
+
+from mapeamentos import CABECALHOS_CLIENTES, CABECALHOS_VENDAS
+
+CIDADES = [
+    ('São Paulo', 'SP'), ('Ribeirão Preto', 'SP'), ('Jundiaí', 'SP'), ('São José dos Campos', 'SP'),
+    ('Maringá', 'PR'), ('Londrina', 'PR'), ('Foz do Iguaçu', 'PR'), ('Paranaguá', 'PR'),
+    ('Florianópolis', 'SC'), ('Chapecó', 'SC'), ('Jaraguá do Sul', 'SC'), ('Balneário Camboriú', 'SC'),
+    ('Porto Alegre', 'RS'), ('Santa Maria', 'RS'), ('Erechim', 'RS'), ('Ijuí', 'RS'),
+    ('Goiânia', 'GO'), ('Cuiabá', 'MT'), ('Belém', 'PA'), ('São Luís', 'MA'),
+]
+BAIRROS = ['Centro', 'Jardim América', 'Vila Operária', 'São Cristóvão', 'Industrial', 'Boa Vista']
+LOGRADOUROS = ['RUA JOSÉ BONIFÁCIO', 'AVENIDA INDEPENDÊNCIA', 'RUA SÃO JOÃO', 'AVENIDA BRASÍLIA',
+               'RUA MARECHAL DEODORO', 'TRAVESSA DA CONCEIÇÃO']
+RAMOS = ['COMÉRCIO DE ALIMENTOS', 'SUPERMERCADO', 'MERCEARIA', 'PANIFICAÇÃO', 'DISTRIBUIDORA',
+         'ATACADÃO']
+SOBRENOMES = ['SÃO JOÃO', 'AÇAÍ', 'BOM PREÇO', 'IRMÃOS GONÇALVES', 'PÃO DE MEL', 'ESPERANÇA']
+FAMILIAS = ['BISCOITOS', 'MASSAS', 'SALGADINHOS', 'PANETONES', 'WAFERS']
+COMPLEMENTOS = ['Cx com 12 unidades', 'Fardo com 24 unidades', 'Display com 20', 'Pacote 500g']
+SITUACOES = ['ATIVO'] * 9 + ['INATIVO']
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nome}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+    '<Relationship Id="rId2" Target="styles.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+    '<Relationship Id="rId3" Target="sharedStrings.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"/>'
+    '</Relationships>'
+)
+# xf 1 = data (numFmt 14, dd/mm/aaaa)
+_ESTILOS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_ABA_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_ABA_FIM = '</sheetData></worksheet>'
+_EPOCA = datetime.datetime(1899, 12, 30)
+
+
+def _celula(referencia, valor, textos):
+    if isinstance(valor, str):
+        indice = textos.setdefault(valor, len(textos))
+        return f'<c r="{referencia}" t="s"><v>{indice}</v></c>'
+    if isinstance(valor, datetime.datetime):
+        return f'<c r="{referencia}" s="1"><v>{(valor - _EPOCA).total_seconds() / 86400:g}</v></c>'
+    return f'<c r="{referencia}"><v>{valor!r}</v></c>'
+
+
+def escrever_xlsx(caminho, linhas, nome_aba='Planilha1'):
+    """
+    Grava `linhas` (listas de str/int/float/datetime/None) na primeira aba.
+
+    A primeira linha gerada é a linha 1 da planilha; listas vazias viram
+    linhas em branco. Retorna o número de linhas gravadas.
+    """
+    letras = []
+    textos = {}
+    total = 0
+    with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(nome=escape(nome_aba)))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        zf.writestr('xl/styles.xml', _ESTILOS)
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as aba:
+            aba.write(_ABA_INICIO.encode('utf-8'))
+            bloco = []
+            for numero, valores in enumerate(linhas, 1):
+                while len(letras) < len(valores):
+                    letras.append(get_column_letter(len(letras) + 1))
+                celulas = ''.join(
+                    _celula(f'{letras[i]}{numero}', valor, textos)
+                    for i, valor in enumerate(valores) if valor is not None
+                )
+                bloco.append(f'<row r="{numero}">{celulas}</row>')
+                total = numero
+                if len(bloco) >= 5000:
+                    aba.write(''.join(bloco).encode('utf-8'))
+                    bloco = []
+            aba.write((''.join(bloco) + _ABA_FIM).encode('utf-8'))
+
+        with zf.open('xl/sharedStrings.xml', 'w', force_zip64=True) as compartilhados:
+            compartilhados.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                f'uniqueCount="{len(textos)}">'.encode('utf-8')
+            )
+            bloco = []
+            for texto in textos:
+                bloco.append(f'<si><t xml:space="preserve">{escape(texto)}</t></si>')
+                if len(bloco) >= 10000:
+                    compartilhados.write(''.join(bloco).encode('utf-8'))
+                    bloco = []
+            compartilhados.write((''.join(bloco) + '</sst>').encode('utf-8'))
+    return total
+
+
+def _digitos_verificadores(base, pesos):
+    digitos = list(base)
+    for peso in pesos:
+        soma = sum(d * p for d, p in zip(digitos, peso))
+        resto = soma % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return digitos
+
+
+def gerar_cnpj(aleatorio):
+    """CNPJ válido formatado (##.###.###/####-##)."""
+    base = [aleatorio.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    d = _digitos_verificadores(base, ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2],
+                                      [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]))
+    t = ''.join(map(str, d))
+    return f'{t[:2]}.{t[2:5]}.{t[5:8]}/{t[8:12]}-{t[12:]}'
+
+
+def gerar_cpf(aleatorio):
+    """CPF válido formatado (###.###.###-##)."""
+    base = [aleatorio.randint(0, 9) for _ in range(9)]
+    d = _digitos_verificadores(base, (range(10, 1, -1), range(11, 1, -1)))
+    t = ''.join(map(str, d))
+    return f'{t[:3]}.{t[3:6]}.{t[6:9]}-{t[9:]}'
+
+
+def decimal_br(valor):
+    """12345.6 → '12.345,60' (texto como o ERP exporta)."""
+    return f'{valor:,.2f}'.replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def linhas_clientes(quantidade, semente=42):
+    """Linhas no layout da macro: cabeçalho, linha 2 vazia e dados a partir da linha 3."""
+    aleatorio = random.Random(semente)
+    yield list(CABECALHOS_CLIENTES)
+    yield []
+    for n in range(quantidade):
+        cidade, _ = aleatorio.choice(CIDADES)
+        ramo = aleatorio.choice(RAMOS)
+        sobrenome = aleatorio.choice(SOBRENOMES)
+        documento = gerar_cpf(aleatorio) if aleatorio.random() < 0.1 else gerar_cnpj(aleatorio)
+        yield [
+            f'{n + 1:06d}', f'{ramo} {sobrenome} LTDA', f'{sobrenome.title()} {n % 97}',
+            str(aleatorio.randint(100000000, 999999999)) if aleatorio.random() < 0.8 else 'ISENTO',
+            documento, f'GRP{n % 20:02d}', aleatorio.choice(LOGRADOUROS),
+            f'{aleatorio.randint(1000, 99999):05d}-{aleatorio.randint(0, 999):03d}',
+            aleatorio.choice(BAIRROS), cidade, ramo.title(), f'R{n % 30:02d}',
+            aleatorio.choice(SITUACOES), f'SR{n % 60:02d}', aleatorio.randint(1, 9999),
+        ]
+
+
+def linhas_vendas(quantidade, semente=42):
+    """Linhas de vendas com ~5% de Série diferente de EP e valores com vírgula decimal."""
+    aleatorio = random.Random(semente)
+    inicio = datetime.datetime(2024, 1, 1)
+    yield list(CABECALHOS_VENDAS)
+    for n in range(quantidade):
+        cidade, uf = aleatorio.choice(CIDADES)
+        quantidade_itens = aleatorio.randint(1, 200)
+        preco = round(aleatorio.uniform(2, 120), 2)
+        desconto = aleatorio.choice([0, 0, 2.5, 5, 10])
+        bruto = quantidade_itens * preco
+        valor_desconto = bruto * desconto / 100
+        liquido = bruto - valor_desconto
+        yield [
+            'EP' if aleatorio.random() < 0.95 else 'NF', 100000 + n // 4,
+            inicio + datetime.timedelta(days=aleatorio.randint(0, 364)),
+            f'PROD{aleatorio.randint(1, 800):04d}', quantidade_itens, '5.102',
+            aleatorio.choice(FAMILIAS), aleatorio.choice(COMPLEMENTOS),
+            f'{aleatorio.randint(1, 100000):06d}', f'{aleatorio.choice(RAMOS)} LTDA',
+            aleatorio.choice(SOBRENOMES).title(), f'REP{n % 40:03d}', uf, cidade,
+            decimal_br(quantidade_itens * 0.45), decimal_br(preco), decimal_br(desconto),
+            decimal_br(bruto), decimal_br(valor_desconto), decimal_br(liquido),
+            decimal_br(liquido), 'GERMANI', decimal_br(preco * (1 - desconto / 100)), decimal_br(bruto),
+        ]
+
+
+def gerar_planilha_clientes(caminho, quantidade, semente=42):
+    """Planilha de clientes com `quantidade` linhas de dados."""
+    escrever_xlsx(caminho, linhas_clientes(quantidade, semente), 'Clientes')
+
+
+def gerar_planilha_vendas(caminho, quantidade, semente=42):
+    """Planilha de vendas com `quantidade` linhas de dados."""
+    escrever_xlsx(caminho, linhas_vendas(quantidade, semente), 'Vendas')
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Cache colunar das planilhas já lidas, indexado pelo hash do conteúdo.
+
+Numa mesma sessão de importação a mesma planilha grande passa várias vezes
+pela conversão, pela validação e pelos levantamentos, e a cada vez o XML
+compactado é lido de novo. Na primeira leitura completa, a aba é gravada em
+`.cache/planilhas/<sha256>.colunas`; as leituras seguintes do mesmo conteúdo
+(mesmo com outro nome ou outra data de modificação) abrem esse arquivo com
+mmap, em milissegundos, sem descompactar nem parsear nada.
+
+Formato (um arquivo por planilha, só NumPy e biblioteca padrão):
+
+- cabeçalho JSON com o número de linhas, a linha 1 da aba e, para cada
+  coluna, a posição de cada vetor no arquivo (alinhada em 64 bytes);
+- por coluna, `tipos` (uint8: vazio, texto, inteiro, real, lógico, data/hora,
+  data, hora) e só os vetores que a coluna usa: `codigos` (int32) para texto,
+  `numeros` (float64) para reais e `inteiros` (int64) para inteiros, lógicos
+  e datas (em microssegundos);
+- o texto é codificado por dicionário: cada coluna guarda uma vez cada texto
+  distinto (UTF-8, separados por NUL) e as células guardam só o código.
+
+Os valores lidos do cache têm os mesmos tipos do leitor XML, então
+`ler_linhas_cache` pode substituí-lo em qualquer lugar (`--leitor cache`).
+O cache guarda as colunas até a última coluna do cabeçalho. Leituras de
+fatias (linha_inicial/linha_final, usadas pela conversão em lote) não criam
+cache, só aproveitam um já existente.
+
+O tamanho total da pasta é limitado (TAMANHO_MAXIMO_CACHE): ao gravar, os
+arquivos usados há mais tempo (data de modificação, atualizada a cada uso)
+são removidos até caber.
+
+Uso:
+    python3 converter_clientes.py clientes.xlsx --leitor cache
+    python3 cache_planilhas.py guardar clientes.xlsx vendas.xlsx
+    python3 cache_planilhas.py listar
+    python3 cache_planilhas.py limpar --limite-mb 512
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from leitor_xlsx import ErroLeituraXlsx, ler_linhas_xml
+from metricas import atuais
+
+PASTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'planilhas')
+EXTENSAO = '.colunas'
+TAMANHO_MAXIMO_CACHE = 2 * 1024 ** 3
+
+# Muda quando o formato ou os valores do leitor mudam: entra no hash
+VERSAO_FORMATO = 1
+MAGICA = b'PLANCOL1'
+ALINHAMENTO = 64
+LINHAS_POR_BLOCO = 65536
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+VAZIO, TEXTO, INTEIRO, REAL, LOGICO, DATA_HORA, DATA, HORA = range(8)
+CODIGOS_TIPOS = {
+    type(None): VAZIO, str: TEXTO, int: INTEIRO, float: REAL, bool: LOGICO,
+    datetime.datetime: DATA_HORA, datetime.date: DATA, datetime.time: HORA,
+}
+EPOCA = datetime.datetime(1970, 1, 1)
+UM_MICROSSEGUNDO = datetime.timedelta(microseconds=1)
+
+
+class CacheInvalido(Exception):
+    """Valor que o formato não representa (o cache não é gravado)."""
+
+
+# ---------------------------------------------------------------------------
+# Hash e localização
+# ---------------------------------------------------------------------------
+
+def hash_arquivo(caminho):
+    """sha256 do conteúdo do arquivo (mais a versão do formato do cache)."""
+    h = hashlib.sha256(f'planilha-v{VERSAO_FORMATO}\0'.encode())
+    with open(caminho, 'rb') as f:
+        while True:
+            bloco = f.read(TAMANHO_BLOCO_HASH)
+            if not bloco:
+                break
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def caminho_cache(digest, pasta=PASTA_CACHE):
+    return os.path.join(pasta, digest + EXTENSAO)
+
+
+# ---------------------------------------------------------------------------
+# Conversão de valores
+# ---------------------------------------------------------------------------
+
+def _para_inteiro(tipo, valor):
+    """Valor de tipo inteiro/lógico/data como int64."""
+    if tipo == DATA_HORA:
+        return (valor - EPOCA) // UM_MICROSSEGUNDO
+    if tipo == DATA:
+        return valor.toordinal()
+    if tipo == HORA:
+        return ((valor.hour * 60 + valor.minute) * 60 + valor.second) * 1000000 + valor.microsecond
+    return int(valor)
+
+
+def _de_inteiro(tipo, numero):
+    if tipo == DATA_HORA:
+        return EPOCA + datetime.timedelta(microseconds=numero)
+    if tipo == DATA:
+        return datetime.date.fromordinal(numero)
+    if tipo == HORA:
+        segundos, micro = divmod(numero, 1000000)
+        return datetime.time(segundos // 3600, segundos // 60 % 60, segundos % 60, micro)
+    if tipo == LOGICO:
+        return bool(numero)
+    return numero
+
+
+def _valor_json(valor):
+    """[tipo, valor] serializável (usado no cabeçalho)."""
+    tipo = CODIGOS_TIPOS.get(type(valor))
+    if tipo is None:
+        raise CacheInvalido(f'tipo não suportado: {type(valor).__name__}')
+    if tipo in (VAZIO, TEXTO, REAL):
+        return [tipo, valor]
+    return [tipo, _para_inteiro(tipo, valor)]
+
+
+def _valor_de_json(par):
+    tipo, valor = par
+    return valor if tipo in (VAZIO, TEXTO, REAL) else _de_inteiro(tipo, valor)
+
+
+# ---------------------------------------------------------------------------
+# Gravação
+# ---------------------------------------------------------------------------
+
+class _ColunaEmConstrucao:
+    """Acumula uma coluna em blocos de vetores NumPy."""
+
+    def __init__(self):
+        self.dicionario = {}
+        self.tipos = []
+        self.codigos = []
+        self.numeros = []
+        self.inteiros = []
+        self.usados = set()
+
+    def acrescentar(self, valores):
+        """Acrescenta um bloco de valores Python da coluna."""
+        try:
+            tipos = np.frombuffer(bytes(map(CODIGOS_TIPOS.__getitem__, map(type, valores))), dtype=np.uint8)
+        except KeyError as e:
+            raise CacheInvalido(f'tipo não suportado: {e.args[0].__name__}')
+        presentes = set(np.unique(tipos).tolist())
+        self.usados |= presentes
+        self.tipos.append(tipos)
+        n = len(valores)
+
+        codigos = np.full(n, -1, dtype=np.int32)
+        if TEXTO in presentes:
+            posicoes = np.flatnonzero(tipos == TEXTO).tolist()
+            dicionario = self.dicionario
+            codigos[posicoes] = [dicionario.setdefault(valores[i], len(dicionario)) for i in posicoes]
+        self.codigos.append(codigos)
+
+        numeros = np.zeros(n, dtype=np.float64)
+        if REAL in presentes:
+            posicoes = np.flatnonzero(tipos == REAL)
+            numeros[posicoes] = [valores[i] for i in posicoes.tolist()]
+        self.numeros.append(numeros)
+
+        inteiros = np.zeros(n, dtype=np.int64)
+        for tipo in presentes - {VAZIO, TEXTO, REAL}:
+            posicoes = np.flatnonzero(tipos == tipo)
+            try:
+                inteiros[posicoes] = [_para_inteiro(tipo, valores[i]) for i in posicoes.tolist()]
+            except OverflowError:
+                raise CacheInvalido('inteiro fora do intervalo de 64 bits')
+        self.inteiros.append(inteiros)
+
+    def vetores(self):
+        """{nome: vetor} só com os vetores que a coluna usa."""
+        vetores = {'tipos': np.concatenate(self.tipos) if self.tipos else np.zeros(0, np.uint8)}
+        if TEXTO in self.usados:
+            vetores['codigos'] = np.concatenate(self.codigos)
+            texto = '\0'.join(self.dicionario).encode('utf-8')
+            vetores['textos'] = np.frombuffer(texto, dtype=np.uint8)
+        if REAL in self.usados:
+            vetores['numeros'] = np.concatenate(self.numeros)
+        if self.usados - {VAZIO, TEXTO, REAL}:
+            vetores['inteiros'] = np.concatenate(self.inteiros)
+        return vetores
+
+
+def gravar_cache(destino, cabecalho, colunas, linhas, origem=''):
+    """
+    Grava as colunas (_ColunaEmConstrucao) em `destino` de forma atômica.
+    Retorna o tamanho do arquivo em bytes.
+    """
+    partes = []
+    descricao = []
+    posicao = 0
+    for coluna in colunas:
+        vetores = coluna.vetores()
+        item = {'textos_distintos': len(coluna.dicionario), 'vetores': {}}
+        for nome, vetor in vetores.items():
+            item['vetores'][nome] = [vetor.dtype.str, len(vetor), posicao]
+            partes.append((posicao, vetor))
+            posicao += -(-vetor.nbytes // ALINHAMENTO) * ALINHAMENTO
+        descricao.append(item)
+
+    meta = json.dumps({
+        'versao': VERSAO_FORMATO,
+        'origem': os.path.basename(origem),
+        'linhas': linhas,
+        'primeira_linha': 2,
+        'cabecalho': [_valor_json(valor) for valor in cabecalho],
+        'colunas': descricao,
+    }, ensure_ascii=False).encode('utf-8')
+    inicio_dados = -(-(len(MAGICA) + 8 + len(meta)) // ALINHAMENTO) * ALINHAMENTO
+
+    os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+    temporario = f'{destino}.{os.getpid()}.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(MAGICA + struct.pack('<Q', len(meta)) + meta)
+        for deslocamento, vetor in partes:
+            f.seek(inicio_dados + deslocamento)
+            f.write(vetor.tobytes())
+        f.truncate(inicio_dados + posicao)
+    os.replace(temporario, destino)
+    return inicio_dados + posicao
+
+
+def limpar_cache(pasta=PASTA_CACHE, limite=TAMANHO_MAXIMO_CACHE, manter=None):
+    """
+    Remove os arquivos usados há mais tempo até a pasta caber em `limite`
+    bytes. `manter` (caminho) só é removido se sozinho passar do limite.
+    Retorna a lista de arquivos removidos.
+    """
+    try:
+        nomes = [nome for nome in os.listdir(pasta) if nome.endswith(EXTENSAO)]
+    except FileNotFoundError:
+        return []
+    arquivos = []
+    for nome in nomes:
+        caminho = os.path.join(pasta, nome)
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        arquivos.append((caminho == manter, info.st_mtime, info.st_size, caminho))
+
+    total = sum(tamanho for _, _, tamanho, _ in arquivos)
+    removidos = []
+    for _, _, tamanho, caminho in sorted(arquivos):
+        if total <= limite:
+            break
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tamanho
+        removidos.append(caminho)
+    return removidos
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+class PlanilhaEmCache:
+    """Aba gravada no cache, aberta com mmap (os vetores não são copiados)."""
+
+    def __init__(self, caminho):
+        with open(caminho, 'rb') as f:
+            self.mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mapa[:len(MAGICA)] != MAGICA:
+            raise CacheInvalido(f'Arquivo de cache inválido: {caminho}')
+        tamanho_meta, = struct.unpack_from('<Q', self.mapa, len(MAGICA))
+        inicio_meta = len(MAGICA) + 8
+        meta = json.loads(self.mapa[inicio_meta:inicio_meta + tamanho_meta].decode('utf-8'))
+        if meta['versao'] != VERSAO_FORMATO:
+            raise CacheInvalido(f'Versão de cache diferente: {caminho}')
+        inicio_dados = -(-(inicio_meta + tamanho_meta) // ALINHAMENTO) * ALINHAMENTO
+
+        self.caminho = caminho
+        self.origem = meta['origem']
+        self.linhas = meta['linhas']
+        self.primeira_linha = meta['primeira_linha']
+        self.cabecalho = [_valor_de_json(par) for par in meta['cabecalho']]
+        self.colunas = []
+        for item in meta['colunas']:
+            vetores = {
+                nome: np.frombuffer(self.mapa, dtype=np.dtype(tipo), count=quantidade,
+                                    offset=inicio_dados + deslocamento)
+                for nome, (tipo, quantidade, deslocamento) in item['vetores'].items()
+            }
+            vetores['textos_distintos'] = item['textos_distintos']
+            self.colunas.append(vetores)
+        self._dicionarios = {}
+
+    def dicionario(self, indice):
+        """Textos distintos da coluna como vetor de objetos (decodificado uma vez)."""
+        if indice not in self._dicionarios:
+            coluna = self.colunas[indice]
+            textos = coluna['textos'].tobytes().decode('utf-8').split('\0') if coluna['textos_distintos'] else []
+            self._dicionarios[indice] = np.array(textos + [None], dtype=object)
+        return self._dicionarios[indice]
+
+    def valores(self, indice, inicio, fim):
+        """Lista de valores Python da coluna nas posições [inicio, fim)."""
+        coluna = self.colunas[indice]
+        tipos = coluna['tipos'][inicio:fim]
+        if 'codigos' in coluna:
+            # Vazios têm código -1, que aponta para o None no fim do dicionário
+            valores = self.dicionario(indice)[coluna['codigos'][inicio:fim]]
+        else:
+            valores = np.full(len(tipos), None, dtype=object)
+        if 'numeros' in coluna:
+            posicoes = np.flatnonzero(tipos == REAL)
+            valores[posicoes] = coluna['numeros'][inicio:fim][posicoes]
+        if 'inteiros' in coluna:
+            inteiros = coluna['inteiros'][inicio:fim]
+            for tipo in (INTEIRO, LOGICO):
+                posicoes = np.flatnonzero(tipos == tipo)
+                valores[posicoes] = inteiros[posicoes].astype(bool if tipo == LOGICO else np.int64)
+            for tipo in (DATA_HORA, DATA, HORA):
+                posicoes = np.flatnonzero(tipos == tipo)
+                valores[posicoes] = [_de_inteiro(tipo, n) for n in inteiros[posicoes].tolist()]
+        return valores.tolist()
+
+    def ler_linhas(self, indices, linha_inicial=2, linha_final=None):
+        """Gera (número da linha, valores) só com as colunas `indices` (None = ausente)."""
+        primeira = self.primeira_linha
+        inicio = max(linha_inicial - primeira, 0)
+        fim = self.linhas if linha_final is None else min(self.linhas, linha_final - primeira + 1)
+        medicao = atuais()
+        for bloco in range(inicio, fim, LINHAS_POR_BLOCO):
+            ate = min(bloco + LINHAS_POR_BLOCO, fim)
+            with medicao.etapa('cache'):
+                colunas = [
+                    self.valores(i, bloco, ate) if i is not None and i < len(self.colunas)
+                    else [None] * (ate - bloco)
+                    for i in indices
+                ]
+            yield from zip(range(bloco + primeira, ate + primeira), zip(*colunas))
+
+    def fechar(self):
+        self._dicionarios.clear()
+        self.colunas = []
+        try:
+            self.mapa.close()
+        except BufferError:
+            # Ainda há vetores em uso; o mmap fecha quando forem liberados
+            pass
+
+
+def abrir_cache(caminho):
+    """PlanilhaEmCache ou None (ausente ou inválido). Marca o arquivo como usado agora."""
+    try:
+        planilha = PlanilhaEmCache(caminho)
+    except (FileNotFoundError, ValueError, CacheInvalido, struct.error):
+        return None
+    try:
+        os.utime(caminho)
+    except OSError:
+        pass
+    return planilha
+
+
+def _ler_e_guardar(caminho, destino, escolher_colunas, linha_inicial, limite):
+    """
+    Lê a aba inteira com o leitor XML, gera as linhas pedidas e grava o
+    cache no final. Se a leitura for interrompida, nada é gravado.
+    """
+    cabecalho = []
+    indices = []
+
+    def todas_as_colunas(linha_1):
+        cabecalho.extend(linha_1)
+        indices.extend(escolher_colunas(linha_1))
+        return list(range(max(len(linha_1), 1)))
+
+    colunas = None
+    bloco = []
+    linhas = 0
+    medicao = atuais()
+
+    def guardar_bloco():
+        try:
+            for coluna, valores in zip(colunas, zip(*bloco)):
+                coluna.acrescentar(valores)
+        except CacheInvalido:
+            return False
+        return True
+
+    gravar = True
+    for numero, valores in ler_linhas_xml(caminho, todas_as_colunas, 2):
+        if colunas is None:
+            colunas = [_ColunaEmConstrucao() for _ in valores]
+            largura = len(valores)
+        if numero >= linha_inicial:
+            yield numero, tuple(valores[i] if i is not None and i < largura else None for i in indices)
+        if gravar:
+            bloco.append(valores)
+            if len(bloco) == LINHAS_POR_BLOCO:
+                with medicao.etapa('cache'):
+                    gravar = guardar_bloco()
+                linhas += len(bloco)
+                bloco = []
+
+    if colunas is None:
+        # Aba sem linhas de dados: o cabeçalho já foi lido
+        colunas = [_ColunaEmConstrucao() for _ in range(max(len(cabecalho), 1))]
+    with medicao.etapa('cache'):
+        if gravar and bloco:
+            gravar = guardar_bloco()
+        linhas += len(bloco)
+        if not gravar:
+            return
+        tamanho = gravar_cache(destino, cabecalho, colunas, linhas, caminho)
+        if tamanho > limite:
+            os.remove(destino)
+        else:
+            limpar_cache(os.path.dirname(destino), limite, manter=destino)
+
+
+def ler_linhas_cache(caminho, escolher_colunas, linha_inicial=2, linha_final=None,
+                     pasta=PASTA_CACHE, limite=TAMANHO_MAXIMO_CACHE):
+    """
+    Mesma interface de `leitor_xlsx.ler_linhas_xml`, passando pelo cache.
+
+    Com o cache do conteúdo de `caminho` em `pasta`, as linhas saem do
+    arquivo mapeado; senão a aba é lida pelo leitor XML e, se a leitura for
+    completa (sem linha_inicial > 3 nem linha_final), guardada no cache.
+    """
+    medicao = atuais()
+    try:
+        with medicao.etapa('hash'):
+            digest = hash_arquivo(caminho)
+    except FileNotFoundError:
+        raise ErroLeituraXlsx(f'Arquivo não encontrado: {caminho}')
+    destino = caminho_cache(digest, pasta)
+
+    with medicao.etapa('cache'):
+        planilha = abrir_cache(destino)
+    if planilha is None:
+        if linha_final is not None or linha_inicial > 3:
+            yield from ler_linhas_xml(caminho, escolher_colunas, linha_inicial, linha_final)
+        else:
+            yield from _ler_e_guardar(caminho, destino, escolher_colunas, linha_inicial, limite)
+        return
+
+    try:
+        indices = escolher_colunas(planilha.cabecalho)
+        yield from planilha.ler_linhas(indices, linha_inicial, linha_final)
+    finally:
+        planilha.fechar()
+
+
+def guardar(caminho, pasta=PASTA_CACHE, limite=TAMANHO_MAXIMO_CACHE):
+    """Garante o cache de `caminho`. Retorna (caminho do cache, já existia)."""
+    destino = caminho_cache(hash_arquivo(caminho), pasta)
+    planilha = abrir_cache(destino)
+    if planilha is not None:
+        planilha.fechar()
+        return destino, True
+    for _ in _ler_e_guardar(caminho, destino, lambda cabecalho: [], 2, limite):
+        pass
+    return destino, False
+
+
+def listar(pasta=PASTA_CACHE):
+    """(caminho, planilha de origem, linhas, colunas, bytes, última utilização) por arquivo."""
+    itens = []
+    try:
+        nomes = sorted(os.listdir(pasta))
+    except FileNotFoundError:
+        return itens
+    for nome in nomes:
+        if not nome.endswith(EXTENSAO):
+            continue
+        caminho = os.path.join(pasta, nome)
+        info = os.stat(caminho)
+        try:
+            planilha = PlanilhaEmCache(caminho)
+        except (ValueError, CacheInvalido, struct.error):
+            itens.append((caminho, '(inválido)', 0, 0, info.st_size, info.st_mtime))
+            continue
+        itens.append((caminho, planilha.origem, planilha.linhas, len(planilha.colunas),
+                      info.st_size, info.st_mtime))
+        planilha.fechar()
+    return itens
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Cache colunar (mmap) das planilhas já lidas.')
+    parser.add_argument('--pasta', default=PASTA_CACHE, help=f'Pasta do cache (padrão: {PASTA_CACHE})')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_guardar = sub.add_parser('guardar', help='Lê as planilhas e grava o cache (se ainda não existir)')
+    p_guardar.add_argument('origens', nargs='+', help='Planilhas .xlsx/.xlsm')
+    p_guardar.add_argument('--limite-mb', type=int, default=TAMANHO_MAXIMO_CACHE // 1024 ** 2,
+                           help=f'Tamanho máximo da pasta (padrão: {TAMANHO_MAXIMO_CACHE // 1024 ** 2} MB)')
+
+    sub.add_parser('listar', help='Lista as planilhas em cache')
+
+    p_limpar = sub.add_parser('limpar', help='Remove os arquivos usados há mais tempo')
+    p_limpar.add_argument('--limite-mb', type=int, default=0,
+                          help='Tamanho a manter (padrão: 0 = remove tudo)')
+
+    args = parser.parse_args(argv)
+
+    if args.comando == 'guardar':
+        for origem in args.origens:
+            inicio = time.perf_counter()
+            try:
+                destino, existia = guardar(origem, args.pasta, args.limite_mb * 1024 ** 2)
+            except (OSError, ErroLeituraXlsx) as e:
+                print(f"❌ {origem}: {e}")
+                return 1
+            if existia:
+                print(f"♻️  {origem}: já em cache ({os.path.basename(destino)[:12]})")
+            elif os.path.exists(destino):
+                print(f"🗃️  {origem}: {os.path.getsize(destino) / 1024 ** 2:.1f} MB em "
+                      f"{time.perf_counter() - inicio:.2f}s ({os.path.basename(destino)[:12]})")
+            else:
+                print(f"⚠️  {origem}: não cabe no limite do cache (ou tem valores não suportados)")
+        return 0
+
+    if args.comando == 'listar':
+        itens = listar(args.pasta)
+        for caminho, origem, linhas, colunas, tamanho, usado in itens:
+            quando = datetime.datetime.fromtimestamp(usado).strftime('%Y-%m-%d %H:%M')
+            print(f"   {os.path.basename(caminho)[:12]}  {origem:<30} {linhas:>9} linhas × {colunas:<3} "
+                  f"{tamanho / 1024 ** 2:>8.1f} MB  {quando}")
+        print(f"📊 {len(itens)} planilha(s), {sum(i[4] for i in itens) / 1024 ** 2:.1f} MB em {args.pasta}")
+        return 0
+
+    removidos = limpar_cache(args.pasta, args.limite_mb * 1024 ** 2)
+    print(f"🧹 {len(removidos)} arquivo(s) removido(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
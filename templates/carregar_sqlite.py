@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Carga em massa de clientes convertidos direto em um banco SQLite/libSQL.
+
+Hoje são dois passos lentos: a macro gera o .txt e o .txt é enviado pelo
+navegador. Este carregador recebe o .txt convertido (ou a própria planilha,
+convertida em streaming) e grava no arquivo de banco:
+
+1. cria uma tabela de staging temporária;
+2. insere as linhas com `executemany` em lotes grandes, um lote por transação;
+3. aplica um único upsert set-based de staging → tab_cliente (a última
+   ocorrência de cada cliente vence, como o INSERT OR REPLACE do importador web).
+
+O banco pode ser um arquivo local com o esquema de sql/Dados_Banco_Turso
+(use --criar-tabela) ou uma réplica libSQL compatível com sqlite3.
+
+Com `--checkpoint ARQUIVO`, o staging fica no próprio banco (não em temp) e
+cada lote confirmado grava o checkpoint: uma carga interrompida continua da
+primeira linha não confirmada, sem reler as anteriores, e o upsert final
+acontece uma vez só (veja checkpoint_importacao.py).
+
+Com `--ordenar`, as linhas são ordenadas por cliente antes do staging
+(ordenação externa, com memória limitada; veja ordenacao_externa.py): o
+upsert grava a B-tree de tab_cliente em sequência e as duplicatas já chegam
+resolvidas.
+
+Uso:
+    python3 carregar_sqlite.py carregar banco.db Clientes_20250101_120000.txt
+    python3 carregar_sqlite.py carregar banco.db clientes.xlsx --lote 20000 --criar-tabela
+    python3 carregar_sqlite.py carregar banco.db clientes.xlsx --checkpoint clientes.ckpt
+    python3 carregar_sqlite.py carregar banco.db filiais.csv --ordenar --memoria-mb 128
+    python3 carregar_sqlite.py comparar-lotes --linhas 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from converter_clientes import ErroConversao, ler_clientes, valor_para_texto
+from leitor_xlsx import ler_linhas_xml
+from mapeamentos import COLUNAS_CLIENTES
+from ordenacao_externa import MEMORIA_MB, descrever, ordenar_clientes
+
+TABELA = 'tab_cliente'
+STAGING = 'stg_tab_cliente'
+TAMANHO_LOTE = 10000
+LOTES_COMPARACAO = [500, 1000, 5000, 10000, 50000]
+
+ESQUEMA_TURSO = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', 'sql', 'Dados_Banco_Turso')
+
+
+def colunas_tabela(tabela=TABELA, esquema=ESQUEMA_TURSO):
+    """Lista (coluna, tipo) da tabela conforme sql/Dados_Banco_Turso."""
+    with open(esquema, encoding='utf-8') as f:
+        return [(c['coluna'], c['tipo']) for c in json.load(f) if c['tabela'] == tabela]
+
+
+def criar_tabela_clientes(conn):
+    """Cria tab_cliente com o esquema do Turso e `cliente` como chave primária."""
+    definicoes = [
+        f"{coluna} {tipo}{' PRIMARY KEY' if coluna == 'cliente' else ''}"
+        for coluna, tipo in colunas_tabela()
+    ]
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {TABELA} ({', '.join(definicoes)})")
+
+
+def _cliente_tem_chave_unica(conn):
+    """True se tab_cliente tem índice único só na coluna cliente (permite ON CONFLICT)."""
+    for _, nome, unico, *_ in conn.execute(f"PRAGMA index_list({TABELA})"):
+        if unico:
+            colunas = [linha[2] for linha in conn.execute(f"PRAGMA index_info({nome})")]
+            if colunas == ['cliente']:
+                return True
+    return False
+
+
+def ler_txt(caminho, pular=0):
+    """
+    Lê o .txt gerado pela macro/conversor: gera tuplas de valores (sem cabeçalho).
+
+    Lê em blocos e separa por CRLF, então quebras de linha simples dentro de
+    um valor são preservadas. Campos vazios viram None. As `pular` primeiras
+    linhas de dados são descartadas sem separar os campos.
+    """
+    with open(caminho, encoding='utf-8-sig', newline='') as f:
+        resto = ''
+        primeira = True
+        while True:
+            bloco = f.read(1024 * 1024)
+            linhas = (resto + bloco).split('\r\n')
+            resto = linhas.pop() if bloco else ''
+            for linha in linhas:
+                if primeira:
+                    primeira = False
+                    continue
+                if linha:
+                    if pular:
+                        pular -= 1
+                        continue
+                    yield tuple(campo[1:-1] or None for campo in linha.split('\t'))
+            if not bloco:
+                break
+
+
+def ler_origem(caminho, leitor=ler_linhas_xml):
+    """
+    Aceita o .txt convertido ou a planilha original (convertida em streaming,
+    com os mesmos valores que iriam para o .txt).
+    """
+    return (valores for _, valores in ler_origem_numerada(caminho, leitor))
+
+
+def ler_origem_numerada(caminho, leitor=ler_linhas_xml, linha_inicial=None):
+    """
+    Como `ler_origem`, mas gera (número, valores) a partir de `linha_inicial`.
+
+    O número é a linha da planilha ou, no .txt, a posição da linha de dados
+    contando o cabeçalho como 1 (linhas vazias não contam).
+    """
+    if caminho.lower().endswith(('.txt', '.tsv', '.tab')):
+        inicio = linha_inicial or 2
+        return enumerate(ler_txt(caminho, pular=inicio - 2), inicio)
+    return (
+        (numero, tuple(valor_para_texto(v).replace('"', "'") or None for v in valores))
+        for numero, valores in ler_clientes(caminho, leitor, linha_inicial=linha_inicial)
+    )
+
+
+def carregar(conn, linhas, tamanho_lote=TAMANHO_LOTE, colunas=COLUNAS_CLIENTES, checkpoint=None):
+    """
+    Carrega `linhas` em tab_cliente via staging. Retorna estatísticas e tempos.
+
+    Cada lote do staging é uma transação; o upsert final é um único comando.
+    Com `checkpoint` (checkpoint_importacao.Checkpoint), `linhas` são
+    (número, valores), o staging é uma tabela do banco que sobrevive a uma
+    interrupção e cada lote confirmado avança o checkpoint.
+    """
+    inicio = time.perf_counter()
+    lista = ', '.join(colunas)
+    esquema = 'temp' if checkpoint is None else 'main'
+    conn.execute("PRAGMA temp_store = MEMORY")
+    if checkpoint is None or not checkpoint.retomado:
+        conn.execute(f"DROP TABLE IF EXISTS {esquema}.{STAGING}")
+    elif not conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (STAGING,)).fetchone():
+        raise ErroConversao(f"Checkpoint {checkpoint.caminho} sem a tabela {STAGING} no banco: "
+                            f"apague o checkpoint e carregue de novo")
+    conn.execute(f"CREATE {'TEMP ' if esquema == 'temp' else ''}TABLE IF NOT EXISTS {esquema}.{STAGING} "
+                 f"({', '.join(c + ' TEXT' for c in colunas)})")
+    insert = f"INSERT INTO {esquema}.{STAGING} ({lista}) VALUES ({', '.join('?' * len(colunas))})"
+
+    def gravar_lote(lote):
+        with conn:
+            if checkpoint is None:
+                conn.executemany(insert, lote)
+            else:
+                conn.executemany(insert, (valores for _, valores in lote))
+        if checkpoint is not None:
+            checkpoint.confirmar(lote[-1][0] + 1, linhas=len(lote))
+
+    total = 0
+    lotes = 0
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            gravar_lote(lote)
+            total += len(lote)
+            lotes += 1
+            lote = []
+    if lote:
+        gravar_lote(lote)
+        total += len(lote)
+        lotes += 1
+    fim_staging = time.perf_counter()
+
+    # A última ocorrência de cada cliente vence
+    selecao = (f"SELECT {lista} FROM {esquema}.{STAGING} WHERE cliente IS NOT NULL AND rowid IN "
+               f"(SELECT MAX(rowid) FROM {esquema}.{STAGING} GROUP BY cliente)")
+    with conn:
+        if _cliente_tem_chave_unica(conn):
+            atualizacao = ', '.join(f"{c} = excluded.{c}" for c in colunas if c != 'cliente')
+            conn.execute(f"INSERT INTO {TABELA} ({lista}) {selecao} "
+                         f"ON CONFLICT(cliente) DO UPDATE SET {atualizacao}")
+        else:
+            conn.execute(f"DELETE FROM {TABELA} WHERE cliente IN (SELECT cliente FROM {esquema}.{STAGING})")
+            conn.execute(f"INSERT INTO {TABELA} ({lista}) {selecao}")
+    conn.execute(f"DROP TABLE {esquema}.{STAGING}")
+    if checkpoint is not None:
+        checkpoint.concluir()
+    fim = time.perf_counter()
+
+    return {
+        'linhas': total,
+        'lotes': lotes,
+        'segundos_staging': fim_staging - inicio,
+        'segundos_upsert': fim - fim_staging,
+        'segundos': fim - inicio,
+    }
+
+
+def carregar_arquivo(banco, origem, tamanho_lote=TAMANHO_LOTE, criar_tabela=False, checkpoint=None,
+                     ordenar=False, memoria_mb=MEMORIA_MB):
+    """
+    Abre `banco`, carrega `origem` (.txt ou planilha) e fecha a conexão.
+
+    Com `ordenar`, as linhas passam pela ordenação externa por cliente e o
+    resumo dela vem em `ordenacao`.
+    """
+    if not os.path.exists(origem):
+        raise ErroConversao(f"Arquivo não encontrado: {origem}")
+    conn = sqlite3.connect(banco)
+    try:
+        if criar_tabela:
+            criar_tabela_clientes(conn)
+        if checkpoint is not None:
+            linhas = ler_origem_numerada(origem, linha_inicial=checkpoint.linha)
+            return carregar(conn, linhas, tamanho_lote, checkpoint=checkpoint)
+        if ordenar:
+            estatisticas = {}
+            resultado = carregar(conn, ordenar_clientes(ler_origem(origem), memoria_mb, estatisticas=estatisticas),
+                                 tamanho_lote)
+            resultado['ordenacao'] = estatisticas
+            return resultado
+        return carregar(conn, ler_origem(origem), tamanho_lote)
+    finally:
+        conn.close()
+
+
+def _linhas_sinteticas(quantidade, semente=7):
+    aleatorio = random.Random(semente)
+    cidades = ['São Paulo', 'Ribeirão Preto', 'Maringá', 'Chapecó', 'Florianópolis']
+    for n in range(quantidade):
+        yield (
+            f'{n:06d}', f'CLIENTE {n} LTDA', f'Fantasia {n}', str(100000000 + n),
+            f'{n % 100:02d}.345.678/0001-{n % 90 + 10}', f'GRP{n % 20:02d}',
+            'AVENIDA INDEPENDÊNCIA', f'{n % 99999:05d}-000', 'Centro',
+            aleatorio.choice(cidades), 'Distribuição', f'R{n % 30:02d}', 'ATIVO',
+            f'SR{n % 60:02d}', str(n % 2000),
+        )
+
+
+def comparar_lotes(linhas=100000, tamanhos=LOTES_COMPARACAO):
+    """
+    Mede linhas/s de uma carga completa (staging + upsert) para cada tamanho
+    de lote, sempre em um banco novo com metade dos clientes já existentes.
+    """
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for tamanho in tamanhos:
+            banco = os.path.join(pasta, f'lote_{tamanho}.db')
+            conn = sqlite3.connect(banco)
+            criar_tabela_clientes(conn)
+            carregar(conn, _linhas_sinteticas(linhas // 2, semente=1), TAMANHO_LOTE)
+            resultado = carregar(conn, _linhas_sinteticas(linhas), tamanho)
+            conn.close()
+            resultado['lote'] = tamanho
+            resultados.append(resultado)
+    return resultados
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Carga em massa de clientes em banco SQLite/libSQL.')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_carregar = sub.add_parser('carregar', help='Carrega um .txt convertido (ou planilha) em tab_cliente')
+    p_carregar.add_argument('banco', help='Arquivo do banco (SQLite/libSQL)')
+    p_carregar.add_argument('origem', help='Clientes_<timestamp>.txt, planilha .xlsx/.xlsm/.xls ou exportação .csv')
+    p_carregar.add_argument('--lote', type=int, default=TAMANHO_LOTE,
+                            help=f'Linhas por transação no staging (padrão: {TAMANHO_LOTE})')
+    p_carregar.add_argument('--criar-tabela', action='store_true',
+                            help='Cria tab_cliente com o esquema de sql/Dados_Banco_Turso se não existir')
+    p_carregar.add_argument('--checkpoint', metavar='ARQUIVO',
+                            help='Grava o progresso a cada lote e retoma dele se existir '
+                                 '(veja checkpoint_importacao.py)')
+    p_carregar.add_argument('--ordenar', action='store_true',
+                            help='Ordena por cliente antes do staging, com memória limitada '
+                                 '(veja ordenacao_externa.py)')
+    p_carregar.add_argument('--memoria-mb', type=int, default=MEMORIA_MB,
+                            help=f'Memória da ordenação (padrão: {MEMORIA_MB})')
+
+    p_comparar = sub.add_parser('comparar-lotes', help='Mede linhas/s para vários tamanhos de lote')
+    p_comparar.add_argument('--linhas', type=int, default=100000, help='Linhas sintéticas (padrão: 100000)')
+
+    args = parser.parse_args(argv)
+    if getattr(args, 'ordenar', False) and args.checkpoint:
+        parser.error('--ordenar não vale com --checkpoint (a ordenação lê a origem inteira antes do primeiro lote)')
+
+    if args.comando == 'comparar-lotes':
+        print(f"🧪 Comparando tamanhos de lote com {args.linhas} linhas...")
+        resultados = comparar_lotes(args.linhas)
+        melhor = max(resultados, key=lambda r: r['linhas'] / r['segundos'])
+        for r in resultados:
+            marca = '  ⭐' if r is melhor else ''
+            print(f"   Lote {r['lote']:>6}: {r['linhas'] / r['segundos']:>10,.0f} linhas/s "
+                  f"(staging {r['segundos_staging']:.2f}s + upsert {r['segundos_upsert']:.2f}s){marca}")
+        print(f"   Referência: scripts/importar-vendas-excel.js usa lotes de 500")
+        return 0
+
+    print(f"💾 Carregando {args.origem} em {args.banco}...")
+    checkpoint = None
+    try:
+        if args.checkpoint:
+            from checkpoint_importacao import Checkpoint
+            if not os.path.exists(args.origem):
+                raise ErroConversao(f"Arquivo não encontrado: {args.origem}")
+            checkpoint = Checkpoint.abrir(args.checkpoint, args.origem, os.path.abspath(args.banco))
+            if checkpoint.descrever():
+                print(checkpoint.descrever())
+        resultado = carregar_arquivo(args.banco, args.origem, args.lote, args.criar_tabela, checkpoint,
+                                     args.ordenar, args.memoria_mb)
+    except (ErroConversao, sqlite3.Error) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+
+    velocidade = resultado['linhas'] / resultado['segundos'] if resultado['segundos'] else 0
+    print(f"✅ {resultado['linhas']} linhas em {resultado['lotes']} lotes de até {args.lote}")
+    if checkpoint is not None and checkpoint.retomado:
+        print(f"   Com as execuções anteriores: {checkpoint.contagens.get('linhas', 0)} linhas")
+    if 'ordenacao' in resultado:
+        print(f"   {descrever(resultado['ordenacao'])}")
+    print(f"   Staging: {resultado['segundos_staging']:.2f}s  Upsert: {resultado['segundos_upsert']:.2f}s")
+    print(f"📊 {velocidade:,.0f} linhas/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
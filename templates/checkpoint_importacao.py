@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Checkpoints para retomar importações grandes de onde pararam.
+
+Se uma importação de um milhão de vendas cai em 80%, recomeçar da linha 1
+confiando no INSERT OR IGNORE repete toda a leitura e quase todo o tráfego.
+Com `--checkpoint ARQUIVO`, as ferramentas de importação gravam um JSON
+pequeno depois de cada lote confirmado no destino:
+
+    {"versao": 1, "origem": "vendas.xlsx", "hash": "<sha256 da planilha>",
+     "destino": "banco_local.db", "linha": 812345, "lote": 17,
+     "contagens": {"inseridos": 780000, ...}, "atualizado_em": "..."}
+
+`linha` é a primeira linha da planilha (ou do .txt) ainda não confirmada. Ao
+rodar de novo com o mesmo checkpoint, origem (mesmo hash) e destino, a
+leitura começa direto nessa linha: o leitor XML pula o trecho anterior sem
+parsear (ver leitor_xlsx._saltar_ate_linha). Se a planilha ou o destino
+mudaram, o checkpoint é descartado e a importação recomeça.
+
+O checkpoint é gravado depois do COMMIT. Se o processo cair entre os dois, o
+último lote é enviado de novo ao retomar, o que é inofensivo: as vendas usam
+INSERT OR IGNORE e os clientes, upsert com a última ocorrência vencendo.
+Com envios concorrentes (enviar_vendas.py), `ConfirmacaoEmOrdem` só avança o
+checkpoint até o último lote confirmado sem lacunas antes dele.
+
+Usado por transformar_vendas.py --banco, enviar_vendas.py e
+carregar_sqlite.py carregar. Ao terminar sem erros, o arquivo é removido.
+
+Uso:
+    python3 transformar_vendas.py vendas.xlsx --banco banco_local.db --checkpoint vendas.ckpt
+    python3 checkpoint_importacao.py vendas.ckpt
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+
+VERSAO = 1
+TAMANHO_BLOCO_HASH = 4 * 1024 * 1024
+
+
+def hash_origem(caminho):
+    """sha256 do conteúdo do arquivo de origem."""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        while True:
+            bloco = f.read(TAMANHO_BLOCO_HASH)
+            if not bloco:
+                break
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class Checkpoint:
+    """Progresso confirmado de uma importação (origem → destino)."""
+
+    def __init__(self, caminho, origem, destino):
+        self.caminho = caminho
+        self.origem = origem
+        self.destino = destino
+        self.hash = hash_origem(origem)
+        self.linha = None
+        self.lote = 0
+        self.contagens = {}
+        self.retomado = False
+        self.descartado = None
+
+    @classmethod
+    def abrir(cls, caminho, origem, destino):
+        """Carrega o checkpoint se ele for desta origem e destino; senão começa do zero."""
+        checkpoint = cls(caminho, origem, destino)
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return checkpoint
+        except ValueError:
+            checkpoint.descartado = 'arquivo ilegível'
+            return checkpoint
+
+        if dados.get('versao') != VERSAO:
+            checkpoint.descartado = 'versão diferente'
+        elif dados.get('hash') != checkpoint.hash:
+            checkpoint.descartado = 'a origem mudou desde a execução anterior'
+        elif dados.get('destino') != destino:
+            checkpoint.descartado = f"era para outro destino ({dados.get('destino')})"
+        else:
+            checkpoint.linha = dados['linha']
+            checkpoint.lote = dados['lote']
+            checkpoint.contagens = dados.get('contagens', {})
+            checkpoint.retomado = True
+        return checkpoint
+
+    def linha_inicial(self, padrao):
+        """Linha onde a leitura deve começar."""
+        return self.linha if self.linha is not None else padrao
+
+    def confirmar(self, linha_seguinte, **contagens):
+        """Registra um lote confirmado; `linha_seguinte` é a primeira linha ainda não confirmada."""
+        self.lote += 1
+        self.linha = linha_seguinte
+        for chave, quantidade in contagens.items():
+            self.contagens[chave] = self.contagens.get(chave, 0) + quantidade
+        self.salvar()
+
+    def salvar(self):
+        dados = {
+            'versao': VERSAO,
+            'origem': os.path.abspath(self.origem),
+            'hash': self.hash,
+            'destino': self.destino,
+            'linha': self.linha,
+            'lote': self.lote,
+            'contagens': self.contagens,
+            'atualizado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+
+    def concluir(self):
+        """Importação terminada: remove o arquivo."""
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+    def descrever(self):
+        """Mensagem de retomada/descarte para os CLIs (None se começa do zero sem aviso)."""
+        if self.retomado:
+            return f"↩️  Retomando da linha {self.linha} (lote {self.lote} já confirmado)"
+        if self.descartado:
+            return f"⚠️  Checkpoint ignorado ({self.descartado}): começando do início"
+        return None
+
+
+class ConfirmacaoEmOrdem:
+    """
+    Avança o checkpoint com lotes confirmados fora de ordem.
+
+    Cada lote recebe um número sequencial (0, 1, 2...) na ordem da planilha;
+    o checkpoint só anda até o último lote com todos os anteriores
+    confirmados. Um lote que falhou segura o checkpoint, e ele é reenviado
+    na próxima execução.
+    """
+
+    def __init__(self, checkpoint):
+        self.checkpoint = checkpoint
+        self.proximo = 0
+        self.confirmados = {}
+
+    def confirmar(self, numero, linha_seguinte, **contagens):
+        self.confirmados[numero] = (linha_seguinte, contagens)
+        while self.proximo in self.confirmados:
+            linha, quantidades = self.confirmados.pop(self.proximo)
+            self.checkpoint.confirmar(linha, **quantidades)
+            self.proximo += 1
+
+
+def main(argv=None):
+    """Função principal: mostra o conteúdo de um checkpoint."""
+    parser = argparse.ArgumentParser(description='Mostra o progresso gravado em um checkpoint de importação.')
+    parser.add_argument('checkpoint', help='Arquivo de checkpoint')
+    args = parser.parse_args(argv)
+    try:
+        with open(args.checkpoint, encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    print(f"📄 {dados['origem']} → {dados['destino']}")
+    print(f"   Próxima linha: {dados['linha']}  Lotes confirmados: {dados['lote']}")
+    for chave, quantidade in dados.get('contagens', {}).items():
+        print(f"   - {chave}: {quantidade}")
+    print(f"   Atualizado em {dados['atualizado_em']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
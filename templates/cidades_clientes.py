@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Enriquecimento dos clientes com UF, rota e coordenadas de potencial_cidade.
+
+`tab_cliente.cidade` é texto livre ("CHAPECO", "Chapecó/SC", "Sta. Maria"...),
+enquanto `potencial_cidade` tem a grafia canônica com `uf`, `rota`,
+`sub_rota`, `latitude` e `longitude`. Hoje os dashboards tentam casar os dois
+em tempo de execução (join ou dicionário por igualdade exata) e perdem toda
+cidade escrita de outro jeito.
+
+Aqui uma exportação de potencial_cidade é carregada uma vez em um índice
+(dicionário) cuja chave é o nome normalizado:
+
+- sem acentos;
+- sem diferença de maiúsculas/minúsculas;
+- sem pontuação nem espaços ("Sta Bárbara d'Oeste" = "STA BARBARA D OESTE").
+
+Cada linha convertida é enriquecida com uma consulta ao dicionário. O
+resultado por texto de cidade também fica guardado, então o custo por linha é
+praticamente só a gravação.
+
+Quando o nome sozinho não basta (não achou ou existe em mais de uma UF), uma
+UF no final do texto ("Chapecó - SC", "Chapecó/SC", "Chapecó (SC)") é usada
+para escolher.
+
+Saídas, ao lado do .txt:
+
+- `<saida>_cidades.txt`: cliente, cidade original e os dados canônicos, no
+  formato do .txt do conversor;
+- `<saida>_cidades_pendentes.txt`: cidades sem correspondência ou ambíguas,
+  com o número de ocorrências.
+
+A exportação de potencial_cidade pode ser um banco SQLite/libSQL (tabela
+potencial_cidade), um JSON (lista de objetos, como os exports do Turso) ou um
+CSV/TSV com cabeçalho.
+
+Uso:
+    python3 converter_clientes.py clientes.xlsx --cidades potencial_cidade.json
+    python3 cidades_clientes.py Clientes_20250101_120000.txt --potencial banco_local.db
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+
+from converter_clientes import LEITORES, ErroConversao, formatar_linha, valor_para_texto
+from leitor_csv import ler_registros_csv
+from leitor_xlsx import ErroLeituraXlsx
+from mapeamentos import COLUNAS_CLIENTES
+import metricas
+
+TABELA_POTENCIAL = 'potencial_cidade'
+COLUNAS_POTENCIAL = ['cidade', 'uf', 'rota', 'sub_rota', 'latitude', 'longitude']
+COLUNAS_ENRIQUECIDAS = ['cliente', 'cidade', 'cidade_potencial', 'uf', 'rota_cidade',
+                        'sub_rota_cidade', 'latitude', 'longitude']
+CABECALHO_PENDENTES = ['cidade', 'motivo', 'ocorrencias']
+
+UFS = frozenset([
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+    'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO',
+])
+SEM_CORRESPONDENCIA = 'sem correspondência'
+AMBIGUA = 'ambígua'
+
+# "Cidade - UF", "Cidade/UF", "Cidade (UF)", "Cidade, UF", "Cidade UF"
+_RE_UF_FINAL = re.compile(r'^(.*?)\s*(?:[-/,(]\s*|\s)([A-Za-z]{2})\s*\)?\s*$')
+
+
+def normalizar_cidade(texto):
+    """Chave de comparação: sem acentos, maiúsculas/minúsculas, pontuação e espaços."""
+    decomposto = unicodedata.normalize('NFKD', texto).casefold()
+    # Os acentos viram marcas combinantes, que não são alfanuméricas
+    return ''.join(c for c in decomposto if c.isalnum())
+
+
+def caminho_cidades(destino):
+    """Clientes_<timestamp>.txt → Clientes_<timestamp>_cidades.txt."""
+    base, extensao = os.path.splitext(destino)
+    return f"{base}_cidades{extensao or '.txt'}"
+
+
+def caminho_pendentes(destino):
+    """Clientes_<timestamp>.txt → Clientes_<timestamp>_cidades_pendentes.txt."""
+    base, extensao = os.path.splitext(destino)
+    return f"{base}_cidades_pendentes{extensao or '.txt'}"
+
+
+# ---------------------------------------------------------------------------
+# Exportação de potencial_cidade
+# ---------------------------------------------------------------------------
+
+def _texto(valor):
+    if valor is None:
+        return None
+    # Números (latitude/longitude de um JSON) ficam com ponto decimal
+    return str(valor).strip() or None
+
+
+def _projetar(registros, colunas):
+    """Tuplas na ordem de COLUNAS_POTENCIAL a partir de linhas com as `colunas` dadas."""
+    posicoes = {c.strip().lower(): i for i, c in reversed(list(enumerate(colunas)))}
+    if 'cidade' not in posicoes:
+        raise ErroConversao(f"Coluna 'cidade' não encontrada na exportação de {TABELA_POTENCIAL}")
+    indices = [posicoes.get(c) for c in COLUNAS_POTENCIAL]
+    for registro in registros:
+        yield tuple(None if i is None or i >= len(registro) else _texto(registro[i]) for i in indices)
+
+
+def ler_potencial(caminho):
+    """Gera (cidade, uf, rota, sub_rota, latitude, longitude) da exportação de potencial_cidade."""
+    if not os.path.exists(caminho):
+        raise ErroConversao(f"Arquivo não encontrado: {caminho}")
+    extensao = os.path.splitext(caminho)[1].lower()
+
+    if extensao in ('.db', '.sqlite', '.sqlite3'):
+        conn = sqlite3.connect(caminho)
+        try:
+            cursor = conn.execute(f"SELECT * FROM {TABELA_POTENCIAL}")
+            colunas = [descricao[0] for descricao in cursor.description]
+            yield from _projetar(cursor, colunas)
+        except sqlite3.Error as e:
+            raise ErroConversao(f"{caminho}: {e}")
+        finally:
+            conn.close()
+        return
+
+    if extensao == '.json':
+        with open(caminho, encoding='utf-8-sig') as f:
+            dados = json.load(f)
+        # Export do Turso: lista de objetos ou {"rows": [...]}
+        if isinstance(dados, dict):
+            dados = dados.get('rows', [])
+        colunas = list(dados[0]) if dados else ['cidade']
+        yield from _projetar(([registro.get(c) for c in colunas] for registro in dados), colunas)
+        return
+
+    registros = ler_registros_csv(caminho)
+    yield from _projetar(registros, next(registros, []))
+
+
+# ---------------------------------------------------------------------------
+# Índice
+# ---------------------------------------------------------------------------
+
+class IndiceCidades:
+    """Dicionário nome normalizado → registros de potencial_cidade."""
+
+    def __init__(self, registros):
+        self.por_chave = {}
+        self.registros = 0
+        for registro in registros:
+            if registro[0] is None:
+                continue
+            self.por_chave.setdefault(normalizar_cidade(registro[0]), []).append(registro)
+            self.registros += 1
+
+    def __len__(self):
+        return len(self.por_chave)
+
+    def procurar(self, texto):
+        """(registro, None) da cidade, ou (None, motivo) se não houver um único."""
+        candidatos = self.por_chave.get(normalizar_cidade(texto), [])
+        if len({r[1] for r in candidatos}) != 1:
+            separado = _RE_UF_FINAL.match(texto)
+            if separado and separado.group(2).upper() in UFS:
+                uf = separado.group(2).upper()
+                com_uf = [r for r in candidatos or self.por_chave.get(normalizar_cidade(separado.group(1)), [])
+                          if (r[1] or '').upper() == uf]
+                if com_uf:
+                    candidatos = com_uf
+        if not candidatos:
+            return None, SEM_CORRESPONDENCIA
+        if len({r[1] for r in candidatos}) > 1:
+            return None, AMBIGUA
+        # Linhas repetidas da mesma cidade/UF: vale a primeira
+        return candidatos[0], None
+
+
+def carregar_indice(caminho):
+    with metricas.atuais().etapa('cidades'):
+        return IndiceCidades(ler_potencial(caminho))
+
+
+# ---------------------------------------------------------------------------
+# Enriquecimento
+# ---------------------------------------------------------------------------
+
+class EnriquecimentoCidades:
+    """Grava <saida>_cidades.txt linha a linha e conta as cidades pendentes."""
+
+    def __init__(self, indice, caminho, colunas=COLUNAS_CLIENTES):
+        self.indice = indice
+        self.caminho = caminho
+        self.i_cliente = colunas.index('cliente')
+        self.i_cidade = colunas.index('cidade')
+        self.linhas = 0
+        self.encontradas = 0
+        # texto da cidade → (colunas formatadas após o cliente, motivo)
+        self.resolvidas = {}
+        self.pendentes = {}
+        self.arquivo = open(caminho, 'w', encoding='utf-8-sig', newline='')
+        self.arquivo.write(formatar_linha(COLUNAS_ENRIQUECIDAS))
+
+    def _resolver(self, cidade):
+        if not cidade:
+            registro, motivo = None, None
+        else:
+            registro, motivo = self.indice.procurar(cidade)
+        dados = (cidade,) + (registro or (None,) * len(COLUNAS_POTENCIAL))
+        resolvida = self.resolvidas[cidade] = ('\t' + formatar_linha(dados), motivo, registro is not None)
+        return resolvida
+
+    def acrescentar(self, valores):
+        """Registra uma linha (valores brutos ou texto, na ordem das colunas)."""
+        cidade = valor_para_texto(valores[self.i_cidade]).replace('"', "'").strip()
+        resolvida = self.resolvidas.get(cidade)
+        if resolvida is None:
+            resolvida = self._resolver(cidade)
+        sufixo, motivo, encontrada = resolvida
+        self.arquivo.write('\r\n"' + valor_para_texto(valores[self.i_cliente]).replace('"', "'") + '"' + sufixo)
+        self.linhas += 1
+        if encontrada:
+            self.encontradas += 1
+        elif motivo is not None:
+            self.pendentes[cidade] = self.pendentes.get(cidade, 0) + 1
+
+    def acompanhar(self, linhas):
+        """Repassa (número, valores brutos) do conversor, enriquecendo cada linha."""
+        medicao = metricas.atuais()
+        for numero, valores in linhas:
+            with medicao.etapa('cidades'):
+                self.acrescentar(valores)
+            yield numero, valores
+
+    def lista_pendentes(self):
+        """[(cidade, motivo, ocorrências)], das mais frequentes para as menos."""
+        return sorted(
+            ((cidade, self.resolvidas[cidade][1], quantidade) for cidade, quantidade in self.pendentes.items()),
+            key=lambda item: (-item[2], item[0]),
+        )
+
+    def gravar_pendentes(self, caminho):
+        with open(caminho, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write(formatar_linha(CABECALHO_PENDENTES))
+            for pendente in self.lista_pendentes():
+                f.write('\r\n' + formatar_linha(pendente))
+
+    def resumo(self):
+        return {
+            'linhas': self.linhas,
+            'encontradas': self.encontradas,
+            'sem_cidade': self.linhas - self.encontradas - sum(self.pendentes.values()),
+            'pendentes': self.lista_pendentes(),
+        }
+
+    def fechar(self):
+        self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+def imprimir_resumo(resumo, limite=10):
+    """Resumo do enriquecimento para os CLIs."""
+    pendentes = resumo['pendentes']
+    ocorrencias = sum(quantidade for _, _, quantidade in pendentes)
+    print(f"🏙️  Cidades: {resumo['encontradas']} de {resumo['linhas']} linha(s) enriquecidas")
+    if resumo['sem_cidade']:
+        print(f"   - Sem cidade: {resumo['sem_cidade']}")
+    if pendentes:
+        print(f"   ⚠️  {len(pendentes)} cidade(s) sem correspondência única ({ocorrencias} linha(s)):")
+        for cidade, motivo, quantidade in pendentes[:limite]:
+            print(f"      {cidade or '(vazia)'} — {motivo}: {quantidade}")
+        if len(pendentes) > limite:
+            print(f"      ... e mais {len(pendentes) - limite}")
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Enriquece os clientes com UF, rota e coordenadas de potencial_cidade.')
+    parser.add_argument('origem', help='Clientes_<timestamp>.txt convertido ou planilha de clientes')
+    parser.add_argument('--potencial', required=True,
+                        help='Exportação de potencial_cidade: banco (.db), JSON ou CSV/TSV')
+    parser.add_argument('-o', '--saida',
+                        help='Arquivo de saída (padrão: <origem>_cidades.txt; pendentes em <saida>_pendentes.txt)')
+    parser.add_argument('--leitor', choices=sorted(LEITORES), default='xml',
+                        help='Leitor da planilha (cache = cache colunar por hash, veja cache_planilhas.py)')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    from carregar_sqlite import ler_origem
+
+    if not os.path.exists(args.origem):
+        print(f"❌ Erro: Arquivo não encontrado: {args.origem}")
+        return 1
+    destino = args.saida or caminho_cidades(args.origem)
+    pendentes = os.path.splitext(destino)[0] + '_pendentes.txt'
+    medicao = metricas.iniciar(args)
+    inicio = time.perf_counter()
+    try:
+        indice = carregar_indice(args.potencial)
+        print(f"🗺️  {indice.registros} cidade(s) de {args.potencial}")
+        print(f"📖 Lendo clientes: {args.origem}")
+        with EnriquecimentoCidades(indice, destino) as enriquecimento:
+            for valores in medicao.medir_iterador('leitura', ler_origem(args.origem, LEITORES[args.leitor])):
+                with medicao.etapa('cidades'):
+                    enriquecimento.acrescentar(valores)
+        enriquecimento.gravar_pendentes(pendentes)
+    except (ErroConversao, ErroLeituraXlsx) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    imprimir_resumo(enriquecimento.resumo())
+    print(f"⏱️  {time.perf_counter() - inicio:.2f}s")
+    print(f"📁 Cidades: {destino}")
+    print(f"📁 Pendentes: {pendentes}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compara a vazão do leitor XML direto (leitor_xlsx) com o openpyxl read-only.
+
+Gera planilhas sintéticas de clientes (15 colunas mapeadas + colunas extras
+do ERP) e de vendas (24 colunas), lê cada uma pelos dois caminhos, confere
+que os valores são idênticos e imprime linhas/s e o ganho de velocidade.
+
+Uso:
+    python3 comparar_leitores.py
+    python3 comparar_leitores.py --linhas 200000 --extras 20
+"""
+
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from converter_clientes import ler_linhas_openpyxl, localizar_colunas
+from leitor_xlsx import ler_linhas_xml
+from mapeamentos import (CABECALHOS_CLIENTES, CABECALHOS_VENDAS,
+                         MAPEAMENTO_CLIENTES, MAPEAMENTO_VENDAS)
+
+CIDADES = ['São Paulo', 'Ribeirão Preto', 'Jundiaí', 'Maringá', 'Florianópolis', 'Chapecó']
+
+
+def gerar_planilha_clientes(caminho, linhas, extras):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Clientes')
+    ws.append(CABECALHOS_CLIENTES + [f'Extra {i}' for i in range(extras)])
+    ws.append([])
+    for n in range(linhas):
+        ws.append([
+            f'{n:06d}', f'CLIENTE {n} LTDA', f'Fantasia {n}', str(100000000 + n),
+            f'{n % 100:02d}.345.678/0001-{n % 90 + 10}', f'GRP{n % 20:02d}',
+            'AVENIDA INDEPENDÊNCIA', f'{n % 99999:05d}-000', 'Centro',
+            random.choice(CIDADES), 'Distribuição', f'R{n % 30:02d}', 'ATIVO',
+            f'SR{n % 60:02d}', n % 2000,
+        ] + [n * 1.5] * extras)
+    wb.save(caminho)
+
+
+def gerar_planilha_vendas(caminho, linhas):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Vendas')
+    ws.append(CABECALHOS_VENDAS)
+    inicio = datetime.datetime(2024, 1, 1)
+    for n in range(linhas):
+        ws.append([
+            'EP', 100000 + n // 5, inicio + datetime.timedelta(days=n % 365),
+            f'PROD{n % 500:04d}', n % 50 + 1, '5.102', 'ALIMENTOS', 'Cx com 12',
+            f'{n % 5000:06d}', f'CLIENTE {n % 5000}', 'Fantasia', f'REP{n % 40:03d}',
+            'SP', random.choice(CIDADES), 5.5, 25.0, 10, 250.0, 25.0, 225.0,
+            225.0, 'GERMANI', 22.5, 250.0,
+        ])
+    wb.save(caminho)
+
+
+def medir(leitor, caminho, mapeamento, linha_inicial):
+    """Lê a planilha inteira e devolve (linhas, segundos, amostra de valores)."""
+    escolher = lambda cabecalho: localizar_colunas(cabecalho, mapeamento)
+    inicio = time.perf_counter()
+    total = 0
+    amostra = []
+    for numero, valores in leitor(caminho, escolher, linha_inicial):
+        total += 1
+        if total % 997 == 1:
+            amostra.append((numero, valores))
+    return total, time.perf_counter() - inicio, amostra
+
+
+def comparar(nome, caminho, mapeamento, linha_inicial):
+    linhas_o, tempo_o, amostra_o = medir(ler_linhas_openpyxl, caminho, mapeamento, linha_inicial)
+    linhas_x, tempo_x, amostra_x = medir(ler_linhas_xml, caminho, mapeamento, linha_inicial)
+
+    if linhas_o != linhas_x or amostra_o != amostra_x:
+        print(f"❌ {nome}: os leitores devolveram valores diferentes!")
+        return
+
+    print(f"📊 {nome} ({linhas_x} linhas, {os.path.getsize(caminho) / 1e6:.1f} MB)")
+    print(f"   openpyxl read-only: {tempo_o:7.2f}s  {linhas_o / tempo_o:>10,.0f} linhas/s")
+    print(f"   XML direto:         {tempo_x:7.2f}s  {linhas_x / tempo_x:>10,.0f} linhas/s")
+    print(f"   ✅ Ganho: {tempo_o / tempo_x:.1f}x")
+
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=50000, help='Linhas por planilha (padrão: 50000)')
+    parser.add_argument('--extras', type=int, default=10,
+                        help='Colunas não mapeadas na planilha de clientes (padrão: 10)')
+    args = parser.parse_args()
+
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as pasta:
+        clientes = os.path.join(pasta, 'clientes.xlsx')
+        vendas = os.path.join(pasta, 'vendas.xlsx')
+
+        print(f"🛠️  Gerando planilhas sintéticas com {args.linhas} linhas...")
+        gerar_planilha_clientes(clientes, args.linhas, args.extras)
+        gerar_planilha_vendas(vendas, args.linhas)
+
+        comparar(f'Clientes ({len(MAPEAMENTO_CLIENTES)} colunas + {args.extras} extras)',
+                 clientes, MAPEAMENTO_CLIENTES, 3)
+        comparar(f'Vendas ({len(MAPEAMENTO_VENDAS)} colunas)', vendas, MAPEAMENTO_VENDAS, 2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Conversão em lote de planilhas de clientes usando vários processos.
+
+No fechamento do mês chegam dezenas de planilhas (uma por filial). Em vez de
+convertê-las uma a uma, como a macro, os arquivos são distribuídos em um pool
+de processos. Uma planilha muito grande é dividida em fatias de linhas: cada
+processo converte a sua fatia em um arquivo parcial e, no final, as partes são
+concatenadas na ordem original, aplicando o mesmo recorte de linhas da macro.
+
+Os arquivos de saída seguem o padrão Clientes_<timestamp>.txt da macro; com
+mais de uma planilha de origem, o nome da origem é acrescentado ao final
+(Clientes_<timestamp>_<origem>.txt).
+
+Uso:
+    python3 conversao_lote.py filial_01.xlsx filial_02.xlsx ...
+    python3 conversao_lote.py pasta_com_planilhas/ --pasta-saida saida/
+    python3 conversao_lote.py clientes_grande.xlsx --linhas-por-fatia 100000
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from converter_clientes import (LEITORES, LINHA_INICIAL_DADOS, ErroConversao, celula_vazia,
+                                converter_arquivo, formatar_linha, ler_com_coluna_a,
+                                nome_arquivo_saida)
+from leitor_xlsx import contar_linhas_xml
+from mapeamentos import COLUNAS_CLIENTES
+
+EXTENSOES = ('.xlsx', '.xlsm', '.xls', '.csv')
+LINHAS_POR_FATIA = 250000
+TAMANHO_BUFFER = 1024 * 1024
+
+
+def listar_origens(caminhos):
+    """
+    Expande pastas em planilhas e CSVs (ver EXTENSOES), mantendo a ordem
+    informada. Um arquivo informado duas vezes entra uma só.
+    """
+    origens = []
+    vistos = set()
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            candidatos = sorted(
+                os.path.join(caminho, nome) for nome in os.listdir(caminho)
+                if nome.lower().endswith(EXTENSOES) and not nome.startswith('~$')
+            )
+        else:
+            candidatos = [caminho]
+        for candidato in candidatos:
+            chave = os.path.normcase(os.path.abspath(candidato))
+            if chave not in vistos:
+                vistos.add(chave)
+                origens.append(candidato)
+    return origens
+
+
+def sufixos_lote(origens):
+    """
+    Sufixo do .txt de cada origem: o nome do arquivo sem extensão.
+
+    Nomes repetidos (a/clientes.xlsx e b/clientes.xlsx, ou clientes.xlsx e
+    clientes.xlsm) levam a pasta na frente e, se ainda repetirem, um contador,
+    para uma saída não sobrescrever a outra.
+    """
+    bases = [os.path.splitext(os.path.basename(origem))[0] for origem in origens]
+    ocorrencias = {}
+    for base in bases:
+        ocorrencias[base.lower()] = ocorrencias.get(base.lower(), 0) + 1
+    usados = {base.lower() for base in bases if ocorrencias[base.lower()] == 1}
+    sufixos = []
+    for origem, base in zip(origens, bases):
+        sufixo = base
+        if ocorrencias[base.lower()] > 1:
+            pasta = os.path.basename(os.path.dirname(os.path.abspath(origem)))
+            sufixo = f"{pasta}_{base}" if pasta else base
+            candidato, contador = sufixo, 2
+            while candidato.lower() in usados:
+                candidato, contador = f"{sufixo}_{contador}", contador + 1
+            sufixo = candidato
+        usados.add(sufixo.lower())
+        sufixos.append(sufixo)
+    return sufixos
+
+
+def dividir_em_fatias(total_linhas, linhas_por_fatia, linha_inicial=LINHA_INICIAL_DADOS):
+    """
+    Divide as linhas de dados em intervalos (início, fim) de tamanho fixo.
+
+    O último intervalo fica aberto (fim = None) porque a dimensão gravada na
+    planilha pode estar desatualizada.
+    """
+    if not total_linhas or total_linhas - linha_inicial + 1 <= linhas_por_fatia:
+        return [(linha_inicial, None)]
+    fatias = []
+    inicio = linha_inicial
+    while inicio + linhas_por_fatia <= total_linhas:
+        fatias.append((inicio, inicio + linhas_por_fatia - 1))
+        inicio += linhas_por_fatia
+    if inicio <= total_linhas:
+        fatias.append((inicio, None))
+    else:
+        fatias[-1] = (fatias[-1][0], None)
+    return fatias
+
+
+def _tarefa_arquivo(origem, destino, leitor):
+    """Converte uma planilha inteira (executa em um processo do pool)."""
+    resultado = converter_arquivo(origem, destino, leitor=LEITORES[leitor])
+    resultado['pid'] = os.getpid()
+    return resultado
+
+
+def _tarefa_fatia(origem, parte, inicio, fim, leitor):
+    """
+    Converte as linhas [inicio, fim] de uma planilha em um arquivo parcial.
+
+    Grava todas as linhas (sem recorte) e devolve as posições necessárias para
+    o recorte da macro ser aplicado na junção: a última linha com a coluna A
+    preenchida e o último cliente (número da linha, byte final na parte).
+    """
+    comeco = time.perf_counter()
+    total = 0
+    posicao = 0
+    coluna_a = None
+    cliente = None
+    cliente_ate_coluna_a = None
+
+    with open(parte, 'wb', buffering=TAMANHO_BUFFER) as f:
+        linhas = ler_com_coluna_a(origem, LEITORES[leitor], linha_inicial=inicio, linha_final=fim)
+        for numero, valores, coluna_a_preenchida in linhas:
+            dados = ('\r\n' + formatar_linha(valores)).encode('utf-8')
+            f.write(dados)
+            posicao += len(dados)
+            total += 1
+            if not celula_vazia(valores[0]):
+                cliente = (numero, posicao)
+            if coluna_a_preenchida:
+                coluna_a = numero
+                cliente_ate_coluna_a = cliente
+
+    return {
+        'pid': os.getpid(),
+        'parte': parte,
+        'linhas': total,
+        'segundos': time.perf_counter() - comeco,
+        'coluna_a': coluna_a,
+        'cliente': cliente,
+        'cliente_ate_coluna_a': cliente_ate_coluna_a,
+    }
+
+
+def juntar_fatias(destino, fatias, linha_inicial=LINHA_INICIAL_DADOS):
+    """
+    Concatena as partes na ordem, cortando no último cliente como a macro.
+
+    `fatias` são os resultados de `_tarefa_fatia` na ordem das linhas.
+    Retorna o número de linhas de dados gravadas.
+    """
+    # A macro vai até a última coluna A preenchida e grava até o último
+    # cliente anterior a ela
+    ultima = max((i for i, f in enumerate(fatias) if f['coluna_a']), default=None)
+    if ultima is None:
+        raise ErroConversao("Arquivo sem dados!")
+
+    corte = None
+    if fatias[ultima]['cliente_ate_coluna_a']:
+        corte = (ultima, fatias[ultima]['cliente_ate_coluna_a'])
+    else:
+        for i in range(ultima - 1, -1, -1):
+            if fatias[i]['cliente']:
+                corte = (i, fatias[i]['cliente'])
+                break
+    if corte is None:
+        raise ErroConversao("Arquivo sem dados!")
+
+    indice_corte, (linha_corte, bytes_corte) = corte
+    with open(destino, 'wb', buffering=TAMANHO_BUFFER) as saida:
+        saida.write(formatar_linha(COLUNAS_CLIENTES).encode('utf-8-sig'))
+        for fatia in fatias[:indice_corte]:
+            with open(fatia['parte'], 'rb') as parte:
+                shutil.copyfileobj(parte, saida, TAMANHO_BUFFER)
+        with open(fatias[indice_corte]['parte'], 'rb') as parte:
+            restante = bytes_corte
+            while restante:
+                dados = parte.read(min(TAMANHO_BUFFER, restante))
+                saida.write(dados)
+                restante -= len(dados)
+
+    return linha_corte - linha_inicial + 1
+
+
+def converter_lote(origens, pasta_saida='.', processos=None, linhas_por_fatia=LINHAS_POR_FATIA,
+                   leitor='xml', momento=None):
+    """
+    Converte todas as `origens` (sem repetições, ver `listar_origens`) em paralelo.
+
+    Retorna (resultados por arquivo, tarefas executadas, segundos totais).
+    Cada resultado traz origem, destino e linhas, ou `erro`.
+    """
+    comeco = time.perf_counter()
+    momento = momento or datetime.datetime.now()
+    os.makedirs(pasta_saida, exist_ok=True)
+    pasta_partes = tempfile.mkdtemp(prefix='partes_', dir=pasta_saida)
+
+    resultados = {}
+    tarefas = []
+    fatias_por_origem = {}
+    sufixos = sufixos_lote(origens) if len(origens) > 1 else [None] * len(origens)
+
+    try:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            futuros = {}
+            for n, (origem, sufixo) in enumerate(zip(origens, sufixos)):
+                destino = nome_arquivo_saida(pasta_saida, momento=momento, sufixo=sufixo)
+                resultados[origem] = {'origem': origem, 'destino': destino}
+
+                try:
+                    intervalos = dividir_em_fatias(contar_linhas_xml(origem), linhas_por_fatia)
+                except Exception:
+                    intervalos = [(LINHA_INICIAL_DADOS, None)]
+
+                if len(intervalos) == 1:
+                    futuro = pool.submit(_tarefa_arquivo, origem, destino, leitor)
+                    futuros[futuro] = (origem, None)
+                    continue
+
+                fatias_por_origem[origem] = [None] * len(intervalos)
+                for i, (inicio, fim) in enumerate(intervalos):
+                    parte = os.path.join(pasta_partes, f'{n:04d}_{i:04d}.part')
+                    futuro = pool.submit(_tarefa_fatia, origem, parte, inicio, fim, leitor)
+                    futuros[futuro] = (origem, i)
+
+            for futuro in as_completed(futuros):
+                origem, indice = futuros[futuro]
+                try:
+                    tarefa = futuro.result()
+                except Exception as e:
+                    resultados[origem]['erro'] = str(e)
+                    continue
+                tarefa['origem'] = origem
+                tarefas.append(tarefa)
+                if indice is None:
+                    resultados[origem]['linhas'] = tarefa['linhas']
+                else:
+                    fatias_por_origem[origem][indice] = tarefa
+
+        for origem, fatias in fatias_por_origem.items():
+            if 'erro' in resultados[origem]:
+                continue
+            try:
+                resultados[origem]['linhas'] = juntar_fatias(resultados[origem]['destino'], fatias)
+                resultados[origem]['fatias'] = len(fatias)
+            except ErroConversao as e:
+                resultados[origem]['erro'] = str(e)
+    finally:
+        shutil.rmtree(pasta_partes, ignore_errors=True)
+
+    return [resultados[origem] for origem in origens], tarefas, time.perf_counter() - comeco
+
+
+def resumo_por_processo(tarefas):
+    """Soma linhas e tempo ocupado de cada processo do pool: {pid: (linhas, segundos)}."""
+    resumo = {}
+    for tarefa in tarefas:
+        linhas, segundos = resumo.get(tarefa['pid'], (0, 0.0))
+        resumo[tarefa['pid']] = (linhas + tarefa['linhas'], segundos + tarefa['segundos'])
+    return resumo
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description='Converte várias planilhas de clientes em paralelo (pool de processos).'
+    )
+    parser.add_argument('origens', nargs='+', help='Planilhas ou pastas com planilhas (.xlsx/.xlsm/.xls) e exportações .csv')
+    parser.add_argument('--pasta-saida', default='.', help='Pasta dos .txt gerados (padrão: pasta atual)')
+    parser.add_argument('-p', '--processos', type=int, default=os.cpu_count(),
+                        help='Número de processos (padrão: número de CPUs)')
+    parser.add_argument('--linhas-por-fatia', type=int, default=LINHAS_POR_FATIA,
+                        help=f'Planilhas maiores que isso são divididas entre processos (padrão: {LINHAS_POR_FATIA})')
+    parser.add_argument('--leitor', choices=sorted(LEITORES), default='xml',
+                        help='Leitor das planilhas (padrão: xml)')
+    args = parser.parse_args(argv)
+
+    origens = listar_origens(args.origens)
+    if not origens:
+        print("❌ Nenhuma planilha encontrada.")
+        return 1
+
+    print(f"🚀 Convertendo {len(origens)} planilha(s) com {args.processos} processo(s)...")
+    resultados, tarefas, segundos = converter_lote(
+        origens, args.pasta_saida, args.processos, args.linhas_por_fatia, args.leitor
+    )
+
+    erros = 0
+    total = 0
+    for resultado in resultados:
+        if 'erro' in resultado:
+            erros += 1
+            print(f"   ❌ {resultado['origem']}: {resultado['erro']}")
+            continue
+        total += resultado['linhas']
+        fatias = f" ({resultado['fatias']} fatias)" if resultado.get('fatias') else ''
+        print(f"   ✅ {resultado['origem']} → {resultado['destino']}: {resultado['linhas']} linhas{fatias}")
+
+    print(f"\n📊 Vazão por processo:")
+    for pid, (linhas, ocupado) in sorted(resumo_por_processo(tarefas).items()):
+        velocidade = linhas / ocupado if ocupado else 0
+        print(f"   PID {pid:>7}: {linhas:>9} linhas em {ocupado:6.2f}s ({velocidade:,.0f} linhas/s)")
+    velocidade = total / segundos if segundos else 0
+    print(f"   Total: {total} linhas em {segundos:.2f}s ({velocidade:,.0f} linhas/s)")
+
+    return 1 if erros else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
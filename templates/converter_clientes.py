@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Conversor de planilhas de clientes para o arquivo .txt de importação.
+
+Substitui a macro VBA Importar_Clientes sem depender do Excel: lê a planilha
+de origem em modo streaming (XML direto via leitor_xlsx, ou openpyxl
+read-only), aplica o mesmo mapeamento de cabeçalhos e grava o mesmo formato
+de saída:
+
+- codificação UTF-8 com BOM (como o ADODB.Stream da macro)
+- valores entre aspas duplas, separados por tabulação
+- linhas separadas por CRLF (sem quebra de linha no final)
+- aspas duplas dentro dos valores substituídas por apóstrofo
+
+Uso:
+    python3 converter_clientes.py planilha_origem.xlsx
+    python3 converter_clientes.py planilha_origem.xlsx -o Clientes.txt
+    python3 converter_clientes.py planilha_origem.xlsx --leitor openpyxl
+    python3 converter_clientes.py planilha_origem.xlsx --leitor cache
+"""
+
+import argparse
+import datetime
+import functools
+import os
+import sys
+import time
+
+from escrita_txt import SaidaTxt, arquivos_saida, remover_saida
+from leitor_csv import ler_linhas_csv
+from leitor_xlsx import ErroLeituraXlsx, ler_linhas_xml
+from mapeamentos import MAPEAMENTO_CLIENTES
+import metricas
+from ordenacao_externa import MEMORIA_MB, descrever, ordenar_linhas_txt
+
+# Igual à macro: linha 1 = cabeçalho, linha 2 vazia, dados a partir da linha 3
+LINHA_INICIAL_DADOS = 3
+# O CSV do ERP não tem a linha vazia (linhas em branco são puladas pelo leitor)
+LINHA_INICIAL_CSV = 2
+
+
+class ErroConversao(Exception):
+    """Erro de conversão reportado ao usuário (equivalente ao MsgBox da macro)."""
+
+
+def ler_linhas_openpyxl(caminho, escolher_colunas, linha_inicial=LINHA_INICIAL_DADOS,
+                        linha_final=None):
+    """
+    Lê a primeira aba em modo read-only e gera (número da linha, valores).
+
+    `escolher_colunas(cabecalho)` recebe a linha 1 e devolve a lista de índices
+    (base 0) a extrair; índices None viram valores vazios.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        cabecalho = next(ws.iter_rows(max_row=1, values_only=True), ())
+        indices = escolher_colunas(list(cabecalho))
+
+        linhas = ws.iter_rows(min_row=linha_inicial, max_row=linha_final, values_only=True)
+        for numero, valores in enumerate(linhas, linha_inicial):
+            total = len(valores)
+            yield numero, tuple(
+                valores[i] if i is not None and i < total else None
+                for i in indices
+            )
+    finally:
+        wb.close()
+
+
+def ler_linhas_cache(caminho, escolher_colunas, linha_inicial=LINHA_INICIAL_DADOS, linha_final=None):
+    """Leitor XML com cache colunar por hash do conteúdo (cache_planilhas.py, requer NumPy)."""
+    from cache_planilhas import ler_linhas_cache as ler
+    return ler(caminho, escolher_colunas, linha_inicial, linha_final)
+
+
+def _valor_xls(tipo, valor, modo_data):
+    import xlrd
+
+    if tipo in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return None
+    if tipo == xlrd.XL_CELL_NUMBER:
+        # Como no .xlsx: número inteiro vira int
+        return int(valor) if valor.is_integer() and abs(valor) < 2 ** 53 else valor
+    if tipo == xlrd.XL_CELL_DATE:
+        return xlrd.xldate_as_datetime(valor, modo_data)
+    if tipo == xlrd.XL_CELL_BOOLEAN:
+        return bool(valor)
+    if tipo == xlrd.XL_CELL_ERROR:
+        return xlrd.error_text_from_code.get(valor)
+    return valor
+
+
+def ler_linhas_xls(caminho, escolher_colunas, linha_inicial=LINHA_INICIAL_DADOS, linha_final=None):
+    """
+    Lê a primeira aba de um .xls (Excel 97-2003) via xlrd e gera (número da linha, valores).
+
+    O xlrd carrega a aba inteira, mas o formato tem no máximo 65.536 linhas.
+    Números inteiros, datas e booleanos saem como nos leitores de .xlsx.
+    """
+    try:
+        import xlrd
+    except ImportError:
+        raise ErroLeituraXlsx("A leitura de .xls requer o xlrd (pip install xlrd)")
+
+    try:
+        livro = xlrd.open_workbook(caminho, on_demand=True)
+    except xlrd.XLRDError as e:
+        raise ErroLeituraXlsx(f"{caminho}: {e}")
+    try:
+        aba = livro.sheet_by_index(0)
+        indices = escolher_colunas(aba.row_values(0) if aba.nrows else [])
+        ultima = aba.nrows if linha_final is None else min(linha_final, aba.nrows)
+        for numero in range(linha_inicial, ultima + 1):
+            tipos = aba.row_types(numero - 1)
+            valores = aba.row_values(numero - 1)
+            total = len(valores)
+            yield numero, tuple(
+                _valor_xls(tipos[i], valores[i], livro.datemode) if i is not None and i < total else None
+                for i in indices
+            )
+    finally:
+        livro.release_resources()
+
+
+LEITORES = {
+    'xml': ler_linhas_xml,
+    'openpyxl': ler_linhas_openpyxl,
+    'cache': ler_linhas_cache,
+}
+
+# Formatos com leitor próprio, qualquer que seja o --leitor escolhido
+LEITORES_POR_EXTENSAO = {
+    '.csv': ler_linhas_csv,
+    '.xls': ler_linhas_xls,
+}
+
+
+def leitor_para_arquivo(caminho, leitor=ler_linhas_xml):
+    """Leitor de `caminho`: o da extensão (.csv, .xls) ou, para .xlsx/.xlsm, `leitor`."""
+    return LEITORES_POR_EXTENSAO.get(os.path.splitext(caminho)[1].lower(), leitor)
+
+
+def linha_inicial_padrao(caminho):
+    """Primeira linha de dados: 3 nas planilhas (como a macro), 2 no CSV."""
+    return LINHA_INICIAL_CSV if caminho.lower().endswith('.csv') else LINHA_INICIAL_DADOS
+
+
+def localizar_colunas(cabecalho, mapeamento=MAPEAMENTO_CLIENTES):
+    """
+    Retorna o índice de cada cabeçalho do mapeamento na linha 1 (ou None).
+
+    Assim como Application.Match, a comparação ignora maiúsculas/minúsculas e
+    usa a primeira ocorrência.
+    """
+    posicoes = {}
+    for indice, valor in enumerate(cabecalho):
+        if valor is None:
+            continue
+        posicoes.setdefault(str(valor).lower(), indice)
+    return [posicoes.get(origem.lower()) for origem, _ in mapeamento]
+
+
+def valor_para_texto(valor):
+    """Converte o valor da célula para texto como o CStr da macro (Excel pt-BR)."""
+    if valor is None:
+        return ''
+    if isinstance(valor, str):
+        return valor
+    if isinstance(valor, bool):
+        return 'True' if valor else 'False'
+    if isinstance(valor, int):
+        return str(valor)
+    if isinstance(valor, float):
+        if valor.is_integer() and abs(valor) < 1e15:
+            return str(int(valor))
+        return format(valor, '.15G').replace('.', ',')
+    if isinstance(valor, datetime.datetime):
+        if (valor.hour, valor.minute, valor.second) == (0, 0, 0):
+            return valor.strftime('%d/%m/%Y')
+        return valor.strftime('%d/%m/%Y %H:%M:%S')
+    if isinstance(valor, datetime.date):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, datetime.time):
+        return valor.strftime('%H:%M:%S')
+    return str(valor)
+
+
+def formatar_linha(valores):
+    """Monta a linha do .txt: "valor1"<TAB>"valor2"... (aspas viram apóstrofo)."""
+    return '\t'.join(
+        '"' + valor_para_texto(valor).replace('"', "'") + '"'
+        for valor in valores
+    )
+
+
+def linhas_ate_ultimo_cliente(linhas):
+    """
+    Reproduz o recorte de linhas da macro em modo streaming.
+
+    A macro copia da linha 3 até a última célula preenchida da coluna A da
+    origem e depois grava até o último `cliente` preenchido. Linhas vazias no
+    meio são mantidas; as do final são descartadas. Cada item de `linhas` é
+    (número, valores, coluna_a_preenchida), e `valores[0]` é o cliente.
+    Só as linhas ainda não confirmadas ficam em memória.
+    """
+    pendentes = []
+    ultimo_cliente = -1
+    for numero, valores, coluna_a in linhas:
+        pendentes.append((numero, valores))
+        if not celula_vazia(valores[0]):
+            ultimo_cliente = len(pendentes) - 1
+        if coluna_a and ultimo_cliente >= 0:
+            yield from pendentes[:ultimo_cliente + 1]
+            del pendentes[:ultimo_cliente + 1]
+            ultimo_cliente = -1
+
+
+def celula_vazia(valor):
+    """Célula vazia para a macro (IsEmpty ou texto vazio)."""
+    return valor is None or valor == ''
+
+
+def ler_com_coluna_a(caminho, leitor=ler_linhas_xml, mapeamento=MAPEAMENTO_CLIENTES,
+                     linha_inicial=None, colunas_ausentes=None, linha_final=None):
+    """
+    Gera (número, valores mapeados, coluna_a_preenchida) sem o recorte final.
+
+    CSV e .xls usam o leitor da extensão (ver `leitor_para_arquivo`); sem
+    `linha_inicial`, vale `linha_inicial_padrao`. Se `colunas_ausentes` for
+    uma lista, recebe os cabeçalhos não encontrados.
+    """
+    leitor = leitor_para_arquivo(caminho, leitor)
+    if linha_inicial is None:
+        linha_inicial = linha_inicial_padrao(caminho)
+
+    def escolher_colunas(cabecalho):
+        indices = localizar_colunas(cabecalho, mapeamento)
+        if colunas_ausentes is not None:
+            colunas_ausentes.extend(
+                origem for (origem, _), i in zip(mapeamento, indices) if i is None
+            )
+        # Coluna A da origem vai junto no final para o recorte da macro
+        return indices + [0]
+
+    for numero, valores in leitor(caminho, escolher_colunas, linha_inicial, linha_final):
+        yield numero, valores[:-1], not celula_vazia(valores[-1])
+
+
+def ler_clientes(caminho, leitor=ler_linhas_xml, mapeamento=MAPEAMENTO_CLIENTES,
+                 linha_inicial=None, colunas_ausentes=None):
+    """
+    Gera (número da linha, valores mapeados) na ordem do mapeamento, já com o
+    mesmo recorte de linhas da macro.
+
+    Se `colunas_ausentes` for uma lista, recebe os cabeçalhos não encontrados.
+    """
+    return linhas_ate_ultimo_cliente(
+        ler_com_coluna_a(caminho, leitor, mapeamento, linha_inicial, colunas_ausentes)
+    )
+
+
+def escrever_linhas_txt(destino, colunas, linhas_formatadas, linhas_por_parte=None, comprimir=False):
+    """
+    Grava o cabeçalho `colunas` + linhas já formatadas. Retorna o total de linhas de dados.
+
+    Com `linhas_por_parte`, grava <destino>_parte001.txt, ... com cabeçalho em
+    cada parte; com `comprimir`, os arquivos saem como .txt.gz (ver escrita_txt.py).
+    """
+    medicao = metricas.atuais()
+    with medicao.etapa('escrita'), SaidaTxt(destino, formatar_linha(colunas), linhas_por_parte, comprimir) as saida:
+        total = saida.escrever_linhas(linhas_formatadas)
+    medicao.contar('linhas_gravadas', total)
+    return total
+
+
+def escrever_txt(destino, linhas, mapeamento=MAPEAMENTO_CLIENTES, linhas_por_parte=None, comprimir=False,
+                 ordenar=None):
+    """
+    Grava cabeçalho + linhas no formato da macro. Retorna o total de linhas de dados.
+
+    `ordenar` é aplicada às linhas já formatadas antes da gravação (ex.:
+    ordenacao_externa.ordenar_linhas_txt).
+    """
+    medicao = metricas.atuais()
+    linhas = medicao.medir_iterador('leitura', linhas)
+    formatadas = medicao.medir_iterador('conversao', (formatar_linha(valores) for _, valores in linhas))
+    if ordenar is not None:
+        formatadas = ordenar(formatadas)
+    return escrever_linhas_txt(
+        destino,
+        [coluna for _, coluna in mapeamento],
+        formatadas,
+        linhas_por_parte,
+        comprimir,
+    )
+
+
+def nome_arquivo_saida(pasta='.', prefixo='Clientes', momento=None, sufixo=None):
+    """
+    Caminho no padrão da macro: <prefixo>_yyyymmdd_hhnnss.txt.
+
+    Com `sufixo` (ex.: nome da filial), fica <prefixo>_yyyymmdd_hhnnss_<sufixo>.txt.
+    """
+    momento = momento or datetime.datetime.now()
+    nome = f"{prefixo}_{momento.strftime('%Y%m%d_%H%M%S')}"
+    if sufixo:
+        nome += f"_{sufixo}"
+    return os.path.join(pasta, nome + '.txt')
+
+
+def converter_arquivo(origem, destino, leitor=ler_linhas_xml,
+                      mapeamento=MAPEAMENTO_CLIENTES, linha_inicial=None,
+                      validar=False, lookups=None, cidades=None, linhas_por_parte=None, comprimir=False,
+                      ordenar=False, memoria_mb=MEMORIA_MB):
+    """
+    Converte a planilha `origem` no .txt `destino`.
+
+    Com `validar`, CNPJ/CPF, CEP e Inscrição Estadual são conferidos em lotes
+    (CEP normalizado) e os erros vão para <destino>_erros.txt (ver
+    validar_clientes.py). Com `lookups` (pasta), as tabelas lkp_* de
+    clientes são montadas na mesma passada e gravadas lá (ver
+    lookups_clientes.py). Com `cidades` (exportação de potencial_cidade), cada
+    linha ganha UF, rota e coordenadas em <destino>_cidades.txt (ver
+    cidades_clientes.py). Com `linhas_por_parte` e/ou `comprimir`, a saída é
+    dividida em partes e/ou gravada como .txt.gz (ver escrita_txt.py), e os
+    arquivos gravados vêm em `arquivos`. Com `ordenar`, as linhas saem em
+    ordem de cliente, sem repetidos (vence a última) e sem as linhas sem
+    cliente, usando até `memoria_mb` (ver ordenacao_externa.py); o resumo vem
+    em `ordenacao`. Retorna um dicionário com linhas gravadas, colunas
+    ausentes e tempo gasto.
+    """
+    if not os.path.exists(origem):
+        raise ErroConversao(f"Arquivo não encontrado: {origem}")
+
+    inicio = time.perf_counter()
+    ausentes = []
+    linhas = ler_clientes(origem, leitor, mapeamento, linha_inicial, ausentes)
+    relatorio = None
+    if validar:
+        from validar_clientes import RelatorioValidacao, caminho_relatorio, validar_linhas
+        relatorio = RelatorioValidacao(caminho_relatorio(destino))
+        linhas = validar_linhas(linhas, relatorio, colunas=[coluna for _, coluna in mapeamento])
+    tabelas_lookup = None
+    if lookups:
+        from lookups_clientes import LookupsClientes, gravar_lookups
+        tabelas_lookup = LookupsClientes([coluna for _, coluna in mapeamento])
+        linhas = tabelas_lookup.acompanhar(linhas)
+    enriquecimento = None
+    if cidades:
+        from cidades_clientes import EnriquecimentoCidades, caminho_cidades, carregar_indice
+        enriquecimento = EnriquecimentoCidades(carregar_indice(cidades), caminho_cidades(destino),
+                                               colunas=[coluna for _, coluna in mapeamento])
+        linhas = enriquecimento.acompanhar(linhas)
+    ordenacao = {} if ordenar else None
+    try:
+        total = escrever_txt(destino, linhas, mapeamento, linhas_por_parte, comprimir,
+                             functools.partial(ordenar_linhas_txt, memoria_mb=memoria_mb, estatisticas=ordenacao)
+                             if ordenar else None)
+    except ErroLeituraXlsx as e:
+        remover_saida(destino, linhas_por_parte, comprimir)
+        raise ErroConversao(str(e))
+    finally:
+        if relatorio is not None:
+            relatorio.fechar()
+        if enriquecimento is not None:
+            enriquecimento.fechar()
+
+    if total == 0:
+        remover_saida(destino, linhas_por_parte, comprimir)
+        raise ErroConversao("Arquivo sem dados!")
+
+    resultado = {
+        'origem': origem,
+        'destino': destino,
+        'arquivos': arquivos_saida(destino, total, linhas_por_parte, comprimir),
+        'linhas': total,
+        'colunas_ausentes': ausentes,
+        'segundos': time.perf_counter() - inicio,
+    }
+    if ordenacao is not None:
+        resultado['ordenacao'] = ordenacao
+    if tabelas_lookup is not None:
+        resultado['lookups'] = gravar_lookups(lookups, tabelas_lookup)
+        resultado['destino_lookups'] = lookups
+    if enriquecimento is not None:
+        from cidades_clientes import caminho_pendentes
+        enriquecimento.gravar_pendentes(caminho_pendentes(destino))
+        resultado['cidades'] = enriquecimento.resumo()
+        resultado['destino_cidades'] = enriquecimento.caminho
+        resultado['destino_pendentes'] = caminho_pendentes(destino)
+    if relatorio is not None:
+        resultado['destino_erros'] = relatorio.caminho
+        resultado['erros_validacao'] = {f'{coluna}: {erro}': quantidade
+                                        for (coluna, erro), quantidade in sorted(relatorio.contagem.items())}
+    return resultado
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description='Converte planilhas de clientes para o .txt de importação (substitui a macro Importar_Clientes).'
+    )
+    parser.add_argument('origem', help='Planilha de origem (.xlsx/.xlsm/.xls) ou exportação .csv do ERP')
+    parser.add_argument('-o', '--saida',
+                        help='Arquivo .txt de saída (padrão: Clientes_<timestamp>.txt na pasta atual)')
+    parser.add_argument('--linha-inicial', type=int,
+                        help='Primeira linha de dados na origem (padrão: 3, como a macro; 2 no CSV)')
+    parser.add_argument('--leitor', choices=sorted(LEITORES), default='xml',
+                        help='xml = leitura direta do XML (rápido, padrão); openpyxl = via openpyxl read-only; '
+                             'cache = leitor XML com cache colunar por hash (veja cache_planilhas.py)')
+    parser.add_argument('--indice',
+                        help='Índice de hashes da execução anterior: grava só clientes novos/alterados '
+                             'e a lista de removidos (veja delta_clientes.py)')
+    parser.add_argument('--validar', action='store_true',
+                        help='Confere CNPJ/CPF, CEP e Inscrição Estadual, normaliza o CEP e grava '
+                             '<saida>_erros.txt (veja validar_clientes.py)')
+    parser.add_argument('--lookups', metavar='PASTA',
+                        help='Monta lkp_localidades e lkp_clientes na mesma passada e grava o SQL e os '
+                             '.txt em PASTA (veja lookups_clientes.py)')
+    parser.add_argument('--cidades', metavar='POTENCIAL',
+                        help='Exportação de potencial_cidade (.db, JSON ou CSV): grava UF, rota e coordenadas '
+                             'de cada cliente em <saida>_cidades.txt (veja cidades_clientes.py)')
+    parser.add_argument('--linhas-por-parte', type=int, metavar='N',
+                        help='Divide a saída em <saida>_parte001.txt, ... de N linhas, cada uma com cabeçalho '
+                             '(para envio em paralelo)')
+    parser.add_argument('--gzip', action='store_true',
+                        help='Grava a saída já comprimida (.txt.gz); veja escrita_txt.py')
+    parser.add_argument('--ordenar', action='store_true',
+                        help='Grava em ordem de cliente, sem repetidos (vence a última ocorrência), com '
+                             'ordenação externa para origens maiores que a memória; veja ordenacao_externa.py')
+    parser.add_argument('--memoria-mb', type=int, default=MEMORIA_MB,
+                        help=f'Memória da ordenação (padrão: {MEMORIA_MB})')
+    metricas.adicionar_argumentos(parser)
+    return parser
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    if args.indice:
+        # O delta (delta_clientes.py) grava só o .txt e o índice
+        incompativeis = [opcao for opcao, valor in (
+            ('--linhas-por-parte', args.linhas_por_parte), ('--gzip', args.gzip), ('--ordenar', args.ordenar),
+            ('--validar', args.validar), ('--lookups', args.lookups), ('--cidades', args.cidades),
+        ) if valor]
+        if incompativeis:
+            parser.error(f"{', '.join(incompativeis)} não vale(m) com --indice")
+    destino = args.saida or nome_arquivo_saida()
+    metricas.iniciar(args)
+
+    print(f"📖 Lendo arquivo: {args.origem}")
+    try:
+        if args.indice:
+            from delta_clientes import converter_delta
+            resultado = converter_delta(args.origem, destino, args.indice, leitor=LEITORES[args.leitor],
+                                        linha_inicial=args.linha_inicial)
+        else:
+            resultado = converter_arquivo(args.origem, destino, leitor=LEITORES[args.leitor],
+                                          linha_inicial=args.linha_inicial, validar=args.validar,
+                                          lookups=args.lookups, cidades=args.cidades,
+                                          linhas_por_parte=args.linhas_por_parte, comprimir=args.gzip,
+                                          ordenar=args.ordenar, memoria_mb=args.memoria_mb)
+    except ErroConversao as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    for coluna in resultado['colunas_ausentes']:
+        print(f"   ⚠️  Coluna não encontrada na origem: {coluna}")
+
+    segundos = resultado['segundos']
+    velocidade = resultado['linhas'] / segundos if segundos else 0
+    print(f"✅ Arquivo criado e salvo com sucesso!")
+    for caminho in resultado.get('arquivos', [destino]):
+        print(f"📁 Local: {caminho}")
+    if 'ordenacao' in resultado:
+        print(descrever(resultado['ordenacao']))
+    print(f"📊 {resultado['linhas']} linhas em {segundos:.2f}s ({velocidade:,.0f} linhas/s)")
+    if args.indice:
+        print(f"   Novos: {resultado['novos']}  Alterados: {resultado['alterados']}  "
+              f"Sem alteração: {resultado['inalterados']}  Removidos: {resultado['removidos']}")
+        if resultado['repetidos']:
+            print(f"   ⚠️  Clientes repetidos na origem (vale a última linha): {resultado['repetidos']}")
+        print(f"📁 Removidos: {resultado['destino_removidos']}")
+    if 'destino_erros' in resultado:
+        print(f"🔎 Validação: {sum(resultado['erros_validacao'].values())} erro(s)")
+        for descricao, quantidade in resultado['erros_validacao'].items():
+            print(f"   - {descricao} = {quantidade}")
+        print(f"📁 Erros: {resultado['destino_erros']}")
+    if 'destino_lookups' in resultado:
+        for tabela, quantidade in resultado['lookups'].items():
+            print(f"🔍 {tabela}: {quantidade} registro(s)")
+        print(f"📁 Lookups: {resultado['destino_lookups']}")
+    if 'destino_cidades' in resultado:
+        from cidades_clientes import imprimir_resumo
+        imprimir_resumo(resultado['cidades'])
+        print(f"📁 Cidades: {resultado['destino_cidades']}")
+        print(f"📁 Pendentes: {resultado['destino_pendentes']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,92 @@
 #!/usr/bin/env python3
 """
 Script para criar o template Excel com macro VBA para importação de clientes.
+
+Com --vendas, cria também o template de importação de vendas, com listas
+suspensas (validação de dados) em Representante, Produto, Família e Cidade.
 """
 
+import argparse
+import datetime
+import filecmp
+import hashlib
+import io
+import itertools
+import json
+import sqlite3
+import time
 import zipfile
 import os
+import shutil
+import sys
+from xml.sax.saxutils import escape
+import openpyxl
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter, quote_sheetname
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
 from openpyxl.worksheet.table import Table, TableStyleInfo
-import shutil
+
+from carregar_sqlite import TABELA, ler_txt
+from mapeamentos import CABECALHOS_CLIENTES, CABECALHOS_VENDAS, COLUNAS_CLIENTES, MAPEAMENTO_CLIENTES
+import metricas
+from pacote_xlsm import (DATA_REPRODUTIVEL, PARTE_VBA, ajustar_parte, gerar_xlsm, ler_vba_project,
+                         normalizar_pacote, partes_ajustadas)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ESTILO_CABECALHO = 'Cabeçalho Clientes'
+ESTILO_DADOS = 'Dados Clientes'
+ESTILO_CABECALHO_VENDAS = 'Cabeçalho Vendas'
+LINHA_INICIAL_EXPORTACAO = 3
+
+# Template de vendas: cabeçalho na linha 1, dados a partir da linha 2 (como o
+# importador de vendas lê). Cada lista suspensa vem de uma tabela lkp_*:
+# (cabeçalho da coluna validada, SELECT do valor [e da descrição], nome definido)
+ABA_VENDAS = 'Vendas'
+ABA_LISTAS = 'Listas'
+LISTAS_VENDAS = [
+    ('Representante', "SELECT representante, MAX(desc_representante) FROM lkp_representantes "
+                      "WHERE COALESCE(representante, '') <> '' GROUP BY representante ORDER BY representante",
+     'lista_representantes'),
+    ('Produto', "SELECT produto, MAX(desc_produto) FROM lkp_produtos "
+                "WHERE COALESCE(produto, '') <> '' GROUP BY produto ORDER BY produto",
+     'lista_produtos'),
+    ('Família', "SELECT DISTINCT desc_familia FROM lkp_produtos "
+                "WHERE COALESCE(desc_familia, '') <> '' ORDER BY desc_familia",
+     'lista_familias'),
+    ('Cidade', "SELECT DISTINCT cidade FROM lkp_localidades "
+               "WHERE COALESCE(cidade, '') <> '' ORDER BY cidade",
+     'lista_cidades'),
+]
+
+# Aumente ao mudar o layout gerado (abas, estilos, textos das instruções):
+# faz parte do hash do cache de templates
+VERSAO_GERADOR = '2'
+PASTA_SAIDA = os.path.dirname(os.path.abspath(__file__))
+PASTA_CACHE = os.path.join(PASTA_SAIDA, '.cache')
+ARTEFATOS = ['template_importacao_clientes.xlsx', 'template_importacao_clientes.xlsm',
+             'template_importacao_clientes_MACRO.bas']
+
+# Dados da aba de exemplo
+EXEMPLO_DADOS = [
+    ['001', 'COMÉRCIO AÇÃO E SOLUÇÃO LTDA', 'Ação e Solução', '123456789', '12.345.678/0001-90',
+     'GRP01', 'AVENIDA INDEPENDÊNCIA', '12345-678', 'Centro', 'São Paulo',
+     'Distribuição', 'R01', 'ATIVO', 'SR01', '100'],
+    ['002', 'SUPERMERCADO BOM PREÇO LTDA', 'Bom Preço', '987654321', '98.765.432/0001-10',
+     'GRP02', 'RUA DAS FLORES', '54321-876', 'Jardim Europa', 'Rio de Janeiro',
+     'Varejo', 'R02', 'ATIVO', 'SR02', '250'],
+    ['003', 'DISTRIBUIDORA CENTRAL', 'Central Dist', '456789123', '45.678.912/0001-34',
+     'GRP01', 'AVENIDA BRASIL', '11111-222', 'Industrial', 'Belo Horizonte',
+     'Distribuição', 'R01', 'ATIVO', 'SR01', '500'],
+]
 
 def criar_aba_instrucoes(wb):
     """Cria a aba de instruções."""
@@ -70,23 +148,7 @@ def criar_aba_instrucoes(wb):
     ws[f'A{linha}'].font = Font(name='Calibri', size=11, bold=True)
     linha += 1
 
-    mapeamento = [
-        ('Cliente', '→', 'cliente'),
-        ('Nome', '→', 'nome'),
-        ('Fantasia', '→', 'fantasia'),
-        ('Inscr. Est.', '→', 'insc_est'),
-        ('CNPJ/CPF', '→', 'cnpj_cpf'),
-        ('Grupo', '→', 'grupo'),
-        ('Endereço', '→', 'endereco'),
-        ('CEP', '→', 'cep'),
-        ('Bairro', '→', 'bairro'),
-        ('Cidade', '→', 'cidade'),
-        ('Nome (Grupo)', '→', 'grupo_desc'),
-        ('Descr. (Rota)', '→', 'rota'),
-        ('Descrição (Situação)', '→', 'sit_cliente'),
-        ('Descrição (Sub Rota)', '→', 'sub_rota'),
-        ('Número Endereço', '→', 'num_endereco'),
-    ]
+    mapeamento = [(origem, '→', destino) for origem, destino in MAPEAMENTO_CLIENTES]
 
     for col_origem, seta, col_destino in mapeamento:
         ws[f'A{linha}'] = col_origem
@@ -131,11 +193,7 @@ def criar_aba_exemplo(wb):
     ws = wb.create_sheet("📝 Exemplo de Dados", 1)
 
     # Cabeçalhos
-    headers = [
-        'Cliente', 'Nome', 'Fantasia', 'Inscr. Est.', 'CNPJ/CPF', 'Grupo',
-        'Endereço', 'CEP', 'Bairro', 'Cidade', 'Nome (Grupo)',
-        'Descr. (Rota)', 'Descrição (Situação)', 'Descrição (Sub Rota)', 'Número Endereço'
-    ]
+    headers = CABECALHOS_CLIENTES
 
     # Estilo de cabeçalho
     header_font = Font(name='Calibri', size=11, bold=True, color="FFFFFF")
@@ -158,21 +216,8 @@ def criar_aba_exemplo(wb):
         cell.border = border
         ws.column_dimensions[cell.column_letter].width = 20
 
-    # Dados de exemplo
-    exemplo_dados = [
-        ['001', 'COMÉRCIO AÇÃO E SOLUÇÃO LTDA', 'Ação e Solução', '123456789', '12.345.678/0001-90',
-         'GRP01', 'AVENIDA INDEPENDÊNCIA', '12345-678', 'Centro', 'São Paulo',
-         'Distribuição', 'R01', 'ATIVO', 'SR01', '100'],
-        ['002', 'SUPERMERCADO BOM PREÇO LTDA', 'Bom Preço', '987654321', '98.765.432/0001-10',
-         'GRP02', 'RUA DAS FLORES', '54321-876', 'Jardim Europa', 'Rio de Janeiro',
-         'Varejo', 'R02', 'ATIVO', 'SR02', '250'],
-        ['003', 'DISTRIBUIDORA CENTRAL', 'Central Dist', '456789123', '45.678.912/0001-34',
-         'GRP01', 'AVENIDA BRASIL', '11111-222', 'Industrial', 'Belo Horizonte',
-         'Distribuição', 'R01', 'ATIVO', 'SR01', '500'],
-    ]
-
     # Adicionar dados de exemplo
-    for row_num, row_data in enumerate(exemplo_dados, 2):
+    for row_num, row_data in enumerate(EXEMPLO_DADOS, 2):
         for col_num, value in enumerate(row_data, 1):
             cell = ws.cell(row=row_num, column=col_num)
             cell.value = value
@@ -185,14 +230,267 @@ def criar_aba_exemplo(wb):
     ws['A6'].font = Font(name='Calibri', size=10, italic=True, color="666666")
     ws.merge_cells('A6:E6')
 
-def adicionar_macro_vba(arquivo_xlsm):
+def registrar_estilos(wb):
     """
-    Adiciona o código VBA ao arquivo Excel.
-    Arquivos .xlsm são arquivos ZIP com estrutura específica.
+    Registra os estilos nomeados do template no workbook.
+
+    Cada célula referencia o estilo pelo nome (um único xf no styles.xml), em
+    vez de carregar seus próprios Font/PatternFill/Border.
     """
+    borda = Side(style='thin')
+    # Formato texto: códigos como '001' continuam com zeros à esquerda ao editar
+    dados = NamedStyle(name=ESTILO_DADOS, number_format='@')
+    dados.border = Border(left=borda, right=borda, top=borda, bottom=borda)
+
+    wb.add_named_style(estilo_cabecalho(ESTILO_CABECALHO))
+    wb.add_named_style(dados)
 
-    # Código VBA
-    vba_code = '''Attribute VB_Name = "Module1"
+
+def estilo_cabecalho(nome):
+    """Estilo nomeado de cabeçalho: branco em negrito sobre vermelho, com borda."""
+    borda = Side(style='thin')
+    cabecalho = NamedStyle(name=nome)
+    cabecalho.font = Font(name='Calibri', size=11, bold=True, color="FFFFFF")
+    cabecalho.fill = PatternFill(start_color="FC0303", end_color="FC0303", fill_type="solid")
+    cabecalho.alignment = Alignment(horizontal='center', vertical='center')
+    cabecalho.border = Border(left=borda, right=borda, top=borda, bottom=borda)
+    return cabecalho
+
+
+def ler_base_clientes(origem):
+    """
+    Gera as linhas de clientes (tuplas na ordem de COLUNAS_CLIENTES).
+
+    `origem` é o .txt gerado pela macro/conversor ou um banco SQLite/libSQL
+    com tab_cliente.
+    """
+    if origem.lower().endswith(('.db', '.sqlite', '.sqlite3')):
+        conn = sqlite3.connect(origem)
+        try:
+            yield from conn.execute(f"SELECT {', '.join(COLUNAS_CLIENTES)} FROM {TABELA}")
+        finally:
+            conn.close()
+    else:
+        yield from ler_txt(origem)
+
+
+def _linhas_xml(linhas, estilo, primeira_linha):
+    """
+    Serializa as linhas direto no XML da aba (células inlineStr com o estilo
+    nomeado). Gera blocos de bytes e, no final, o total de linhas.
+    """
+    vazia = f'<c s="{estilo}"/>'
+    inicio_celula = f'<c s="{estilo}" t="inlineStr"><is><t xml:space="preserve">'
+    fim_celula = '</t></is></c>'
+    numero = primeira_linha - 1
+    bloco = []
+    for numero, valores in enumerate(linhas, primeira_linha):
+        celulas = [
+            vazia if valor is None or valor == '' else
+            inicio_celula + escape(ILLEGAL_CHARACTERS_RE.sub('', str(valor))) + fim_celula
+            for valor in valores
+        ]
+        bloco.append(f'<row r="{numero}">{"".join(celulas)}</row>')
+        if len(bloco) >= 5000:
+            yield ''.join(bloco).encode('utf-8')
+            bloco = []
+    if bloco:
+        yield ''.join(bloco).encode('utf-8')
+    yield numero - primeira_linha + 1
+
+
+def _esqueleto_exportacao():
+    """
+    Workbook write-only com cabeçalho, estilos, zebra e painel congelado, sem
+    linhas de dados. Retorna (style_id das células de dados, BytesIO do .xlsx).
+    """
+    wb = Workbook(write_only=True)
+    registrar_estilos(wb)
+    ws = wb.create_sheet("Clientes")
+    ws.freeze_panes = f'A{LINHA_INICIAL_EXPORTACAO}'
+
+    cabecalho = []
+    for coluna, titulo in enumerate(CABECALHOS_CLIENTES, 1):
+        ws.column_dimensions[get_column_letter(coluna)].width = 20
+        celula = WriteOnlyCell(ws, value=titulo)
+        celula.style = ESTILO_CABECALHO
+        cabecalho.append(celula)
+    ws.append(cabecalho)
+    ws.append([])  # linha 2 fica vazia: a macro lê os dados a partir da linha 3
+
+    referencia = WriteOnlyCell(ws)
+    referencia.style = ESTILO_DADOS
+    estilo_dados = referencia.style_id
+
+    # Zebra só nas linhas preenchidas; continua valendo para linhas novas
+    ultima = get_column_letter(len(CABECALHOS_CLIENTES))
+    ws.conditional_formatting.add(
+        f'A{LINHA_INICIAL_EXPORTACAO}:{ultima}1048576',
+        FormulaRule(formula=[f'AND(MOD(ROW(),2)=0,$A{LINHA_INICIAL_EXPORTACAO}<>"")'],
+                    fill=PatternFill(bgColor="F8F9FA", fill_type="solid")),
+    )
+
+    esqueleto = io.BytesIO()
+    wb.save(esqueleto)
+    return estilo_dados, esqueleto
+
+
+def exportar_base_clientes(origem, destino, vba_project=None):
+    """
+    Gera o template de importação já preenchido com a base de clientes.
+
+    O esqueleto (cabeçalho, estilos nomeados, zebra por formatação
+    condicional, painel congelado) é montado com um workbook write-only do
+    openpyxl; as linhas são gravadas em streaming direto no XML da aba, a
+    partir da linha 3 como a macro espera. Com `destino` .xlsm, o pacote já
+    sai como XLSM na mesma passada (com `vba_project`, se informado).
+    Retorna o número de linhas.
+    """
+    medicao = metricas.atuais()
+    with medicao.etapa('esqueleto'):
+        estilo_dados, esqueleto = _esqueleto_exportacao()
+
+    xlsm = destino.lower().endswith('.xlsm')
+    com_vba = vba_project is not None
+    ajustar = partes_ajustadas(com_vba) if xlsm else set()
+    linhas = medicao.medir_iterador('leitura', ler_base_clientes(origem))
+    blocos = medicao.medir_iterador(
+        'conversao', _linhas_xml(linhas, estilo_dados, LINHA_INICIAL_EXPORTACAO)
+    )
+
+    total = 0
+    with medicao.etapa('escrita'), zipfile.ZipFile(esqueleto) as modelo, \
+            zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as saida:
+        for info in modelo.infolist():
+            dados = modelo.read(info)
+            if info.filename in ajustar:
+                dados = ajustar_parte(info.filename, dados, com_vba)
+            if info.filename != 'xl/worksheets/sheet1.xml':
+                saida.writestr(info, dados)
+                continue
+            antes, fim_dados, depois = dados.partition(b'</sheetData>')
+            with saida.open(info.filename, 'w', force_zip64=True) as aba:
+                aba.write(antes)
+                for bloco in blocos:
+                    if isinstance(bloco, int):
+                        total = bloco
+                    else:
+                        aba.write(bloco)
+                aba.write(fim_dados + depois)
+        if xlsm and com_vba:
+            saida.writestr(PARTE_VBA, vba_project)
+    medicao.contar('linhas_gravadas', total)
+    return total
+
+
+def ler_listas_vendas(banco):
+    """
+    {cabeçalho: [(valor,) ou (valor, descrição)]} das tabelas lkp_* de um
+    banco SQLite/libSQL.
+    """
+    # sqlite3.connect criaria um banco vazio no lugar de um caminho errado
+    if not os.path.isfile(banco):
+        raise FileNotFoundError(f"banco não encontrado: {banco}")
+    conn = sqlite3.connect(banco)
+    try:
+        return {cabecalho: [(str(linha[0]),) + linha[1:] for linha in conn.execute(sql)]
+                for cabecalho, sql, _ in LISTAS_VENDAS}
+    finally:
+        conn.close()
+
+
+def _linhas_listas(listas):
+    """
+    Layout da aba de listas: cada lista ocupa uma coluna de valores (mais uma
+    de descrições, se tiver), lado a lado. Retorna ({cabeçalho: letra da
+    coluna de valores}, gerador das linhas, a começar pelo cabeçalho).
+    """
+    cabecalho = []
+    letras = {}
+    larguras = []
+    for cabecalho_lista, _, _ in LISTAS_VENDAS:
+        letras[cabecalho_lista] = get_column_letter(len(cabecalho) + 1)
+        valores = listas[cabecalho_lista]
+        largura = len(valores[0]) if valores else 1
+        cabecalho.append(cabecalho_lista)
+        if largura > 1:
+            cabecalho.append(f'Descrição ({cabecalho_lista})')
+        larguras.append(largura)
+
+    def linhas():
+        yield cabecalho
+        colunas = [listas[cabecalho_lista] for cabecalho_lista, _, _ in LISTAS_VENDAS]
+        vazios = [(None,) * largura for largura in larguras]
+        for linha in itertools.zip_longest(*colunas):
+            yield [valor for valores, vazio in zip(linha, vazios) for valor in (valores or vazio)]
+
+    return letras, linhas()
+
+
+def criar_template_vendas(listas, destino):
+    """
+    Gera o template de importação de vendas com listas suspensas.
+
+    Representante, Produto, Família e Cidade só aceitam os valores de
+    `listas` (ver `ler_listas_vendas`), guardados em uma aba oculta e
+    referenciados por nomes definidos. O workbook é write-only: as abas vão
+    direto para o XML, então listas com dezenas de milhares de valores não
+    ficam em memória como células do openpyxl. Retorna {cabeçalho: valores}.
+    """
+    medicao = metricas.atuais()
+    wb = Workbook(write_only=True)
+    wb.add_named_style(estilo_cabecalho(ESTILO_CABECALHO_VENDAS))
+
+    ws = wb.create_sheet(ABA_VENDAS)
+    ws.freeze_panes = 'A2'
+    colunas = {titulo: get_column_letter(coluna) for coluna, titulo in enumerate(CABECALHOS_VENDAS, 1)}
+    for letra in colunas.values():
+        ws.column_dimensions[letra].width = 18
+
+    letras_listas, linhas_listas = _linhas_listas(listas)
+    for cabecalho_lista, _, nome in LISTAS_VENDAS:
+        ultima = len(listas[cabecalho_lista]) + 1
+        if ultima < 2:
+            continue
+        letra_lista = letras_listas[cabecalho_lista]
+        referencia = f"{quote_sheetname(ABA_LISTAS)}!${letra_lista}$2:${letra_lista}${ultima}"
+        wb.defined_names[nome] = DefinedName(nome, attr_text=referencia)
+        validacao = DataValidation(
+            type='list', formula1=nome, allow_blank=True,
+            showErrorMessage=True, errorStyle='stop',
+            errorTitle=f'Valor inválido em {cabecalho_lista}',
+            error=f'Escolha um valor da lista de {cabecalho_lista} (aba {ABA_LISTAS}).',
+        )
+        letra = colunas[cabecalho_lista]
+        validacao.add(f'{letra}2:{letra}1048576')
+        ws.data_validations.append(validacao)
+
+    cabecalho = []
+    for titulo in CABECALHOS_VENDAS:
+        celula = WriteOnlyCell(ws, value=titulo)
+        celula.style = ESTILO_CABECALHO_VENDAS
+        cabecalho.append(celula)
+    ws.append(cabecalho)
+
+    listas_ws = wb.create_sheet(ABA_LISTAS)
+    listas_ws.sheet_state = 'hidden'
+    for linha in medicao.medir_iterador('listas', linhas_listas):
+        listas_ws.append(linha)
+
+    with medicao.etapa('salvar'):
+        wb.save(destino)
+    return {cabecalho_lista: len(listas[cabecalho_lista]) for cabecalho_lista, _, _ in LISTAS_VENDAS}
+
+
+def memoria_maxima_mb():
+    """Pico de memória residente do processo em MB (None se indisponível)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Código VBA da macro Importar_Clientes
+CODIGO_VBA = '''Attribute VB_Name = "Module1"
 Sub Importar_Clientes()
     On Error GoTo ErrorHandler
 
@@ -415,28 +713,27 @@ Cleanup:
 End Sub
 '''
 
-    # Diretório temporário para manipulação
-    temp_dir = '/tmp/excel_temp'
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
 
-    # Extrai o arquivo XLSX
-    with zipfile.ZipFile(arquivo_xlsm.replace('.xlsm', '.xlsx'), 'r') as zip_ref:
-        zip_ref.extractall(temp_dir)
-
-    # Cria a estrutura VBA
-    vba_dir = os.path.join(temp_dir, 'xl')
-    os.makedirs(vba_dir, exist_ok=True)
-
-    # Cria vbaProject.bin (arquivo binário VBA)
-    # Nota: Esta é uma simplificação. Para produção, seria necessário
-    # usar uma biblioteca especializada ou um template pré-existente
+def adicionar_macro_vba(arquivo_xlsm, vba_project=None):
+    """
+    Adiciona o código VBA ao arquivo Excel.
+    Arquivos .xlsm são arquivos ZIP com estrutura específica.
+    """
 
-    # Por ora, vamos criar um arquivo de texto com o código VBA
-    # que o usuário pode importar manualmente
+    # Salva o código VBA em texto para importação manual (ALT + F11)
     vba_file = arquivo_xlsm.replace('.xlsm', '_MACRO.bas')
     with open(vba_file, 'w', encoding='utf-8') as f:
-        f.write(vba_code)
+        f.write(CODIGO_VBA)
+
+    # Monta o XLSM direto do XLSX (sem extrair o ZIP). O vbaProject.bin
+    # binário não pode ser gerado aqui: é reaproveitado se existir ao lado
+    # do template (ver adicionar_macro.py)
+    gerar_xlsm(arquivo_xlsm.replace('.xlsm', '.xlsx'), arquivo_xlsm, vba_project,
+               data_hora=DATA_REPRODUTIVEL)
+
+    if vba_project is not None:
+        print("✅ Macro incorporada a partir do vbaProject.bin")
+        return
 
     print(f"⚠️  ATENÇÃO: O código VBA foi salvo em: {vba_file}")
     print("    Para adicionar a macro ao Excel:")
@@ -446,53 +743,189 @@ End Sub
     print("    4. Selecione o arquivo .bas")
     print("    5. Salve o arquivo como .xlsm")
 
-    # Recomprime como XLSM
-    # with zipfile.ZipFile(arquivo_xlsm, 'w', zipfile.ZIP_DEFLATED) as zipf:
-    #     for root, dirs, files in os.walk(temp_dir):
-    #         for file in files:
-    #             file_path = os.path.join(root, file)
-    #             arcname = os.path.relpath(file_path, temp_dir)
-    #             zipf.write(file_path, arcname)
+def ler_vba_project_local():
+    """vbaProject.bin ao lado do template (None se não existir)."""
+    caminho = os.path.join(PASTA_SAIDA, 'vbaProject.bin')
+    return ler_vba_project(caminho) if os.path.exists(caminho) else None
 
-    # Limpa diretório temporário
-    # shutil.rmtree(temp_dir)
 
-def main():
-    """Função principal."""
+def hash_entradas(vba_project=None):
+    """
+    Hash de tudo que define o template: mapeamento de cabeçalhos, dados de
+    exemplo, código VBA, vbaProject.bin e versão do gerador (e do openpyxl).
+    """
+    entradas = [
+        VERSAO_GERADOR,
+        openpyxl.__version__,
+        json.dumps(MAPEAMENTO_CLIENTES, ensure_ascii=False),
+        json.dumps(EXEMPLO_DADOS, ensure_ascii=False),
+        CODIGO_VBA,
+    ]
+    h = hashlib.sha256()
+    for entrada in entradas:
+        dados = entrada.encode('utf-8')
+        h.update(len(dados).to_bytes(8, 'little') + dados)
+    h.update(vba_project or b'')
+    return h.hexdigest()
+
+
+def restaurar_do_cache(pasta_cache, pasta_saida):
+    """
+    Copia os artefatos do cache para a pasta de saída, só os que mudaram.
+
+    Retorna a lista de arquivos copiados, ou None se o cache não tem todos.
+    """
+    if not all(os.path.exists(os.path.join(pasta_cache, nome)) for nome in ARTEFATOS):
+        return None
+    copiados = []
+    for nome in ARTEFATOS:
+        origem = os.path.join(pasta_cache, nome)
+        destino = os.path.join(pasta_saida, nome)
+        if not os.path.exists(destino) or not filecmp.cmp(origem, destino, shallow=False):
+            shutil.copyfile(origem, destino)
+            copiados.append(destino)
+    return copiados
+
+
+def guardar_no_cache(pasta_cache, pasta_saida):
+    """Guarda os artefatos gerados em .cache/<hash>/ (cópia atômica da pasta)."""
+    temporaria = pasta_cache + '.tmp'
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+    for nome in ARTEFATOS:
+        shutil.copyfile(os.path.join(pasta_saida, nome), os.path.join(temporaria, nome))
+    shutil.rmtree(pasta_cache, ignore_errors=True)
+    os.replace(temporaria, pasta_cache)
+
+
+def construir(args):
+    """Exporta a base (--exportar) ou gera o template, com o cache por hash. Retorna o código de saída."""
+    medicao = metricas.atuais()
+
+    if args.vendas:
+        print(f"📋 Lendo listas de: {args.vendas}")
+        inicio = time.perf_counter()
+        try:
+            with medicao.etapa('lookups'):
+                listas = ler_listas_vendas(args.vendas)
+        except (sqlite3.Error, OSError) as e:
+            print(f"❌ Erro ao ler as tabelas lkp_*: {e}")
+            return 1
+        quantidades = criar_template_vendas(listas, args.saida)
+        segundos = time.perf_counter() - inicio
+        print(f"✅ Template de vendas criado em {segundos:.2f}s")
+        for cabecalho, quantidade in quantidades.items():
+            aviso = '' if quantidade else '  ⚠️  lista vazia: coluna sem validação'
+            print(f"   - {cabecalho}: {quantidade} valor(es){aviso}")
+        print(f"📁 Arquivo: {args.saida}")
+        return 0
+
+    if args.exportar:
+        print(f"📤 Exportando base de clientes de: {args.exportar}")
+        inicio = time.perf_counter()
+        vba_project = ler_vba_project(args.vba) if args.vba else None
+        total = exportar_base_clientes(args.exportar, args.saida, vba_project)
+        segundos = time.perf_counter() - inicio
+        print(f"✅ {total} clientes exportados em {segundos:.2f}s "
+              f"({total / segundos if segundos else 0:,.0f} linhas/s)")
+        memoria = memoria_maxima_mb()
+        if memoria is not None:
+            print(f"📊 Pico de memória: {memoria:.0f} MB")
+        print(f"📁 Arquivo: {args.saida}")
+        return 0
+
+    with medicao.etapa('hash'):
+        vba_project = ler_vba_project_local()
+        digest = hash_entradas(vba_project)
+    pasta_cache = os.path.join(PASTA_CACHE, digest)
+    if not args.forcar:
+        with medicao.etapa('cache'):
+            copiados = restaurar_do_cache(pasta_cache, PASTA_SAIDA)
+        if copiados is not None:
+            print(f"♻️  Template sem alterações (hash {digest[:12]}) - reaproveitando o cache")
+            for caminho in copiados:
+                print(f"   ↺ {caminho}")
+            return 0
+
     print("🚀 Criando template Excel com macro VBA...")
 
-    # Cria o workbook
-    wb = Workbook()
+    with medicao.etapa('workbook'):
+        # Cria o workbook
+        wb = Workbook()
 
-    # Remove a planilha padrão
-    if 'Sheet' in wb.sheetnames:
-        wb.remove(wb['Sheet'])
+        # Remove a planilha padrão
+        if 'Sheet' in wb.sheetnames:
+            wb.remove(wb['Sheet'])
 
-    # Cria as abas
-    print("📖 Criando aba de instruções...")
-    criar_aba_instrucoes(wb)
+        # Cria as abas
+        print("📖 Criando aba de instruções...")
+        criar_aba_instrucoes(wb)
 
-    print("📝 Criando aba de exemplo...")
-    criar_aba_exemplo(wb)
+        print("📝 Criando aba de exemplo...")
+        criar_aba_exemplo(wb)
 
-    # Salva o arquivo
-    output_dir = os.path.dirname(os.path.abspath(__file__))
-    arquivo_xlsx = os.path.join(output_dir, 'template_importacao_clientes.xlsx')
-    arquivo_xlsm = os.path.join(output_dir, 'template_importacao_clientes.xlsm')
+    # Salva o arquivo (reprodutível: datas fixas no ZIP e nas propriedades)
+    arquivo_xlsx = os.path.join(PASTA_SAIDA, 'template_importacao_clientes.xlsx')
+    arquivo_xlsm = os.path.join(PASTA_SAIDA, 'template_importacao_clientes.xlsm')
 
     print(f"💾 Salvando arquivo em: {arquivo_xlsx}")
-    wb.save(arquivo_xlsx)
+    wb.properties.created = datetime.datetime(*DATA_REPRODUTIVEL)
+    conteudo = io.BytesIO()
+    with medicao.etapa('salvar'):
+        wb.save(conteudo)
+    with medicao.etapa('normalizar'):
+        normalizar_pacote(conteudo, arquivo_xlsx)
 
     print("🔧 Adicionando macro VBA...")
-    adicionar_macro_vba(arquivo_xlsm)
+    with medicao.etapa('xlsm'):
+        adicionar_macro_vba(arquivo_xlsm, vba_project)
 
-    # Copia o XLSX como XLSM (temporariamente, até adicionarmos o VBA corretamente)
-    shutil.copy2(arquivo_xlsx, arquivo_xlsm)
+    with medicao.etapa('cache'):
+        guardar_no_cache(pasta_cache, PASTA_SAIDA)
+    print(f"🗃️  Cache: {pasta_cache}")
 
     print(f"\n✅ Template criado com sucesso!")
     print(f"📁 Arquivo XLSX: {arquivo_xlsx}")
     print(f"📁 Arquivo XLSM (para adicionar macro): {arquivo_xlsm}")
     print(f"\n⚠️  PRÓXIMO PASSO: Adicione a macro ao arquivo XLSM usando o arquivo .bas gerado")
+    return 0
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Cria o template Excel de importação de clientes.')
+    parser.add_argument('--exportar', metavar='ORIGEM',
+                        help='Gera o template preenchido com a base de clientes '
+                             '(.txt da macro ou banco SQLite com tab_cliente)')
+    parser.add_argument('--vendas', metavar='BANCO',
+                        help='Gera o template de importação de vendas com listas suspensas de '
+                             'Representante, Produto, Família e Cidade vindas das tabelas '
+                             'lkp_representantes, lkp_produtos e lkp_localidades do banco SQLite/libSQL')
+    parser.add_argument('-o', '--saida',
+                        help='Arquivo gerado com --exportar (.xlsx ou .xlsm, padrão: '
+                             'template_clientes_preenchido.xlsx) ou --vendas (.xlsx, padrão: '
+                             'template_importacao_vendas.xlsx)')
+    parser.add_argument('--vba', help='vbaProject.bin (ou .xlsm com a macro) para a saída .xlsm')
+    parser.add_argument('--forcar', action='store_true',
+                        help='Regera o template mesmo se o cache já tiver o mesmo hash')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+    if args.vendas and args.exportar:
+        parser.error('--vendas e --exportar não podem ser usados juntos')
+    if args.vendas:
+        args.saida = args.saida or 'template_importacao_vendas.xlsx'
+        if not args.saida.lower().endswith('.xlsx'):
+            parser.error('o template de vendas é gerado como .xlsx')
+        if not os.path.isfile(args.vendas):
+            parser.error(f'banco não encontrado: {args.vendas}')
+    else:
+        args.saida = args.saida or 'template_clientes_preenchido.xlsx'
+    metricas.iniciar(args)
+    try:
+        return construir(args)
+    finally:
+        metricas.finalizar(args)
+
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Exportação incremental (delta) de clientes por hash de conteúdo.
+
+Toda semana só algumas centenas dos ~100 mil clientes mudam, mas o arquivo
+completo de tab_cliente é reenviado. Aqui o conversor guarda em disco um
+índice compacto `cliente → hash da linha` da execução anterior e, a cada nova
+execução, grava apenas os clientes novos ou alterados — no mesmo layout do
+.txt da macro, então o importador web consome o delta sem mudanças — e uma
+lista separada com os clientes que sumiram da planilha.
+
+Um cliente repetido na planilha vale pela última ocorrência, como na
+importação completa: as repetições são resolvidas antes da comparação com o
+índice, com a ordenação externa (ordenacao_externa.py), então o delta sai em
+ordem de cliente.
+
+Formato do índice: cabeçalho MAGICO + registros
+[tamanho do código (2 bytes)][código UTF-8][hash blake2b de 8 bytes].
+
+Uso:
+    python3 converter_clientes.py clientes.xlsx --indice clientes.idx
+    python3 delta_clientes.py clientes.xlsx clientes.idx
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import time
+
+from converter_clientes import (LEITORES, ErroConversao, celula_vazia,
+                                escrever_linhas_txt, formatar_linha, ler_clientes,
+                                nome_arquivo_saida, valor_para_texto)
+from leitor_xlsx import ErroLeituraXlsx, ler_linhas_xml
+from mapeamentos import COLUNAS_CLIENTES, MAPEAMENTO_CLIENTES
+import metricas
+from ordenacao_externa import MEMORIA_MB, ordenar, primeiro_campo
+
+MAGICO = b'GCDELTA1'
+TAMANHO_HASH = 8
+_TAMANHO = struct.Struct('<H')
+
+
+def hash_linha(linha):
+    """Hash de 8 bytes da linha formatada (exatamente o que vai para o .txt)."""
+    return hashlib.blake2b(linha.encode('utf-8'), digest_size=TAMANHO_HASH).digest()
+
+
+def carregar_indice(caminho):
+    """Lê o índice da execução anterior: {cliente: hash}. Sem arquivo, índice vazio."""
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, 'rb') as f:
+        dados = f.read()
+    if not dados.startswith(MAGICO):
+        raise ErroConversao(f"Índice inválido: {caminho}")
+
+    indice = {}
+    posicao = len(MAGICO)
+    fim = len(dados)
+    while posicao < fim:
+        (tamanho,) = _TAMANHO.unpack_from(dados, posicao)
+        posicao += _TAMANHO.size
+        cliente = dados[posicao:posicao + tamanho].decode('utf-8')
+        posicao += tamanho
+        indice[cliente] = dados[posicao:posicao + TAMANHO_HASH]
+        posicao += TAMANHO_HASH
+    return indice
+
+
+def salvar_indice(caminho, indice):
+    """Grava o índice de forma atômica (arquivo temporário + rename)."""
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(MAGICO)
+        for cliente, digest in indice.items():
+            codigo = cliente.encode('utf-8')
+            f.write(_TAMANHO.pack(len(codigo)))
+            f.write(codigo)
+            f.write(digest)
+    os.replace(temporario, caminho)
+
+
+def filtrar_alterados(linhas, anterior, atual, contagem, memoria_mb=MEMORIA_MB, estatisticas=None):
+    """
+    Gera só as linhas formatadas de clientes novos ou alterados, em ordem de cliente.
+
+    Clientes repetidos ficam só com a última ocorrência antes de comparar com
+    `anterior` (ordenação com até `memoria_mb`; o resumo vai para
+    `estatisticas`). Preenche `atual` com os hashes desta execução e
+    `contagem` com novos, alterados e inalterados. Linhas sem código de
+    cliente são ignoradas.
+    """
+    def com_cliente():
+        for _, valores in linhas:
+            if not celula_vazia(valores[0]):
+                yield valor_para_texto(valores[0]), formatar_linha(valores)
+
+    for cliente, linha in ordenar(com_cliente(), primeiro_campo, memoria_mb, 'ultimo',
+                                  estatisticas=estatisticas):
+        digest = hash_linha(linha)
+        atual[cliente] = digest
+
+        antigo = anterior.get(cliente)
+        if antigo == digest:
+            contagem['inalterados'] += 1
+            continue
+        contagem['novos' if antigo is None else 'alterados'] += 1
+        yield linha
+
+
+def caminho_removidos(destino):
+    """Clientes_<timestamp>.txt → Clientes_<timestamp>_removidos.txt."""
+    base, extensao = os.path.splitext(destino)
+    return f"{base}_removidos{extensao or '.txt'}"
+
+
+def converter_delta(origem, destino, caminho_indice, leitor=ler_linhas_xml,
+                    linha_inicial=None, salvar=True, memoria_mb=MEMORIA_MB):
+    """
+    Converte `origem` gravando em `destino` só os clientes novos/alterados.
+
+    Os removidos vão para <destino>_removidos.txt (coluna única `cliente`).
+    Com `salvar`, o índice é atualizado para a próxima execução. Clientes
+    repetidos na origem contam uma vez (vence a última ocorrência) e o
+    número de linhas descartadas vem em `repetidos`.
+    """
+    if not os.path.exists(origem):
+        raise ErroConversao(f"Arquivo não encontrado: {origem}")
+
+    inicio = time.perf_counter()
+    anterior = carregar_indice(caminho_indice)
+    atual = {}
+    contagem = {'novos': 0, 'alterados': 0, 'inalterados': 0}
+    ordenacao = {}
+    ausentes = []
+
+    medicao = metricas.atuais()
+    linhas = medicao.medir_iterador(
+        'leitura', ler_clientes(origem, leitor, MAPEAMENTO_CLIENTES, linha_inicial, ausentes)
+    )
+    try:
+        total = escrever_linhas_txt(
+            destino, COLUNAS_CLIENTES,
+            medicao.medir_iterador('conversao', filtrar_alterados(linhas, anterior, atual, contagem,
+                                                                  memoria_mb, ordenacao)),
+        )
+    except ErroLeituraXlsx as e:
+        os.remove(destino)
+        raise ErroConversao(str(e))
+
+    if not atual:
+        os.remove(destino)
+        raise ErroConversao("Arquivo sem dados!")
+
+    removidos = [cliente for cliente in anterior if cliente not in atual]
+    destino_removidos = caminho_removidos(destino)
+    escrever_linhas_txt(destino_removidos, ['cliente'], (formatar_linha([c]) for c in removidos))
+
+    if salvar:
+        salvar_indice(caminho_indice, atual)
+
+    return {
+        'origem': origem,
+        'destino': destino,
+        'destino_removidos': destino_removidos,
+        'linhas': total,
+        'removidos': len(removidos),
+        'repetidos': ordenacao.get('duplicados', 0),
+        'colunas_ausentes': ausentes,
+        'segundos': time.perf_counter() - inicio,
+        **contagem,
+    }
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description='Gera o .txt de clientes apenas com os registros novos/alterados desde a última execução.'
+    )
+    parser.add_argument('origem', help='Planilha de origem (.xlsx/.xlsm/.xls) ou exportação .csv do ERP')
+    parser.add_argument('indice', help='Arquivo de índice (criado na primeira execução)')
+    parser.add_argument('-o', '--saida', help='Arquivo .txt de saída (padrão: Clientes_<timestamp>.txt)')
+    parser.add_argument('--leitor', choices=sorted(LEITORES), default='xml')
+    parser.add_argument('--simular', action='store_true',
+                        help='Não atualiza o índice (útil para conferir o delta antes de importar)')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    destino = args.saida or nome_arquivo_saida()
+    metricas.iniciar(args)
+    print(f"📖 Lendo arquivo: {args.origem}")
+    try:
+        resultado = converter_delta(args.origem, destino, args.indice,
+                                    leitor=LEITORES[args.leitor], salvar=not args.simular)
+    except ErroConversao as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    print(f"✅ Delta gerado em {resultado['segundos']:.2f}s")
+    print(f"   Novos: {resultado['novos']}  Alterados: {resultado['alterados']}  "
+          f"Sem alteração: {resultado['inalterados']}  Removidos: {resultado['removidos']}")
+    if resultado['repetidos']:
+        print(f"   ⚠️  Clientes repetidos na origem (vale a última linha): {resultado['repetidos']}")
+    print(f"📁 Novos/alterados: {resultado['destino']}")
+    print(f"📁 Removidos: {resultado['destino_removidos']}")
+    if args.simular:
+        print("⚠️  Simulação: índice não foi atualizado")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Detecção de clientes duplicados e quase duplicados em tab_cliente.
+
+A mesma loja aparece com códigos de `cliente` diferentes: mesmo CNPJ, ou
+`nome`/`fantasia` que só mudam em acentos e pontuação. Comparar todos os pares
+de ~100 mil clientes é quadrático; aqui são duas passadas quase lineares:
+
+1. índice exato (dicionário) pelo CNPJ/CPF normalizado (só letras e dígitos,
+   zeros à esquerda recolocados);
+2. MinHash sobre os trigramas do nome normalizado (sem acentos, pontuação e
+   sufixos como LTDA/ME/EPP) com LSH em bandas: cada banda da assinatura,
+   junto com a cidade (ou o prefixo do CEP), vira a chave de um bloco, e só
+   os clientes que caem no mesmo bloco são comparados. O par é confirmado se
+   a similaridade de Jaccard dos trigramas passa do limiar.
+
+Os pares confirmados nas duas passadas são unidos (union-find) em grupos de
+suspeitos de duplicidade, gravados em TSV: grupo, motivo, cliente, nome,
+fantasia, cnpj_cpf, cidade, cep.
+
+Uso:
+    python3 duplicados_clientes.py banco_local.db
+    python3 duplicados_clientes.py Clientes_20250101_120000.txt -o duplicados.tsv
+    python3 duplicados_clientes.py clientes.xlsx --limiar 0.7
+"""
+
+import argparse
+import functools
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+
+import numpy as np
+
+from carregar_sqlite import TABELA, ler_origem
+from converter_clientes import LEITORES, ErroConversao
+from leitor_xlsx import ler_linhas_xml
+from mapeamentos import COLUNAS_CLIENTES
+import metricas
+
+PERMUTACOES = 64
+LINHAS_POR_BANDA = 4
+LIMIAR_JACCARD = 0.8
+# Blocos maiores que isso são nomes genéricos ("MERCEARIA") e são ignorados
+TAMANHO_MAXIMO_BLOCO = 200
+CLIENTES_POR_LOTE = 4096
+
+SUFIXOS_SOCIETARIOS = {'LTDA', 'ME', 'EPP', 'EIRELI', 'SA', 'S A', 'CIA', 'MEI', 'SS', 'LIMITADA'}
+_RE_NAO_ALFANUMERICO = re.compile(r'[^0-9A-Z]+')
+_RE_DOCUMENTO = re.compile(r'[^0-9A-Z]')
+
+COLUNAS_SAIDA = ('grupo', 'motivo', 'cliente', 'nome', 'fantasia', 'cnpj_cpf', 'cidade', 'cep')
+
+
+# ---------------------------------------------------------------------------
+# Normalização
+# ---------------------------------------------------------------------------
+
+def sem_acentos(texto):
+    """'São João' → 'Sao Joao' (outros caracteres fora do ASCII são descartados)."""
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+def normalizar_nome(texto):
+    """Maiúsculas sem acentos e pontuação, sem sufixos societários no final."""
+    palavras = _RE_NAO_ALFANUMERICO.sub(' ', sem_acentos(texto or '').upper()).split()
+    while palavras and palavras[-1] in SUFIXOS_SOCIETARIOS:
+        palavras.pop()
+    return ' '.join(palavras)
+
+
+def normalizar_documento(texto):
+    """CNPJ/CPF só com letras e dígitos; zeros à esquerda perdidos no Excel recolocados."""
+    documento = _RE_DOCUMENTO.sub('', (texto or '').upper())
+    if documento.isdigit():
+        if 9 <= len(documento) <= 10:
+            documento = documento.zfill(11)
+        elif 12 <= len(documento) <= 13:
+            documento = documento.zfill(14)
+        if len(set(documento)) == 1:
+            return ''  # 000.000.000-00 e afins não identificam ninguém
+    return documento if len(documento) in (11, 14) else ''
+
+
+@functools.lru_cache(maxsize=65536)
+def chave_local(cidade, cep):
+    """Cidade normalizada; sem cidade, o prefixo de 5 dígitos do CEP."""
+    cidade = normalizar_nome(cidade)
+    if cidade:
+        return cidade
+    digitos = re.sub(r'\D', '', cep or '')
+    return f'CEP{digitos[:5]}' if len(digitos) >= 5 else ''
+
+
+def trigramas(nomes):
+    """
+    Trigramas de caracteres de todos os nomes normalizados (ASCII, com espaços
+    nas pontas) como inteiros de 24 bits, em um único vetor.
+
+    Os nomes são concatenados com um separador NUL; os trigramas que cruzam o
+    separador são descartados. Retorna (códigos, quantidade por nome); nomes
+    vazios não têm trigramas. Códigos repetidos em um nome não são removidos
+    (não alteram o MinHash).
+    """
+    texto = ''.join(f' {nome} \0' if nome else '\0' for nome in nomes).encode('ascii')
+    b = np.frombuffer(texto, dtype=np.uint8).astype(np.uint32)
+    codigos = (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+    validos = (b[:-2] != 0) & (b[1:-1] != 0) & (b[2:] != 0)
+    quantidades = np.fromiter((len(nome) if nome else 0 for nome in nomes), dtype=np.int64,
+                              count=len(nomes))
+    return codigos[validos], quantidades
+
+
+# ---------------------------------------------------------------------------
+# MinHash / LSH
+# ---------------------------------------------------------------------------
+
+def coeficientes_minhash(permutacoes=PERMUTACOES, semente=1):
+    """
+    Coeficientes (a, b) das funções multiply-shift h(x) = (a·x + b) mod 2⁶⁴ ≫ 32
+    (a ímpar), mais baratas que o módulo por um primo.
+    """
+    aleatorio = np.random.default_rng(semente)
+    a = aleatorio.integers(0, 2 ** 64, size=permutacoes, dtype=np.uint64) | np.uint64(1)
+    b = aleatorio.integers(0, 2 ** 64, size=permutacoes, dtype=np.uint64)
+    return a, b
+
+
+def assinaturas_minhash(codigos, quantidades, coeficientes, lote=CLIENTES_POR_LOTE):
+    """
+    Assinaturas MinHash (n × permutações) a partir da saída de `trigramas`.
+
+    Para cada lote de nomes, as permutações são aplicadas de uma vez a todos
+    os trigramas do lote e o mínimo por nome sai de `np.minimum.reduceat`.
+    Nomes sem trigramas ficam com a assinatura máxima.
+    """
+    a, b = coeficientes
+    assinaturas = np.full((len(quantidades), len(a)), 2 ** 32 - 1, dtype=np.int64)
+    fins = np.cumsum(quantidades)
+    inicios = fins - quantidades
+    for inicio in range(0, len(quantidades), lote):
+        fim = min(inicio + lote, len(quantidades))
+        preenchidos = np.flatnonzero(quantidades[inicio:fim])
+        if not len(preenchidos):
+            continue
+        base = inicios[inicio]
+        valores = codigos[base:fins[fim - 1]].astype(np.uint64)
+        permutados = ((a[:, None] * valores[None, :] + b[:, None]) >> np.uint64(32)).astype(np.int64)
+        posicoes = inicios[inicio:fim][preenchidos] - base
+        assinaturas[inicio + preenchidos] = np.minimum.reduceat(permutados, posicoes, axis=1).T
+    return assinaturas
+
+
+def pares_candidatos(assinaturas, locais, linhas_por_banda=LINHAS_POR_BANDA,
+                     tamanho_maximo=TAMANHO_MAXIMO_BLOCO):
+    """
+    Pares (i, j) que compartilham alguma banda da assinatura no mesmo local.
+
+    `locais` são códigos inteiros do local (-1 = sem nome/local, fica de
+    fora). Cada banda vira uma chave de 64 bits (produto com multiplicadores
+    fixos, com estouro), os clientes são ordenados pela chave e os blocos são
+    as sequências de chaves iguais — sem dicionário por cliente.
+    Retorna (pares, blocos ignorados por excesso de tamanho).
+    """
+    pares = set()
+    ignorados = 0
+    validos = np.flatnonzero(locais >= 0)
+    multiplicadores = np.random.default_rng(7).integers(
+        1, np.iinfo(np.int64).max, size=linhas_por_banda + 1, dtype=np.int64) | 1
+    bandas = assinaturas.shape[1] // linhas_por_banda
+    with np.errstate(over='ignore'):
+        for banda in range(bandas):
+            trecho = assinaturas[validos, banda * linhas_por_banda:(banda + 1) * linhas_por_banda]
+            chaves = trecho @ multiplicadores[:-1] + locais[validos] * multiplicadores[-1]
+            ordem = np.argsort(chaves, kind='stable')
+            ordenadas = chaves[ordem]
+            inicios = np.flatnonzero(np.concatenate(([True], ordenadas[1:] != ordenadas[:-1])))
+            tamanhos = np.diff(np.append(inicios, len(ordenadas)))
+            for inicio, tamanho in zip(inicios[tamanhos > 1], tamanhos[tamanhos > 1]):
+                if tamanho > tamanho_maximo:
+                    ignorados += 1
+                    continue
+                membros = validos[ordem[inicio:inicio + tamanho]].tolist()
+                for posicao, i in enumerate(membros):
+                    for j in membros[posicao + 1:]:
+                        pares.add((i, j))
+    return pares, ignorados
+
+
+# ---------------------------------------------------------------------------
+# Agrupamento
+# ---------------------------------------------------------------------------
+
+def _raiz(pais, i):
+    while pais[i] != i:
+        pais[i] = pais[pais[i]]
+        i = pais[i]
+    return i
+
+
+def _unir(pais, i, j):
+    i, j = _raiz(pais, i), _raiz(pais, j)
+    if i != j:
+        pais[max(i, j)] = min(i, j)
+
+
+def ler_clientes_origem(caminho, leitor=ler_linhas_xml):
+    """Linhas (tuplas na ordem de COLUNAS_CLIENTES) de um banco, .txt ou planilha."""
+    if caminho.lower().endswith(('.db', '.sqlite', '.sqlite3')):
+        conn = sqlite3.connect(caminho)
+        try:
+            yield from conn.execute(f"SELECT {', '.join(COLUNAS_CLIENTES)} FROM {TABELA}")
+        finally:
+            conn.close()
+    else:
+        yield from ler_origem(caminho, leitor)
+
+
+def detectar_duplicados(clientes, limiar=LIMIAR_JACCARD, permutacoes=PERMUTACOES,
+                        linhas_por_banda=LINHAS_POR_BANDA):
+    """
+    Agrupa suspeitos de duplicidade em `clientes` (tuplas em COLUNAS_CLIENTES).
+
+    Retorna (grupos, estatísticas); cada grupo é uma lista de
+    (índice do cliente, motivo), com motivo 'cnpj', 'nome' ou 'cnpj+nome'.
+    """
+    medicao = metricas.atuais()
+    i_doc = COLUNAS_CLIENTES.index('cnpj_cpf')
+    i_nome = COLUNAS_CLIENTES.index('nome')
+    i_fantasia = COLUNAS_CLIENTES.index('fantasia')
+    i_cidade = COLUNAS_CLIENTES.index('cidade')
+    i_cep = COLUNAS_CLIENTES.index('cep')
+    pais = list(range(len(clientes)))
+    motivos = [set() for _ in clientes]
+
+    # 1ª passada: índice exato pelo documento
+    with medicao.etapa('indice_cnpj'):
+        por_documento = {}
+        repetidos = 0
+        for indice, linha in enumerate(clientes):
+            documento = normalizar_documento(linha[i_doc])
+            if documento:
+                primeiro = por_documento.setdefault(documento, indice)
+                if primeiro != indice:
+                    repetidos += 1
+                    _unir(pais, primeiro, indice)
+                    motivos[primeiro].add('cnpj')
+                    motivos[indice].add('cnpj')
+
+    # 2ª passada: MinHash/LSH no nome, bloqueado por cidade/CEP
+    with medicao.etapa('minhash'):
+        nomes = []
+        locais = np.full(len(clientes), -1, dtype=np.int64)
+        codigos_locais = {}
+        for indice, linha in enumerate(clientes):
+            nome = normalizar_nome(linha[i_nome]) or normalizar_nome(linha[i_fantasia])
+            local = chave_local(linha[i_cidade], linha[i_cep])
+            nomes.append(nome)
+            if nome and local:
+                locais[indice] = codigos_locais.setdefault(local, len(codigos_locais))
+        codigos, quantidades = trigramas(nomes)
+        assinaturas = assinaturas_minhash(codigos, quantidades, coeficientes_minhash(permutacoes))
+
+    with medicao.etapa('lsh'):
+        candidatos, ignorados = pares_candidatos(assinaturas, locais, linhas_por_banda)
+
+    with medicao.etapa('comparacao'):
+        lista_codigos = codigos.tolist()
+        fins = np.cumsum(quantidades).tolist()
+        tamanhos = quantidades.tolist()
+        conjuntos = {}
+
+        def conjunto(indice):
+            if indice not in conjuntos:
+                conjuntos[indice] = set(lista_codigos[fins[indice] - tamanhos[indice]:fins[indice]])
+            return conjuntos[indice]
+
+        confirmados = 0
+        for i, j in candidatos:
+            a, b = conjunto(i), conjunto(j)
+            if len(a & b) >= limiar * len(a | b):
+                confirmados += 1
+                _unir(pais, i, j)
+                motivos[i].add('nome')
+                motivos[j].add('nome')
+
+    grupos = {}
+    for indice in range(len(clientes)):
+        if motivos[indice]:
+            grupos.setdefault(_raiz(pais, indice), []).append(
+                (indice, '+'.join(sorted(motivos[indice], key=['cnpj', 'nome'].index)))
+            )
+    grupos = [membros for membros in grupos.values() if len(membros) > 1]
+    estatisticas = {
+        'clientes': len(clientes),
+        'duplicados_cnpj': repetidos,
+        'pares_candidatos': len(candidatos),
+        'pares_confirmados': confirmados,
+        'blocos_ignorados': ignorados,
+        'grupos': len(grupos),
+        'clientes_em_grupos': sum(len(membros) for membros in grupos),
+    }
+    return grupos, estatisticas
+
+
+def gravar_grupos(destino, clientes, grupos):
+    """TSV com um cliente por linha, numerado por grupo."""
+    indices = [COLUNAS_CLIENTES.index(coluna) for coluna in COLUNAS_SAIDA[2:]]
+    with open(destino, 'w', encoding='utf-8', newline='') as f:
+        f.write('\t'.join(COLUNAS_SAIDA) + '\r\n')
+        for numero, membros in enumerate(sorted(grupos, key=min), 1):
+            for indice, motivo in sorted(membros):
+                campos = (str(clientes[indice][i] or '').replace('\t', ' ') for i in indices)
+                f.write(f"{numero}\t{motivo}\t" + '\t'.join(campos) + '\r\n')
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Agrupa clientes duplicados (mesmo CNPJ ou nome parecido).')
+    parser.add_argument('origem', help='Banco com tab_cliente, .txt convertido ou planilha de clientes')
+    parser.add_argument('-o', '--saida', default='clientes_duplicados.tsv',
+                        help='TSV com os grupos (padrão: clientes_duplicados.tsv)')
+    parser.add_argument('--limiar', type=float, default=LIMIAR_JACCARD,
+                        help=f'Similaridade de Jaccard mínima dos trigramas do nome (padrão: {LIMIAR_JACCARD})')
+    parser.add_argument('--permutacoes', type=int, default=PERMUTACOES,
+                        help=f'Tamanho da assinatura MinHash (padrão: {PERMUTACOES})')
+    parser.add_argument('--linhas-banda', type=int, default=LINHAS_POR_BANDA,
+                        help=f'Linhas por banda do LSH; menos linhas = mais candidatos (padrão: {LINHAS_POR_BANDA})')
+    parser.add_argument('--leitor', choices=sorted(LEITORES), default='xml',
+                        help='Leitor da planilha (cache = cache colunar por hash, veja cache_planilhas.py)')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    print(f"📖 Lendo clientes: {args.origem}")
+    metricas.iniciar(args)
+    inicio = time.perf_counter()
+    try:
+        with metricas.atuais().etapa('leitura'):
+            clientes = list(ler_clientes_origem(args.origem, LEITORES[args.leitor]))
+        grupos, estatisticas = detectar_duplicados(clientes, args.limiar, args.permutacoes, args.linhas_banda)
+        gravar_grupos(args.saida, clientes, grupos)
+    except (ErroConversao, sqlite3.Error) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    print(f"✅ {estatisticas['clientes']} clientes analisados em {time.perf_counter() - inicio:.2f}s")
+    print(f"   - Mesmo CNPJ/CPF: {estatisticas['duplicados_cnpj']} cliente(s) repetido(s)")
+    print(f"   - Nomes parecidos: {estatisticas['pares_confirmados']} de "
+          f"{estatisticas['pares_candidatos']} pares candidatos")
+    if estatisticas['blocos_ignorados']:
+        print(f"   ⚠️  {estatisticas['blocos_ignorados']} bloco(s) com mais de {TAMANHO_MAXIMO_BLOCO} "
+              f"nomes iguais ignorados na comparação por nome")
+    print(f"📊 {estatisticas['grupos']} grupo(s), {estatisticas['clientes_em_grupos']} clientes")
+    print(f"📁 Grupos: {args.saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Envio de vendas ao Turso com leitura e upload sobrepostos (asyncio).
+
+O `VendasImporter` (scripts/importar-vendas-excel.js) lê a planilha inteira
+para a memória e só depois envia os lotes de 500, um de cada vez: a rede fica
+parada durante a leitura e a CPU fica parada durante o envio. Aqui as duas
+coisas andam juntas, como produtor/consumidor:
+
+- o produtor (uma thread) lê a planilha em blocos, aplica as regras do
+  importador (transformar_vendas.py) e coloca lotes prontos em uma fila
+  limitada. Com a fila cheia ele espera (contrapressão), então a memória não
+  cresce com o tamanho da planilha;
+- N tarefas de envio tiram lotes da fila e fazem POST no endpoint
+  `/v2/pipeline` do libSQL, reaproveitando conexões HTTP/1.1 keep-alive de um
+  pool.
+
+Cada lote vai como um `batch` Hrana em transação (BEGIN IMMEDIATE, um INSERT
+OR IGNORE por venda, COMMIT; ROLLBACK se algo falhar), o mesmo que o
+`client.batch(statements, 'write')` do importador JS. Falhas de rede, HTTP
+429 e 5xx são repetidas com espera exponencial. A repetição é segura porque o
+INSERT OR IGNORE é idempotente. Erros de SQL não são repetidos: o lote conta
+como erro, como no JS.
+
+Para testar sem o banco de produção, `--servidor-local` sobe no mesmo
+processo o servidor de servidor_pipeline_local.py sobre um SQLite.
+
+Uso:
+    TURSO_DATABASE_URL=libsql://... TURSO_AUTH_TOKEN=... python3 enviar_vendas.py vendas.xlsx
+    python3 enviar_vendas.py vendas.xlsx --servidor-local /tmp/vendas.db --latencia 0.05 --conexoes 8
+"""
+
+import argparse
+import asyncio
+import bisect
+import concurrent.futures
+import json
+import os
+import random
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+
+from leitor_xlsx import ErroLeituraXlsx
+from transformar_vendas import COLUNAS_INSERT, SERIE_FILTRO, ler_lotes_vendas, registros, transformar_lote
+
+ROTA_PIPELINE = '/v2/pipeline'
+TAMANHO_LOTE = 500           # CONFIG.BATCH_SIZE do importador JS
+TAMANHO_LEITURA = 5000       # linhas lidas/transformadas por vez pelo produtor
+CONEXOES = 4
+LOTES_NA_FILA = 16
+TENTATIVAS = 5
+ESPERA_INICIAL = 0.5
+TEMPO_LIMITE = 30.0
+# Intervalo em que o produtor, com a fila cheia, confere se ainda há quem envie
+ESPERA_FILA = 0.5
+
+SQL_INSERT = (f"INSERT OR IGNORE INTO vendas ({', '.join(COLUNAS_INSERT)}) "
+              f"VALUES ({', '.join('?' * len(COLUNAS_INSERT))})")
+
+
+class ErroEnvio(Exception):
+    """Falha ao enviar um lote (reportada ao usuário)."""
+
+
+class ErroTransitorio(ErroEnvio):
+    """Falha de rede ou HTTP 429/5xx: o lote pode ser reenviado."""
+
+
+def url_http(url):
+    """libsql://host → https://host (o endpoint HTTP do mesmo banco)."""
+    partes = urllib.parse.urlsplit(url)
+    esquema = {'libsql': 'https', 'wss': 'https', 'ws': 'http'}.get(partes.scheme, partes.scheme)
+    return urllib.parse.urlunsplit((esquema, partes.netloc, partes.path.rstrip('/'), '', ''))
+
+
+def valor_hrana(valor):
+    if valor is None:
+        return {'type': 'null'}
+    if isinstance(valor, float):
+        return {'type': 'float', 'value': valor}
+    return {'type': 'text', 'value': valor}
+
+
+def corpo_lote(linhas):
+    """Corpo do POST: um batch Hrana em transação com um INSERT OR IGNORE por venda."""
+    passos = [{'stmt': {'sql': 'BEGIN IMMEDIATE'}}]
+    for linha in linhas:
+        passos.append({
+            'stmt': {'sql': SQL_INSERT, 'args': [valor_hrana(v) for v in linha], 'want_rows': False},
+            'condition': {'type': 'ok', 'step': len(passos) - 1},
+        })
+    commit = len(passos)
+    passos.append({'stmt': {'sql': 'COMMIT'}, 'condition': {'type': 'ok', 'step': commit - 1}})
+    passos.append({'stmt': {'sql': 'ROLLBACK'},
+                   'condition': {'type': 'not', 'cond': {'type': 'ok', 'step': commit}}})
+    corpo = {'requests': [{'type': 'batch', 'batch': {'steps': passos}}, {'type': 'close'}]}
+    return json.dumps(corpo, separators=(',', ':')).encode('utf-8')
+
+
+def inseridos_na_resposta(resposta, quantidade):
+    """
+    Vendas inseridas pelo batch (rowsAffected > 0). ErroEnvio se o batch
+    falhou ou se a resposta não tem o formato do /v2/pipeline.
+    """
+    try:
+        resultado = resposta['results'][0]
+        if resultado['type'] != 'ok':
+            raise ErroEnvio(resultado['error']['message'])
+        passos = resultado['response']['result']
+        commit = quantidade + 1
+        if passos['step_results'][commit] is None:
+            mensagens = [e['message'] for e in passos['step_errors'] if e]
+            raise ErroEnvio(mensagens[0] if mensagens else 'transação não confirmada')
+        return sum(1 for r in passos['step_results'][1:commit] if r and r['affected_row_count'] > 0)
+    except (KeyError, IndexError, TypeError) as e:
+        raise ErroEnvio(f"resposta do /v2/pipeline em formato inesperado ({type(e).__name__}: {e})")
+
+
+# ---------------------------------------------------------------------------
+# HTTP/1.1 com keep-alive
+# ---------------------------------------------------------------------------
+
+class ConexaoHttp:
+    """Uma conexão HTTP/1.1 persistente (asyncio streams)."""
+
+    def __init__(self, host, porta, tls):
+        self.host = host
+        self.porta = porta
+        self.tls = tls
+        self.reader = self.writer = None
+
+    async def abrir(self):
+        contexto = ssl.create_default_context() if self.tls else None
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.porta, ssl=contexto)
+
+    @property
+    def aberta(self):
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def _ler_corpo(self, cabecalhos):
+        if cabecalhos.get('transfer-encoding', '').lower() == 'chunked':
+            partes = []
+            while True:
+                tamanho = int((await self.reader.readline()).split(b';')[0], 16)
+                if tamanho == 0:
+                    await self.reader.readline()
+                    return b''.join(partes)
+                partes.append(await self.reader.readexactly(tamanho))
+                await self.reader.readline()
+        if 'content-length' in cabecalhos:
+            return await self.reader.readexactly(int(cabecalhos['content-length']))
+        # Sem tamanho nem chunked: o corpo vai até o servidor fechar a conexão
+        corpo = await self.reader.read()
+        self.fechar()
+        return corpo
+
+    async def post(self, caminho, corpo, cabecalhos_extras):
+        """POST `corpo` (bytes). Retorna (status, corpo da resposta)."""
+        if not self.aberta:
+            await self.abrir()
+        cabecalho = (f"POST {caminho} HTTP/1.1\r\nHost: {self.host}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(corpo)}\r\n"
+                     f"Connection: keep-alive\r\n{cabecalhos_extras}\r\n")
+        self.writer.write(cabecalho.encode('latin-1') + corpo)
+        await self.writer.drain()
+
+        linha = await self.reader.readline()
+        if not linha:
+            raise ConnectionResetError('conexão fechada pelo servidor')
+        status = int(linha.split(b' ', 2)[1])
+        cabecalhos = {}
+        while True:
+            linha = await self.reader.readline()
+            if linha in (b'\r\n', b'\n', b''):
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+        resposta = await self._ler_corpo(cabecalhos)
+        if cabecalhos.get('connection', '').lower() == 'close':
+            self.fechar()
+        return status, resposta
+
+    def fechar(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class PoolConexoes:
+    """Até `tamanho` conexões keep-alive, emprestadas a cada POST."""
+
+    def __init__(self, url, token=None, tamanho=CONEXOES, tempo_limite=TEMPO_LIMITE):
+        partes = urllib.parse.urlsplit(url_http(url))
+        tls = partes.scheme == 'https'
+        self.caminho = (partes.path or '') + ROTA_PIPELINE
+        self.cabecalhos = f"Authorization: Bearer {token}\r\n" if token else ''
+        self.tempo_limite = tempo_limite
+        self.livres = asyncio.Queue()
+        for _ in range(tamanho):
+            self.livres.put_nowait(ConexaoHttp(partes.hostname, partes.port or (443 if tls else 80), tls))
+
+    async def pipeline(self, corpo):
+        """POST no /v2/pipeline. Retorna o JSON da resposta; ErroTransitorio se vale repetir."""
+        conexao = await self.livres.get()
+        try:
+            status, resposta = await asyncio.wait_for(
+                conexao.post(self.caminho, corpo, self.cabecalhos), self.tempo_limite)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            # Estado da conexão desconhecido: descarta e reabre no próximo uso
+            conexao.fechar()
+            raise ErroTransitorio(f"{type(e).__name__}: {e}")
+        finally:
+            self.livres.put_nowait(conexao)
+        if status == 429 or status >= 500:
+            raise ErroTransitorio(f"HTTP {status}")
+        if status != 200:
+            raise ErroEnvio(f"HTTP {status}: {resposta[:200].decode('utf-8', 'replace')}")
+        try:
+            return json.loads(resposta)
+        except ValueError:
+            trecho = resposta[:200].decode('utf-8', 'replace') or '(vazia)'
+            raise ErroEnvio(f"resposta do servidor não é JSON: {trecho}")
+
+    def fechar(self):
+        while not self.livres.empty():
+            self.livres.get_nowait().fechar()
+
+
+# ---------------------------------------------------------------------------
+# Produtor e consumidores
+# ---------------------------------------------------------------------------
+
+def _enfileirar(fila, item, loop, encerrados):
+    """Põe `item` na fila (esperando com ela cheia). False se não há mais tarefas de envio."""
+    futuro = asyncio.run_coroutine_threadsafe(fila.put(item), loop)
+    while True:
+        try:
+            futuro.result(ESPERA_FILA)
+            return True
+        except concurrent.futures.TimeoutError:
+            if encerrados.is_set():
+                futuro.cancel()
+                return False
+
+
+def _produzir(origem, fila, loop, estatisticas, tamanho_lote, linha_inicial=2, encerrados=None):
+    """
+    Thread produtora: lê, transforma e enfileira (bloqueia com a fila cheia).
+
+    Cada item é (número do lote, vendas, corpo do POST, primeira linha depois
+    do lote, linhas lidas); um bloco sem vendas válidas vira um item sem corpo,
+    só para o checkpoint avançar. Para se `encerrados` (threading.Event) for
+    marcado, isto é, se todas as tarefas de envio terminaram.
+    """
+    encerrados = encerrados or threading.Event()
+    numero = 0
+    for numeros, colunas in ler_lotes_vendas(origem, TAMANHO_LEITURA, linha_inicial=linha_inicial):
+        lote = transformar_lote(numeros, colunas)
+        estatisticas['total'] += lote['total']
+        estatisticas['filtrados'] += lote['filtrados']
+        estatisticas['erros_transformacao'].extend(lote['erros'])
+        linhas = list(registros(lote))
+        lidas_antes = 0
+        for inicio in range(0, len(linhas), tamanho_lote) or [0]:
+            parte = linhas[inicio:inicio + tamanho_lote]
+            # O último lote do bloco cobre também as linhas filtradas do final
+            if inicio + tamanho_lote >= len(linhas):
+                linha_seguinte = numeros[-1] + 1
+            else:
+                linha_seguinte = int(lote['linhas'][inicio + len(parte) - 1]) + 1
+            lidas = bisect.bisect_left(numeros, linha_seguinte)
+            estatisticas['validos'] += len(parte)
+            item = (numero, len(parte), corpo_lote(parte) if parte else None, linha_seguinte, lidas - lidas_antes)
+            lidas_antes = lidas
+            if not _enfileirar(fila, item, loop, encerrados):
+                return
+            numero += 1
+
+
+async def _enviar(pool, fila, estatisticas, tentativas, confirmacao=None):
+    """Tarefa de envio: consome lotes até receber None."""
+    while True:
+        item = await fila.get()
+        if item is None:
+            return
+        numero, quantidade, corpo, linha_seguinte, lidos = item
+        if corpo is None:
+            if confirmacao is not None:
+                confirmacao.confirmar(numero, linha_seguinte, lidos=lidos)
+            continue
+        espera = ESPERA_INICIAL
+        for tentativa in range(1, tentativas + 1):
+            try:
+                resposta = await pool.pipeline(corpo)
+                inseridos = inseridos_na_resposta(resposta, quantidade)
+            except ErroTransitorio as e:
+                if tentativa == tentativas:
+                    estatisticas['erros'] += quantidade
+                    estatisticas['mensagens'].append(f"{e} (após {tentativas} tentativas)")
+                    break
+                estatisticas['repeticoes'] += 1
+                await asyncio.sleep(espera * (0.5 + random.random()))
+                espera *= 2
+            except ErroEnvio as e:
+                estatisticas['erros'] += quantidade
+                estatisticas['mensagens'].append(str(e))
+                break
+            else:
+                estatisticas['inseridos'] += inseridos
+                estatisticas['duplicados'] += quantidade - inseridos
+                estatisticas['lotes'] += 1
+                if confirmacao is not None:
+                    confirmacao.confirmar(numero, linha_seguinte, lidos=lidos, inseridos=inseridos,
+                                          duplicados=quantidade - inseridos)
+                break
+
+
+async def enviar_planilha(origem, url, token=None, conexoes=CONEXOES, tamanho_lote=TAMANHO_LOTE,
+                          lotes_na_fila=LOTES_NA_FILA, tentativas=TENTATIVAS, checkpoint=None):
+    """
+    Lê `origem` e envia as vendas para o /v2/pipeline de `url`.
+
+    Com `checkpoint` (checkpoint_importacao.Checkpoint), a leitura começa na
+    primeira linha não confirmada e o progresso é gravado a cada lote.
+    Retorna as estatísticas (lidas, filtradas, inseridas, duplicadas, erros,
+    repetições e segundos do início ao último lote confirmado).
+    """
+    estatisticas = {'total': 0, 'filtrados': 0, 'validos': 0, 'inseridos': 0, 'duplicados': 0,
+                    'erros': 0, 'lotes': 0, 'repeticoes': 0, 'mensagens': [], 'erros_transformacao': []}
+    loop = asyncio.get_running_loop()
+    fila = asyncio.Queue(maxsize=lotes_na_fila)
+    pool = PoolConexoes(url, token, conexoes)
+    inicio = time.perf_counter()
+    confirmacao = linha_inicial = None
+    if checkpoint is not None:
+        from checkpoint_importacao import ConfirmacaoEmOrdem
+        confirmacao = ConfirmacaoEmOrdem(checkpoint)
+        linha_inicial = checkpoint.linha
+    envios = [asyncio.create_task(_enviar(pool, fila, estatisticas, tentativas, confirmacao))
+              for _ in range(conexoes)]
+    # Se todas as tarefas de envio morrerem, o produtor não pode ficar esperando a fila
+    encerrados = threading.Event()
+    for envio in envios:
+        envio.add_done_callback(lambda _: all(e.done() for e in envios) and encerrados.set())
+    try:
+        await asyncio.to_thread(_produzir, origem, fila, loop, estatisticas, tamanho_lote,
+                                linha_inicial or 2, encerrados)
+    finally:
+        for envio in envios:
+            if not envio.done():
+                await fila.put(None)
+        falhas = [r for r in await asyncio.gather(*envios, return_exceptions=True) if isinstance(r, BaseException)]
+        pool.fechar()
+    if falhas:
+        raise ErroEnvio(f"envio interrompido: {type(falhas[0]).__name__}: {falhas[0]}")
+    estatisticas['segundos'] = time.perf_counter() - inicio
+    if checkpoint is not None and not estatisticas['erros']:
+        checkpoint.concluir()
+    return estatisticas
+
+
+async def _executar(args, checkpoint):
+    servidor = None
+    url = args.url
+    if args.servidor_local:
+        from servidor_pipeline_local import ServidorPipeline
+        from carregar_sqlite import colunas_tabela
+        servidor = ServidorPipeline(args.servidor_local, args.latencia, args.falhas)
+        definicoes = [f"{coluna} {tipo}{' PRIMARY KEY' if coluna == 'chave_primaria' else ''}"
+                      for coluna, tipo in colunas_tabela('vendas')]
+        servidor.conn.execute(f"CREATE TABLE IF NOT EXISTS vendas ({', '.join(definicoes)})")
+        url = await servidor.iniciar()
+        print(f"🌐 Servidor local: {url}{ROTA_PIPELINE} → {args.servidor_local}")
+    try:
+        return await enviar_planilha(args.origem, url, args.token, args.conexoes, args.lote,
+                                     args.fila, args.tentativas, checkpoint)
+    finally:
+        if servidor is not None:
+            await servidor.parar()
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Envia planilhas de vendas ao Turso lendo e enviando ao mesmo tempo.')
+    parser.add_argument('origem', help='Planilha de vendas (.xlsx/.xls) ou exportação .csv')
+    parser.add_argument('--url', default=os.environ.get('TURSO_DATABASE_URL'),
+                        help='URL do banco (libsql:// ou https://; padrão: $TURSO_DATABASE_URL)')
+    parser.add_argument('--token', default=os.environ.get('TURSO_AUTH_TOKEN'),
+                        help='Token de acesso (padrão: $TURSO_AUTH_TOKEN)')
+    parser.add_argument('--conexoes', type=int, default=CONEXOES,
+                        help=f'Envios simultâneos / conexões no pool (padrão: {CONEXOES})')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help=f'Vendas por lote (padrão: {TAMANHO_LOTE})')
+    parser.add_argument('--fila', type=int, default=LOTES_NA_FILA,
+                        help=f'Lotes prontos aguardando envio (padrão: {LOTES_NA_FILA})')
+    parser.add_argument('--tentativas', type=int, default=TENTATIVAS,
+                        help=f'Tentativas por lote em falhas de rede/HTTP 5xx (padrão: {TENTATIVAS})')
+    parser.add_argument('--checkpoint', metavar='ARQUIVO',
+                        help='Grava o progresso a cada lote confirmado e retoma dele se existir '
+                             '(veja checkpoint_importacao.py)')
+    parser.add_argument('--servidor-local', metavar='BANCO',
+                        help='Envia para um servidor local de teste sobre este SQLite (veja servidor_pipeline_local.py)')
+    parser.add_argument('--latencia', type=float, default=0.0, help='Com --servidor-local: atraso por resposta (s)')
+    parser.add_argument('--falhas', type=float, default=0.0,
+                        help='Com --servidor-local: fração de requisições respondidas com HTTP 503')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.origem):
+        print(f"❌ Erro: Arquivo não encontrado: {args.origem}")
+        return 1
+    if not args.url and not args.servidor_local:
+        print("❌ Erro: informe --url (ou TURSO_DATABASE_URL) ou --servidor-local")
+        return 1
+
+    checkpoint = None
+    if args.checkpoint:
+        from checkpoint_importacao import Checkpoint
+        destino = os.path.abspath(args.servidor_local) if args.servidor_local else url_http(args.url)
+        checkpoint = Checkpoint.abrir(args.checkpoint, args.origem, destino)
+        if checkpoint.descrever():
+            print(checkpoint.descrever())
+
+    print(f"📖 Lendo e enviando: {args.origem} ({args.conexoes} conexões, lotes de {args.lote})")
+    try:
+        estatisticas = asyncio.run(_executar(args, checkpoint))
+    except (ErroLeituraXlsx, ErroEnvio) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+
+    segundos = estatisticas['segundos']
+    print(f"✅ Envio concluído em {segundos:.2f}s:")
+    print(f"   - Total lidos: {estatisticas['total']}")
+    print(f"   - Série != \"{SERIE_FILTRO}\": {estatisticas['filtrados']}")
+    print(f"   - Inseridos: {estatisticas['inseridos']}  Duplicados (ignorados): {estatisticas['duplicados']}")
+    if estatisticas['repeticoes']:
+        print(f"   - Lotes reenviados: {estatisticas['repeticoes']}")
+    erros_transformacao = estatisticas['erros_transformacao']
+    if erros_transformacao:
+        print(f"   ⚠️  Erros na planilha: {len(erros_transformacao)}")
+        for erro in erros_transformacao[:10]:
+            print(f"      - {erro}")
+    if estatisticas['erros']:
+        print(f"   ❌ Vendas não enviadas: {estatisticas['erros']}")
+        for mensagem in estatisticas['mensagens'][:10]:
+            print(f"      - {mensagem}")
+    if checkpoint is not None and checkpoint.retomado:
+        print(f"   - Com as execuções anteriores: {checkpoint.contagens.get('lidos', 0)} lidos, "
+              f"{checkpoint.contagens.get('inseridos', 0)} inseridos")
+    if checkpoint is not None and estatisticas['erros']:
+        print(f"💾 Checkpoint mantido em {args.checkpoint}: rode de novo para reenviar a partir da "
+              f"linha {checkpoint.linha_inicial(2)}")
+    confirmadas = estatisticas['inseridos'] + estatisticas['duplicados']
+    velocidade = confirmadas / segundos if segundos else 0
+    print(f"⏱️  {velocidade:,.0f} vendas/s de ponta a ponta ({estatisticas['lotes']} lotes confirmados)")
+    return 1 if estatisticas['erros'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
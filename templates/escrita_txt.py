@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Escrita rápida do .txt de importação, com divisão em partes e gzip.
+
+A macro monta o arquivo inteiro em uma string (`Join(arrTexto, vbCrLf)`) e
+só depois grava via ADODB.Stream, então o pico de memória é o arquivo duas
+vezes. Aqui as linhas já formatadas (ver converter_clientes.formatar_linha)
+são juntadas em blocos de tamanho fixo. Cada bloco é codificado em UTF-8 de
+uma vez e gravado em uma única chamada. A memória fica limitada a um bloco,
+e a codificação e o write por linha saem do caminho quente.
+
+O formato é o da macro: UTF-8 com BOM, valores entre aspas separados por
+tabulação e linhas separadas por CRLF, sem quebra no final. `SaidaTxt`
+também pode:
+
+- dividir a saída em partes de N linhas (<destino>_parte001.txt, ...), cada
+  uma com BOM e cabeçalho, para enviar em paralelo;
+- gravar cada arquivo já comprimido (.txt.gz). O padrão é o nível 1 do gzip:
+  cerca de 4x menor que o .txt e ~3x mais rápido que o nível 6.
+
+Pela linha de comando, divide e/ou comprime um .txt já gerado:
+
+    python3 escrita_txt.py Clientes_20240101_120000.txt --linhas-por-parte 50000
+    python3 escrita_txt.py Clientes_20240101_120000.txt --gzip
+"""
+
+import argparse
+import codecs
+import gzip
+import os
+import re
+import sys
+import time
+
+import metricas
+
+# Caracteres juntados antes de codificar e gravar. Blocos de ~256 KB cabem
+# no cache e já diluem o custo do write; blocos maiores não ficaram mais rápidos
+TAMANHO_BLOCO = 256 * 1024
+NIVEL_GZIP = 1
+SEPARADOR = '\r\n'
+
+
+def caminho_parte(destino, numero, linhas_por_parte=None, comprimir=False):
+    """
+    Nome do arquivo `numero` (1, 2...) da saída.
+
+    Sem `linhas_por_parte` é o próprio `destino`; com partes, fica
+    <destino>_parte001.txt. Com `comprimir`, ganha .gz no final.
+    """
+    caminho = destino
+    if linhas_por_parte:
+        base, extensao = os.path.splitext(destino)
+        caminho = f"{base}_parte{numero:03d}{extensao or '.txt'}"
+    return caminho + '.gz' if comprimir else caminho
+
+
+def arquivos_saida(destino, total, linhas_por_parte=None, comprimir=False):
+    """Arquivos gravados para `total` linhas de dados (pelo menos um, só com o cabeçalho)."""
+    partes = -(-total // linhas_por_parte) if linhas_por_parte else 1
+    return [caminho_parte(destino, numero, linhas_por_parte, comprimir)
+            for numero in range(1, max(partes, 1) + 1)]
+
+
+def remover_saida(destino, linhas_por_parte=None, comprimir=False):
+    """Apaga os arquivos já gravados (ex.: conversão interrompida por erro)."""
+    numero = 1
+    while True:
+        caminho = caminho_parte(destino, numero, linhas_por_parte, comprimir)
+        if not os.path.exists(caminho):
+            return
+        os.remove(caminho)
+        if not linhas_por_parte:
+            return
+        numero += 1
+
+
+def sobrescreve_origem(origem, destino, linhas_por_parte=None, comprimir=False):
+    """True se algum arquivo da saída de `destino` for o próprio `origem`."""
+    origem = os.path.normcase(os.path.abspath(origem))
+    if not linhas_por_parte:
+        return os.path.normcase(os.path.abspath(caminho_parte(destino, 1, None, comprimir))) == origem
+    # Partes: <base>_parteNNN<extensão>[.gz], com qualquer número de partes
+    base, extensao = os.path.splitext(os.path.normcase(os.path.abspath(destino)))
+    padrao = re.escape(base) + r'_parte\d{3,}' + re.escape(extensao or '.txt') + (r'\.gz' if comprimir else '')
+    return re.fullmatch(padrao, origem) is not None
+
+
+class EscritorTxt:
+    """Um arquivo .txt de importação: BOM + cabeçalho e linhas gravadas em blocos."""
+
+    def __init__(self, caminho, cabecalho, comprimir=False, tamanho_bloco=TAMANHO_BLOCO,
+                 nivel_gzip=NIVEL_GZIP):
+        self.caminho = caminho
+        self.tamanho_bloco = tamanho_bloco
+        # Escritas maiores que o buffer vão direto para o arquivo, sem cópia
+        self.bruto = open(caminho, 'wb')
+        self.arquivo = self.bruto
+        if comprimir:
+            self.arquivo = gzip.GzipFile(filename=os.path.basename(caminho[:-3]), mode='wb',
+                                         fileobj=self.bruto, compresslevel=nivel_gzip)
+        self.arquivo.write(codecs.BOM_UTF8)
+        self.pendentes = [cabecalho]
+        self.caracteres = len(cabecalho)
+        self.linhas = 0
+        self.bytes = len(codecs.BOM_UTF8)
+        self.inicio = True
+
+    def escrever(self, linha):
+        """Acrescenta uma linha já formatada (sem CRLF)."""
+        self.pendentes.append(linha)
+        self.linhas += 1
+        self.caracteres += len(linha)
+        if self.caracteres >= self.tamanho_bloco:
+            self.descarregar()
+
+    def escrever_linhas(self, linhas, limite=None):
+        """
+        Acrescenta linhas até o fim de `linhas` ou até `limite` linhas neste
+        arquivo. Retorna quantas foram escritas.
+        """
+        pendentes = self.pendentes
+        acrescentar = pendentes.append
+        tamanho_bloco = self.tamanho_bloco
+        caracteres = self.caracteres
+        escritas = 0
+        for linha in linhas:
+            acrescentar(linha)
+            caracteres += len(linha)
+            escritas += 1
+            if caracteres >= tamanho_bloco:
+                self.caracteres = caracteres
+                self.descarregar()
+                caracteres = 0
+            if escritas == limite:
+                break
+        self.caracteres = caracteres
+        self.linhas += escritas
+        return escritas
+
+    def descarregar(self):
+        """Codifica e grava o bloco pendente."""
+        if not self.pendentes:
+            return
+        medicao = metricas.atuais()
+        with medicao.etapa('codificacao'):
+            texto = SEPARADOR.join(self.pendentes)
+            # Só o bloco do cabeçalho começa sem CRLF
+            dados = (texto if self.inicio else SEPARADOR + texto).encode('utf-8')
+        self.inicio = False
+        self.arquivo.write(dados)
+        self.bytes += len(dados)
+        self.pendentes.clear()
+        self.caracteres = 0
+
+    def fechar(self):
+        self.descarregar()
+        if self.arquivo is not self.bruto:
+            self.arquivo.close()
+        self.bruto.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+class SaidaTxt:
+    """
+    Saída do .txt de importação: um arquivo só ou partes de `linhas_por_parte`
+    linhas, com ou sem gzip. Cada parte é um .txt de importação completo.
+    """
+
+    def __init__(self, destino, cabecalho, linhas_por_parte=None, comprimir=False,
+                 tamanho_bloco=TAMANHO_BLOCO, nivel_gzip=NIVEL_GZIP):
+        self.destino = destino
+        self.cabecalho = cabecalho
+        self.linhas_por_parte = linhas_por_parte
+        self.comprimir = comprimir
+        self.tamanho_bloco = tamanho_bloco
+        self.nivel_gzip = nivel_gzip
+        self.arquivos = []
+        self.linhas = 0
+        self.bytes = 0
+        self.atual = None
+        self._abrir_parte()
+
+    def _abrir_parte(self):
+        if self.atual is not None:
+            self.atual.fechar()
+            self.bytes += self.atual.bytes
+        caminho = caminho_parte(self.destino, len(self.arquivos) + 1, self.linhas_por_parte, self.comprimir)
+        self.atual = EscritorTxt(caminho, self.cabecalho, self.comprimir, self.tamanho_bloco, self.nivel_gzip)
+        self.arquivos.append(caminho)
+
+    def escrever_linhas(self, linhas):
+        """Grava todas as `linhas` (já formatadas), abrindo partes conforme necessário."""
+        linhas = iter(linhas)
+        if not self.linhas_por_parte:
+            self.linhas += self.atual.escrever_linhas(linhas)
+            return self.linhas
+        while True:
+            restantes = self.linhas_por_parte - self.atual.linhas
+            if restantes:
+                escritas = self.atual.escrever_linhas(linhas, restantes)
+                self.linhas += escritas
+                if escritas < restantes:
+                    return self.linhas
+            # Parte cheia: só abre a próxima se ainda houver linha para ela
+            primeira = next(linhas, None)
+            if primeira is None:
+                return self.linhas
+            self._abrir_parte()
+            self.atual.escrever(primeira)
+            self.linhas += 1
+
+    def fechar(self):
+        if self.atual is not None:
+            self.atual.fechar()
+            self.bytes += self.atual.bytes
+            self.atual = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+def ler_linhas_txt(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera (cabeçalho, linhas) de um .txt de importação, lendo em blocos grandes."""
+    abrir = gzip.open if caminho.endswith('.gz') else open
+    with abrir(caminho, 'rt', encoding='utf-8-sig', newline='') as f:
+        resto = ''
+        while True:
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                break
+            partes = (resto + bloco).split(SEPARADOR)
+            resto = partes.pop()
+            yield from partes
+        if resto:
+            yield resto
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description='Divide e/ou comprime um .txt de importação já gerado, mantendo o formato da macro.'
+    )
+    parser.add_argument('origem', help='Arquivo .txt de importação (ou .txt.gz)')
+    parser.add_argument('-o', '--saida', help='Arquivo de saída (padrão: o nome da origem)')
+    parser.add_argument('--linhas-por-parte', type=int, metavar='N',
+                        help='Grava partes de N linhas (<saida>_parte001.txt, ...), cada uma com cabeçalho')
+    parser.add_argument('--gzip', action='store_true', help='Grava .txt.gz')
+    parser.add_argument('--nivel-gzip', type=int, default=NIVEL_GZIP, choices=range(1, 10), metavar='1-9',
+                        help=f'Nível de compressão (padrão: {NIVEL_GZIP}, o mais rápido)')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    destino = args.saida or args.origem
+    if destino.endswith('.gz'):
+        destino = destino[:-3]
+    if sobrescreve_origem(args.origem, destino, args.linhas_por_parte, args.gzip):
+        print("❌ Erro: a saída sobrescreveria a origem enquanto ela é lida; informe outro arquivo com -o")
+        return 1
+    if not os.path.exists(args.origem):
+        print(f"❌ Erro: Arquivo não encontrado: {args.origem}")
+        return 1
+    metricas.iniciar(args)
+
+    inicio = time.perf_counter()
+    try:
+        linhas = ler_linhas_txt(args.origem)
+        cabecalho = next(linhas, '')
+        with SaidaTxt(destino, cabecalho, args.linhas_por_parte, args.gzip, nivel_gzip=args.nivel_gzip) as saida:
+            with metricas.atuais().etapa('escrita'):
+                saida.escrever_linhas(metricas.atuais().medir_iterador('leitura', linhas))
+    finally:
+        metricas.finalizar(args)
+    segundos = time.perf_counter() - inicio
+
+    for caminho in saida.arquivos:
+        print(f"📁 {caminho}")
+    megabytes = saida.bytes / 1024 / 1024
+    em_disco = sum(os.path.getsize(caminho) for caminho in saida.arquivos) / 1024 / 1024
+    print(f"✅ {saida.linhas} linhas em {len(saida.arquivos)} arquivo(s): {megabytes:,.1f} MB de texto "
+          f"({em_disco:,.1f} MB em disco) em {segundos:.2f}s ({megabytes / segundos if segundos else 0:,.0f} MB/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Leitor das exportações CSV do ERP (clientes e vendas) em modo streaming.
+
+Abrir um CSV no Excel só para salvá-lo como planilha e depois convertê-la é
+o caminho mais lento. Aqui o arquivo é lido direto pelo módulo csv (parser
+em C), com buffer grande, sem nunca ficar inteiro na memória. As linhas
+entram no mesmo pipeline das planilhas: a interface é a de
+leitor_xlsx.ler_linhas_xml, então valem o mesmo mapeamento de cabeçalhos e o
+mesmo gravador do .txt.
+
+Uma amostra do início do arquivo define:
+
+- a codificação: BOM (UTF-8 ou UTF-16) se houver; senão UTF-8 se a amostra
+  decodificar sem erro; senão Windows-1252, o "Latin-1" dos ERPs no Windows
+  (ou Latin-1 puro se nem ele servir);
+- o separador: `;`, `,`, tabulação ou `|`, pelo csv.Sniffer restrito a esses
+  quatro. Se ele não decidir, vale o mais frequente no cabeçalho.
+
+Diferenças em relação às planilhas:
+
+- todos os valores são texto, e as células vazias chegam como '' (os
+  conversores tratam '' e None do mesmo jeito);
+- o número da linha é o do registro no arquivo, com o cabeçalho como 1.
+  Linhas em branco são puladas e não viram linhas vazias.
+
+Uso (mostra o que foi detectado e as primeiras linhas):
+    python3 leitor_csv.py clientes_erp.csv
+"""
+
+import argparse
+import codecs
+import csv
+import sys
+from operator import itemgetter
+
+from leitor_xlsx import ErroLeituraXlsx
+from metricas import atuais
+
+TAMANHO_AMOSTRA = 64 * 1024
+TAMANHO_BUFFER = 1024 * 1024
+SEPARADORES = ';,\t|'
+LINHAS_AMOSTRA = 50
+
+# Campos grandes (observações com quebras de linha) passam do limite padrão
+csv.field_size_limit(16 * 1024 * 1024)
+
+
+class ErroLeituraCsv(ErroLeituraXlsx):
+    """CSV que não pôde ser lido (codificação ou formato inesperados)."""
+
+
+def detectar_codificacao(amostra, completa=False):
+    """Codificação do arquivo a partir dos primeiros bytes (`completa` = arquivo inteiro)."""
+    if amostra.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if amostra.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # Decodificador incremental: um caractere cortado no fim da amostra não é erro
+        codecs.getincrementaldecoder('utf-8')().decode(amostra, final=completa)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        amostra.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def detectar_separador(texto):
+    """Separador do CSV a partir das primeiras linhas (texto já decodificado)."""
+    linhas = texto.splitlines()[:LINHAS_AMOSTRA]
+    if not linhas:
+        return ';'
+    try:
+        return csv.Sniffer().sniff('\n'.join(linhas), delimiters=SEPARADORES).delimiter
+    except csv.Error:
+        return max(SEPARADORES, key=linhas[0].count)
+
+
+def detectar_formato(caminho):
+    """(codificação, separador) do CSV."""
+    with open(caminho, 'rb') as f:
+        amostra = f.read(TAMANHO_AMOSTRA)
+        completa = len(amostra) < TAMANHO_AMOSTRA
+    codificacao = detectar_codificacao(amostra, completa)
+    texto = codecs.getincrementaldecoder(codificacao)(errors='replace').decode(amostra)
+    if not completa:
+        # Descarta a última linha, que pode estar cortada
+        texto = texto[:max(texto.rfind('\n'), 0)]
+    return codificacao, detectar_separador(texto)
+
+
+def ler_registros_csv(caminho, codificacao=None, separador=None):
+    """
+    Gera cada registro (lista de textos) do CSV, a começar pelo cabeçalho.
+
+    Codificação e separador são detectados quando não informados.
+    """
+    if codificacao is None or separador is None:
+        detectada, detectado = detectar_formato(caminho)
+        codificacao = codificacao or detectada
+        separador = separador or detectado
+    registros = 0
+    try:
+        with open(caminho, encoding=codificacao, newline='', buffering=TAMANHO_BUFFER) as f:
+            for registros, registro in enumerate(csv.reader(f, delimiter=separador), 1):
+                yield registro
+    except UnicodeDecodeError as e:
+        raise ErroLeituraCsv(f"{caminho}: texto inválido em {codificacao} perto do registro "
+                             f"{registros + 1} ({e.reason})")
+    except csv.Error as e:
+        raise ErroLeituraCsv(f"{caminho}: registro {registros + 1}: {e}")
+
+
+def ler_linhas_csv(caminho, escolher_colunas, linha_inicial=2, linha_final=None):
+    """
+    Gera (número da linha, valores) de um CSV.
+
+    Mesma interface de `leitor_xlsx.ler_linhas_xml`: `escolher_colunas`
+    recebe o cabeçalho e devolve os índices a extrair (None = coluna ausente).
+    """
+    medicao = atuais()
+    registros = ler_registros_csv(caminho)
+    with medicao.etapa('cabecalho'):
+        cabecalho = next(registros, [])
+        indices = escolher_colunas(cabecalho)
+    # Coluna ausente aponta para o None acrescentado no fim de cada registro
+    pegar = itemgetter(*[-1 if i is None else i for i in indices], -1)
+    minimo = max((i for i in indices if i is not None), default=-1) + 1
+    linha_final = linha_final or float('inf')
+
+    for numero, registro in enumerate(registros, 2):
+        if numero < linha_inicial or not registro:
+            continue
+        if numero > linha_final:
+            return
+        if len(registro) < minimo:
+            registro = registro + [''] * (minimo - len(registro))
+        registro.append(None)
+        yield numero, pegar(registro)[:-1]
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Mostra a codificação e o separador detectados em um CSV.')
+    parser.add_argument('origem', help='Arquivo CSV')
+    parser.add_argument('--linhas', type=int, default=5, help='Registros a mostrar (padrão: 5)')
+    args = parser.parse_args(argv)
+    try:
+        codificacao, separador = detectar_formato(args.origem)
+        print(f"📄 {args.origem}: codificação {codificacao}, separador {separador!r}")
+        for numero, registro in enumerate(ler_registros_csv(args.origem, codificacao, separador), 1):
+            if numero > args.linhas:
+                break
+            print(f"   {numero}: {registro}")
+    except (OSError, ErroLeituraCsv) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
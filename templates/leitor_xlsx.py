@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Leitor rápido de planilhas .xlsx lendo o XML da aba diretamente.
+
+Mesmo no modo read-only, o openpyxl cria um objeto de célula para cada valor.
+As exportações de clientes e vendas do ERP são grades de valores simples, sem
+fórmulas, então aqui o arquivo é lido como o ZIP que ele é:
+
+1. `xl/sharedStrings.xml` é carregado uma única vez em uma lista;
+2. o XML da primeira aba é lido em blocos por um parser expat, e só as
+   colunas pedidas têm o texto acumulado e convertido — as demais são
+   ignoradas sem criar nenhum objeto.
+
+Só usa a biblioteca padrão. Os valores devolvidos são os mesmos do openpyxl
+(int/float/str/bool/datetime), de modo que os dois leitores são intercambiáveis.
+"""
+
+import datetime
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree as ET
+from xml.parsers import expat
+
+from metricas import atuais
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+TAMANHO_BLOCO = 1024 * 1024
+# O cabeçalho é parseado em pedaços menores do bloco: o parse para logo depois
+# da linha 1, sem converter as demais linhas que vieram no mesmo bloco
+TAMANHO_PEDACO_CABECALHO = 16 * 1024
+
+# Formatos internos de data/hora do Excel (os mesmos reconhecidos pelo openpyxl)
+FORMATOS_DATA_INTERNOS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 46, 47}
+
+EPOCA_1900 = datetime.datetime(1899, 12, 30)
+EPOCA_1904 = datetime.datetime(1904, 1, 1)
+
+_RE_TEXTO_FORMATO = re.compile(r'"[^"]*"|\[(?![hms]+\])[^\]]*\]|\\.|_.|\*.')
+_RE_DATA_FORMATO = re.compile(r'[dmyhs]', re.IGNORECASE)
+_RE_SHEET_DATA = re.compile(rb'<(?:\w+:)?sheetData\b[^>]*>')
+_RE_LINHA = re.compile(rb'<row r="(\d+)"')
+_RE_DIMENSAO = re.compile(rb'<(?:\w+:)?dimension ref="[A-Z]+\d+:[A-Z]+(\d+)"')
+
+
+class ErroLeituraXlsx(Exception):
+    """Arquivo que não é um .xlsx válido para o leitor rápido."""
+
+
+def indice_coluna(referencia):
+    """'A1' → 0, 'AB12' → 27 (índice base 0 da coluna)."""
+    indice = 0
+    for caractere in referencia:
+        if caractere.isdigit():
+            break
+        indice = indice * 26 + (ord(caractere) - 64)
+    return indice - 1
+
+
+def _caminho_primeira_aba(zf):
+    """Resolve o XML da primeira aba via workbook.xml + workbook.xml.rels."""
+    try:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    except KeyError:
+        return 'xl/worksheets/sheet1.xml'
+
+    aba = workbook.find(f'{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet')
+    if aba is None:
+        raise ErroLeituraXlsx('Planilha sem abas')
+    rel_id = aba.get(f'{{{NS_REL}}}id')
+
+    for rel in rels.iter(f'{{{NS_PKG_REL}}}Relationship'):
+        if rel.get('Id') == rel_id:
+            alvo = rel.get('Target')
+            if alvo.startswith('/'):
+                return alvo.lstrip('/')
+            return posixpath.normpath(posixpath.join('xl', alvo))
+    return 'xl/worksheets/sheet1.xml'
+
+
+def _usa_data_1904(zf):
+    try:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    except KeyError:
+        return False
+    propriedades = workbook.find(f'{{{NS_MAIN}}}workbookPr')
+    return propriedades is not None and propriedades.get('date1904') in ('1', 'true')
+
+
+def ler_textos_compartilhados(zf):
+    """Carrega xl/sharedStrings.xml em uma lista (índice → texto)."""
+    try:
+        arquivo = zf.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+
+    textos = []
+    tag_si = f'{{{NS_MAIN}}}si'
+    tag_t = f'{{{NS_MAIN}}}t'
+    tag_r = f'{{{NS_MAIN}}}r'
+    with arquivo:
+        for _, elem in ET.iterparse(arquivo):
+            if elem.tag == tag_si:
+                # Texto simples (<t>) ou rich text (<r><t>); textos fonéticos
+                # (<rPh>) ficam de fora, como no Excel
+                t = elem.find(tag_t)
+                if t is not None:
+                    textos.append(t.text or '')
+                else:
+                    textos.append(''.join(r.findtext(tag_t, '') for r in elem.iterfind(tag_r)))
+                elem.clear()
+    return textos
+
+
+def _formato_eh_data(codigo):
+    codigo = codigo.split(';')[0]
+    codigo = _RE_TEXTO_FORMATO.sub('', codigo)
+    return _RE_DATA_FORMATO.search(codigo) is not None
+
+
+def ler_estilos_data(zf):
+    """Retorna o conjunto de índices de estilo (atributo s) com formato de data."""
+    try:
+        estilos = ET.fromstring(zf.read('xl/styles.xml'))
+    except KeyError:
+        return set()
+
+    formatos_data = set(FORMATOS_DATA_INTERNOS)
+    num_fmts = estilos.find(f'{{{NS_MAIN}}}numFmts')
+    if num_fmts is not None:
+        for fmt in num_fmts:
+            if _formato_eh_data(fmt.get('formatCode', '')):
+                formatos_data.add(int(fmt.get('numFmtId')))
+
+    indices = set()
+    cell_xfs = estilos.find(f'{{{NS_MAIN}}}cellXfs')
+    if cell_xfs is not None:
+        for indice, xf in enumerate(cell_xfs):
+            if int(xf.get('numFmtId', 0)) in formatos_data:
+                indices.add(str(indice))
+    return indices
+
+
+def numero_para_data(numero, epoca=EPOCA_1900):
+    """Converte o serial de data do Excel como o openpyxl (from_excel)."""
+    dia, fracao = divmod(numero, 1)
+    diferenca = datetime.timedelta(milliseconds=round(fracao * 86400 * 1000))
+    if 0 <= numero < 1 and diferenca.days == 0:
+        return (datetime.datetime.min + diferenca).time()
+    if 0 < numero < 60 and epoca == EPOCA_1900:
+        dia += 1
+    return epoca + datetime.timedelta(days=dia) + diferenca
+
+
+class _ParserAba:
+    """
+    Handlers expat que acumulam apenas as células das colunas desejadas.
+
+    `colunas` é None (todas as colunas, usado no cabeçalho) ou um conjunto de
+    índices. As linhas completas vão para `prontas` como (número, {coluna: valor}).
+    """
+
+    def __init__(self, textos, estilos_data, epoca):
+        self.textos = textos
+        self.estilos_data = estilos_data
+        self.epoca = epoca
+        self.colunas = None
+        self.prontas = []
+        self.linha = 0
+        self.valores = {}
+        self.proxima_coluna = 0
+        self.coluna = 0
+        self.tipo = 'n'
+        self.estilo = None
+        self.na_celula = False
+        self.no_texto = False
+        self.partes = []
+        self.cache_colunas = {}
+
+    def criar(self):
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = self.inicio
+        parser.EndElementHandler = self.fim
+        parser.CharacterDataHandler = self.texto
+        return parser
+
+    def inicio(self, nome, atributos):
+        if ':' in nome:
+            nome = nome.rpartition(':')[2]
+        if nome == 'c':
+            referencia = atributos.get('r')
+            if referencia:
+                letras = referencia.rstrip('0123456789')
+                coluna = self.cache_colunas.get(letras)
+                if coluna is None:
+                    coluna = self.cache_colunas[letras] = indice_coluna(letras)
+            else:
+                coluna = self.proxima_coluna
+            self.proxima_coluna = coluna + 1
+            if self.colunas is None or coluna in self.colunas:
+                self.na_celula = True
+                self.coluna = coluna
+                self.tipo = atributos.get('t', 'n')
+                self.estilo = atributos.get('s')
+                self.partes = []
+        elif nome == 'v' or nome == 't':
+            self.no_texto = self.na_celula
+        elif nome == 'row':
+            self.linha = int(atributos.get('r', self.linha + 1))
+            self.valores = {}
+            self.proxima_coluna = 0
+
+    def fim(self, nome):
+        if ':' in nome:
+            nome = nome.rpartition(':')[2]
+        if nome == 'c':
+            if self.na_celula:
+                self.na_celula = False
+                if self.partes:
+                    self.valores[self.coluna] = self.converter(''.join(self.partes))
+        elif nome == 'v' or nome == 't':
+            self.no_texto = False
+        elif nome == 'row':
+            self.prontas.append((self.linha, self.valores))
+
+    def texto(self, dados):
+        if self.no_texto:
+            self.partes.append(dados)
+
+    def converter(self, texto):
+        tipo = self.tipo
+        if tipo == 's':
+            return self.textos[int(texto)]
+        if tipo == 'n':
+            numero = float(texto) if ('.' in texto or 'E' in texto or 'e' in texto) else int(texto)
+            if self.estilo in self.estilos_data:
+                return numero_para_data(numero, self.epoca)
+            return numero
+        if tipo == 'b':
+            return texto == '1'
+        if tipo == 'd':
+            return datetime.datetime.fromisoformat(texto)
+        # str (fórmula), inlineStr e e (erro) ficam como texto
+        return texto
+
+
+def _ler_cabecalho(aba, estado):
+    """
+    Lê o início do XML da aba até a primeira linha.
+
+    Retorna (cabeçalho, prefixo), onde prefixo são os bytes do documento até
+    a tag <sheetData> inclusive — usados para retomar o parse no meio da aba.
+    """
+    parser = estado.criar()
+    inicio = b''
+    while not estado.prontas:
+        bloco = aba.read(TAMANHO_BLOCO)
+        if not bloco:
+            parser.Parse(bloco, True)
+            break
+        if not inicio:
+            inicio = bloco
+        for posicao in range(0, len(bloco), TAMANHO_PEDACO_CABECALHO):
+            parser.Parse(bloco[posicao:posicao + TAMANHO_PEDACO_CABECALHO])
+            if estado.prontas:
+                break
+
+    cabecalho = []
+    if estado.prontas and estado.prontas[0][0] == 1:
+        valores = estado.prontas[0][1]
+        cabecalho = [valores.get(i) for i in range(max(valores, default=-1) + 1)]
+    estado.prontas = []
+
+    marcador = _RE_SHEET_DATA.search(inicio)
+    prefixo = inicio[:marcador.end()] if marcador else None
+    return cabecalho, prefixo
+
+
+def _saltar_ate_linha(aba, linha):
+    """
+    Descarta o XML das linhas anteriores a `linha` sem passar pelo parser.
+
+    Procura os marcadores <row r="N"> direto nos bytes descompactados (busca
+    em C), olhando só o último marcador de cada bloco. Retorna (bytes a partir
+    da primeira linha >= `linha` ou None, se algum marcador foi encontrado).
+    """
+    resto = b''
+    viu_marcador = False
+    while True:
+        novo = aba.read(TAMANHO_BLOCO)
+        bloco = resto + novo
+        # O fim do bloco pode cortar um marcador ao meio; fica para a próxima volta
+        limite = len(bloco) if not novo else max(len(bloco) - 32, 0)
+        ultimo = bloco.rfind(b'<row r="', 0, limite)
+        if ultimo != -1:
+            viu_marcador = True
+            marcador = _RE_LINHA.match(bloco, ultimo)
+            if marcador and int(marcador.group(1)) >= linha:
+                for marcador in _RE_LINHA.finditer(bloco):
+                    if int(marcador.group(1)) >= linha:
+                        return bloco[marcador.start():], True
+        if not novo:
+            return None, viu_marcador
+        resto = bloco[limite:]
+
+
+def contar_linhas_xml(caminho):
+    """
+    Última linha da primeira aba.
+
+    Usa a tag <dimension> quando ela traz um intervalo; senão (o openpyxl em
+    modo write-only grava só "A1") percorre os bytes da aba procurando o
+    último marcador <row r="N">, sem parsear o XML.
+    """
+    with zipfile.ZipFile(caminho) as zf, zf.open(_caminho_primeira_aba(zf)) as aba:
+        inicio = aba.read(TAMANHO_BLOCO)
+        marcador = _RE_DIMENSAO.search(inicio)
+        if marcador:
+            return int(marcador.group(1))
+
+        ultima = None
+        bloco = inicio
+        resto = b''
+        while bloco:
+            bloco = resto + bloco
+            posicao = bloco.rfind(b'<row r="')
+            if posicao != -1:
+                marcador = _RE_LINHA.match(bloco, posicao)
+                if marcador:
+                    ultima = int(marcador.group(1))
+            resto = bloco[-32:]
+            bloco = aba.read(TAMANHO_BLOCO)
+    return ultima
+
+
+def ler_linhas_xml(caminho, escolher_colunas, linha_inicial=2, linha_final=None):
+    """
+    Gera (número da linha, valores) lendo o XML da primeira aba diretamente.
+
+    Mesma interface de `converter_clientes.ler_linhas_openpyxl`:
+    `escolher_colunas(cabecalho)` recebe a linha 1 completa e devolve os
+    índices a extrair (None = coluna ausente). Linhas que não existem no XML
+    são devolvidas vazias, como faz o openpyxl. Com `linha_final`, a leitura
+    para nessa linha; com `linha_inicial` alta, o trecho anterior é pulado
+    sem parse (usado para dividir uma aba grande em fatias).
+    """
+    metricas = atuais()
+    try:
+        with metricas.etapa('zip'):
+            zf = zipfile.ZipFile(caminho)
+    except zipfile.BadZipFile:
+        raise ErroLeituraXlsx(f'Não é um arquivo .xlsx: {caminho}')
+
+    with zf:
+        with metricas.etapa('textos_estilos'):
+            estado = _ParserAba(
+                ler_textos_compartilhados(zf),
+                ler_estilos_data(zf),
+                EPOCA_1904 if _usa_data_1904(zf) else EPOCA_1900,
+            )
+            caminho_aba = _caminho_primeira_aba(zf)
+
+        with metricas.etapa('cabecalho'), zf.open(caminho_aba) as aba:
+            cabecalho, prefixo = _ler_cabecalho(aba, estado)
+            indices = escolher_colunas(cabecalho)
+        estado.colunas = {i for i in indices if i is not None}
+        vazia = (None,) * len(indices)
+        linha_final = linha_final or float('inf')
+
+        aba = zf.open(caminho_aba)
+        try:
+            parser = estado.criar()
+            ultima = 1
+            bloco = None
+            if prefixo and linha_inicial > 2:
+                with metricas.etapa('descompactar'):
+                    bloco, viu_marcador = _saltar_ate_linha(aba, linha_inicial)
+                if bloco is not None:
+                    parser.Parse(prefixo)
+                    ultima = linha_inicial - 1
+                elif viu_marcador:
+                    return
+                else:
+                    # Marcadores em formato inesperado: lê a aba desde o início
+                    aba.close()
+                    aba = zf.open(caminho_aba)
+            if bloco is None:
+                with metricas.etapa('descompactar'):
+                    bloco = aba.read(TAMANHO_BLOCO)
+
+            while True:
+                with metricas.etapa('xml'):
+                    parser.Parse(bloco, not bloco)
+                prontas = estado.prontas
+                estado.prontas = []
+
+                for numero, valores in prontas:
+                    if numero == 1:
+                        continue
+                    for faltante in range(max(ultima + 1, linha_inicial), min(numero, linha_final + 1)):
+                        yield faltante, vazia
+                    if numero > linha_final:
+                        return
+                    ultima = numero
+                    if numero >= linha_inicial:
+                        yield numero, tuple(
+                            valores.get(i) if i is not None else None for i in indices
+                        )
+
+                if not bloco:
+                    break
+                with metricas.etapa('descompactar'):
+                    bloco = aba.read(TAMANHO_BLOCO)
+        finally:
+            aba.close()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Tabelas de lookup dos filtros (lkp_*) montadas a partir da base de clientes.
+
+Hoje `scripts/atualizar-filtros-lookup.js` reconstrói as tabelas uma vez por
+semana com SELECT DISTINCT no Turso, e os filtros dos dashboards ficam
+desatualizados entre uma execução e outra. Como o conversor já passa por
+todos os valores de `rota`, `sub_rota`, `cidade`, `grupo_desc`... de cada
+cliente, os conjuntos distintos são montados na mesma passada e gravados
+prontos para carga, sem nenhuma leitura no banco:
+
+- `lkp_localidades`: (rota, sub_rota, cidade) distintos, com rota preenchida;
+- `lkp_clientes`: (cliente, nome, fantasia, grupo_desc, cidade) por cliente.
+
+Os valores são os mesmos que vão para tab_cliente (texto do .txt, vazio =
+NULL) e, como no upsert do importador, a última ocorrência de um cliente
+vence. A planilha deve ser a base completa: o SQL gerado faz DELETE + INSERT
+em uma transação, como o script semanal. As tabelas que dependem do
+histórico de vendas (lkp_cidades_regiao, lkp_cidades_equipe,
+lkp_produtos_parados) continuam com o script semanal.
+
+Saídas: `lookups_clientes.sql` (multi-row INSERT em lotes) e um .txt por
+tabela no formato do conversor (UTF-8 com BOM, valores entre aspas, TAB, CRLF).
+
+Uso:
+    python3 converter_clientes.py clientes.xlsx --lookups lookups/
+    python3 lookups_clientes.py Clientes_20250101_120000.txt -o lookups/
+    python3 lookups_clientes.py clientes.xlsx --formato sql --banco banco_local.db
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from converter_clientes import LEITORES, ErroConversao, formatar_linha, valor_para_texto
+from leitor_xlsx import ErroLeituraXlsx
+from mapeamentos import COLUNAS_CLIENTES
+import metricas
+
+# (tabela, colunas, coluna que não pode ser NULL) — mesmas do 04-create-lookup-tables.sql
+TABELAS_LOOKUP = [
+    ('lkp_localidades', ['rota', 'sub_rota', 'cidade'], 'rota'),
+    ('lkp_clientes', ['cliente', 'nome', 'fantasia', 'grupo_desc', 'cidade'], 'cliente'),
+]
+ARQUIVO_SQL = 'lookups_clientes.sql'
+LINHAS_POR_INSERT = 500
+FORMATOS = ('sql', 'tsv', 'ambos')
+
+
+def texto_tabela(valor):
+    """Valor como fica em tab_cliente: texto do .txt (CStr), vazio = None."""
+    return valor_para_texto(valor).replace('"', "'") or None
+
+
+def _chave_ordem(linha):
+    # NULL primeiro, como no ORDER BY do SQLite
+    return tuple((v is not None, v or '') for v in linha)
+
+
+class LookupsClientes:
+    """Acumula os conjuntos distintos das tabelas lkp_* linha a linha."""
+
+    def __init__(self, colunas=COLUNAS_CLIENTES):
+        indice = {coluna: i for i, coluna in enumerate(colunas)}
+        necessarias = sorted({c for _, cols, _ in TABELAS_LOOKUP for c in cols}, key=indice.get)
+        self.indices = [indice[c] for c in necessarias]
+        self.posicoes = {c: i for i, c in enumerate(necessarias)}
+        self.i_cliente = self.posicoes['cliente']
+        self.por_cliente = {}
+        self.sem_cliente = set()
+        self.linhas = 0
+
+    def acrescentar(self, valores):
+        """Registra uma linha já em texto (tupla na ordem das colunas, vazio = None)."""
+        projecao = tuple(valores[i] for i in self.indices)
+        cliente = projecao[self.i_cliente]
+        if cliente is None:
+            self.sem_cliente.add(projecao)
+        else:
+            # Upsert do importador: a última ocorrência do cliente vence
+            self.por_cliente[cliente] = projecao
+        self.linhas += 1
+
+    def acompanhar(self, linhas):
+        """Repassa (número, valores brutos) do conversor, registrando cada linha."""
+        medicao = metricas.atuais()
+        for numero, valores in linhas:
+            with medicao.etapa('lookups'):
+                self.acrescentar(tuple(texto_tabela(v) for v in valores))
+            yield numero, valores
+
+    def tabelas(self):
+        """{tabela: (colunas, linhas distintas ordenadas)}."""
+        registros = list(self.por_cliente.values())
+        registros.extend(self.sem_cliente)
+        resultado = {}
+        for tabela, colunas, obrigatoria in TABELAS_LOOKUP:
+            posicoes = [self.posicoes[c] for c in colunas]
+            i_obrigatoria = self.posicoes[obrigatoria]
+            distintas = {
+                tuple(registro[p] for p in posicoes)
+                for registro in registros if registro[i_obrigatoria] is not None
+            }
+            resultado[tabela] = (colunas, sorted(distintas, key=_chave_ordem))
+        return resultado
+
+
+def literal_sql(valor):
+    if valor is None:
+        return 'NULL'
+    if isinstance(valor, (int, float)):
+        return repr(valor)
+    return "'" + valor.replace("'", "''") + "'"
+
+
+def gravar_sql(destino, tabelas, linhas_por_insert=LINHAS_POR_INSERT,
+               gerador='lookups_clientes.py a partir da base de clientes'):
+    """DELETE + INSERT de cada tabela em uma única transação."""
+    with open(destino, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(f"-- Gerado por templates/{gerador}\n")
+        f.write("-- Tabelas criadas por sql/maintenance/04-create-lookup-tables.sql\n")
+        f.write("BEGIN TRANSACTION;\n")
+        for tabela, (colunas, linhas) in tabelas.items():
+            f.write(f"\nDELETE FROM {tabela};\n")
+            for inicio in range(0, len(linhas), linhas_por_insert):
+                valores = ',\n'.join(
+                    '(' + ', '.join(map(literal_sql, linha)) + ')'
+                    for linha in linhas[inicio:inicio + linhas_por_insert]
+                )
+                f.write(f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES\n{valores};\n")
+        f.write("\nCOMMIT;\n")
+
+
+def gravar_tsv(pasta, tabelas):
+    """Um <tabela>.txt por tabela, no formato do .txt do conversor. Retorna os caminhos."""
+    caminhos = []
+    for tabela, (colunas, linhas) in tabelas.items():
+        caminho = os.path.join(pasta, f'{tabela}.txt')
+        with open(caminho, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write(formatar_linha(colunas))
+            for linha in linhas:
+                f.write('\r\n' + formatar_linha(linha))
+        caminhos.append(caminho)
+    return caminhos
+
+
+def gravar_lookups(pasta, lookups, formato='ambos'):
+    """Grava as tabelas de `lookups` em `pasta`. Retorna {tabela: linhas}."""
+    os.makedirs(pasta, exist_ok=True)
+    with metricas.atuais().etapa('lookups'):
+        tabelas = lookups.tabelas()
+        if formato in ('sql', 'ambos'):
+            gravar_sql(os.path.join(pasta, ARQUIVO_SQL), tabelas)
+        if formato in ('tsv', 'ambos'):
+            gravar_tsv(pasta, tabelas)
+    return {tabela: len(linhas) for tabela, (_, linhas) in tabelas.items()}
+
+
+def aplicar_sqlite(conn, tabelas):
+    """Recarrega as tabelas em um banco SQLite/libSQL local (DELETE + INSERT atômico)."""
+    with conn:
+        for tabela, (colunas, linhas) in tabelas.items():
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {tabela} ({', '.join(c + ' TEXT' for c in colunas)})")
+            conn.execute(f"DELETE FROM {tabela}")
+            conn.executemany(
+                f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                linhas,
+            )
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Monta as tabelas lkp_* de clientes sem consultar o banco.')
+    parser.add_argument('origem', help='Clientes_<timestamp>.txt convertido ou planilha de clientes')
+    parser.add_argument('-o', '--pasta', default='.', help='Pasta de saída (padrão: pasta atual)')
+    parser.add_argument('--formato', choices=FORMATOS, default='ambos',
+                        help=f'sql = {ARQUIVO_SQL}; tsv = um .txt por tabela; ambos (padrão)')
+    parser.add_argument('--banco', help='Aplica também em um banco SQLite/libSQL local')
+    parser.add_argument('--leitor', choices=sorted(LEITORES), default='xml',
+                        help='Leitor da planilha (cache = cache colunar por hash, veja cache_planilhas.py)')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    from carregar_sqlite import ler_origem
+
+    if not os.path.exists(args.origem):
+        print(f"❌ Erro: Arquivo não encontrado: {args.origem}")
+        return 1
+    print(f"📖 Lendo clientes: {args.origem}")
+    medicao = metricas.iniciar(args)
+    inicio = time.perf_counter()
+    lookups = LookupsClientes()
+    try:
+        for valores in medicao.medir_iterador('leitura', ler_origem(args.origem, LEITORES[args.leitor])):
+            with medicao.etapa('lookups'):
+                lookups.acrescentar(valores)
+        totais = gravar_lookups(args.pasta, lookups, args.formato)
+        if args.banco:
+            conn = sqlite3.connect(args.banco)
+            try:
+                with medicao.etapa('escrita'):
+                    aplicar_sqlite(conn, lookups.tabelas())
+            finally:
+                conn.close()
+    except (ErroConversao, ErroLeituraXlsx, sqlite3.Error) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    print(f"✅ {lookups.linhas} linhas de clientes em {time.perf_counter() - inicio:.2f}s")
+    for tabela, quantidade in totais.items():
+        print(f"   - {tabela}: {quantidade} registro(s)")
+    print(f"📁 Pasta: {args.pasta}")
+    if args.banco:
+        print(f"💾 Aplicado em {args.banco}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Mapeamentos de cabeçalhos usados pelas ferramentas de importação.
+
+Mantém em um único lugar a mesma correspondência usada pela macro VBA
+Importar_Clientes (clientes) e pelo scripts/importar-vendas-excel.js (vendas).
+"""
+
+# Cabeçalho da planilha de origem → coluna de tab_cliente.
+# A ordem é a mesma do Scripting.Dictionary da macro e define a ordem das
+# colunas no arquivo .txt gerado.
+MAPEAMENTO_CLIENTES = [
+    ('Cliente', 'cliente'),
+    ('Nome', 'nome'),
+    ('Fantasia', 'fantasia'),
+    ('Inscr. Est.', 'insc_est'),
+    ('CNPJ/CPF', 'cnpj_cpf'),
+    ('Grupo', 'grupo'),
+    ('Endereço', 'endereco'),
+    ('CEP', 'cep'),
+    ('Bairro', 'bairro'),
+    ('Cidade', 'cidade'),
+    ('Nome (Grupo)', 'grupo_desc'),
+    ('Descr. (Rota)', 'rota'),
+    ('Descrição (Situação)', 'sit_cliente'),
+    ('Descrição (Sub Rota)', 'sub_rota'),
+    ('Número Endereço', 'num_endereco'),
+]
+
+CABECALHOS_CLIENTES = [origem for origem, _ in MAPEAMENTO_CLIENTES]
+COLUNAS_CLIENTES = [destino for _, destino in MAPEAMENTO_CLIENTES]
+
+# Cabeçalho da planilha de vendas → coluna da tabela vendas
+# (mesmo COLUMN_MAPPING de scripts/importar-vendas-excel.js)
+MAPEAMENTO_VENDAS = [
+    ('Série', 'serie'),
+    ('Nota Fiscal', 'nota_fiscal'),
+    ('Emissão', 'emissao'),
+    ('Produto', 'produto'),
+    ('Qtde.Faturada', 'qtde_faturada'),
+    ('Nat.Oper.', 'nat_oper'),
+    ('Família', 'familia'),
+    ('Complemento', 'complemento'),
+    ('Cliente', 'cliente'),
+    ('Nome', 'nome'),
+    ('Fantasia', 'fantasia'),
+    ('Representante', 'representante'),
+    ('UF', 'uf'),
+    ('Cidade', 'cidade'),
+    ('Peso Líq.', 'peso_liq'),
+    ('Preço.Unitário', 'preco_unitario'),
+    ('% Desc.', 'perc_desc'),
+    ('Valor Bruto', 'valor_bruto'),
+    ('Valor Desconto', 'valor_desconto'),
+    ('Valor Líquido', 'valor_liquido'),
+    ('Valor Financeiro', 'valor_financeiro'),
+    ('Grupo Empresa', 'grupo_empresa'),
+    ('Preço Unit. Liq.', 'preco_unit_liq'),
+    ('Preço Bruto', 'preco_bruto'),
+]
+
+CABECALHOS_VENDAS = [origem for origem, _ in MAPEAMENTO_VENDAS]
+COLUNAS_VENDAS = [destino for _, destino in MAPEAMENTO_VENDAS]
+
+# Colunas numéricas de vendas (NUMERIC_COLUMNS do importador JS)
+COLUNAS_NUMERICAS_VENDAS = [
+    'qtde_faturada',
+    'peso_liq',
+    'preco_unitario',
+    'perc_desc',
+    'valor_bruto',
+    'valor_desconto',
+    'valor_liquido',
+    'valor_financeiro',
+    'preco_unit_liq',
+    'preco_bruto',
+]
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Métricas por etapa (tempo de parede, CPU, itens e memória) para os pipelines.
+
+As etapas são empilhadas: o tempo de uma etapa é exclusivo, ou seja, o tempo
+gasto em uma etapa aninhada (ex.: "xml" dentro de "leitura") não é contado
+duas vezes. Isso permite medir pipelines em streaming, em que leitura,
+conversão e escrita se alternam linha a linha:
+
+    with metricas.etapa('escrita'):
+        for linha in metricas.medir_iterador('conversao', linhas):
+            ...
+
+O código instrumentado usa sempre `atuais()`. Sem `ativar`, ela devolve um
+objeto que não mede nada (e `medir_iterador` devolve o próprio iterável),
+então a instrumentação não custa nada fora do modo de métricas.
+
+Nas linhas de comando, `adicionar_argumentos` cria:
+    --metrics ARQUIVO.json     grava as métricas em JSON
+    --metricas-memoria         pico de memória por etapa (tracemalloc, mais lento)
+    --perfilar ETAPA           cProfile só durante a etapa (grava ARQUIVO.prof)
+"""
+
+import contextlib
+import cProfile
+import datetime
+import json
+import sys
+import time
+import tracemalloc
+
+
+class Metricas:
+    """Acumula tempo exclusivo, CPU, chamadas, itens e pico de memória por etapa."""
+
+    ativa = True
+
+    def __init__(self, comando='', memoria=False, perfilar=None):
+        self.comando = comando
+        self.memoria = memoria
+        self.perfilar = perfilar
+        self.perfil = cProfile.Profile() if perfilar else None
+        self.etapas = {}
+        self.contadores = {}
+        self.pilha = []
+        self.pico_memoria = 0
+        self.inicio = datetime.datetime.now()
+        if memoria:
+            tracemalloc.start()
+        self._parede_inicial = self._marca_parede = time.perf_counter()
+        self._cpu_inicial = self._marca_cpu = time.process_time()
+
+    def _dados(self, nome):
+        dados = self.etapas.get(nome)
+        if dados is None:
+            dados = self.etapas[nome] = {'segundos': 0.0, 'cpu_segundos': 0.0, 'chamadas': 0, 'itens': 0}
+        return dados
+
+    def _trocar(self, nova_pilha):
+        """Fecha o intervalo da etapa do topo e passa a medir o topo de `nova_pilha`."""
+        parede = time.perf_counter()
+        cpu = time.process_time()
+        if self.pilha:
+            dados = self._dados(self.pilha[-1])
+            dados['segundos'] += parede - self._marca_parede
+            dados['cpu_segundos'] += cpu - self._marca_cpu
+            if self.memoria:
+                pico = tracemalloc.get_traced_memory()[1]
+                dados['pico_memoria_bytes'] = max(dados.get('pico_memoria_bytes', 0), pico)
+        if self.memoria:
+            self.pico_memoria = max(self.pico_memoria, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        if self.perfil is not None:
+            antes = bool(self.pilha) and self.pilha[-1] == self.perfilar
+            depois = bool(nova_pilha) and nova_pilha[-1] == self.perfilar
+            if depois and not antes:
+                self.perfil.enable()
+            elif antes and not depois:
+                self.perfil.disable()
+
+        self.pilha = nova_pilha
+        self._marca_parede = time.perf_counter()
+        self._marca_cpu = time.process_time()
+
+    def entrar(self, nome):
+        self._dados(nome)['chamadas'] += 1
+        self._trocar(self.pilha + [nome])
+
+    def sair(self):
+        self._trocar(self.pilha[:-1])
+
+    @contextlib.contextmanager
+    def etapa(self, nome):
+        """Mede o bloco como a etapa `nome`."""
+        self.entrar(nome)
+        try:
+            yield
+        finally:
+            self.sair()
+
+    def medir_iterador(self, nome, iteravel):
+        """Mede cada `next()` de `iteravel` como a etapa `nome` e conta os itens."""
+        iterador = iter(iteravel)
+        dados = self._dados(nome)
+        while True:
+            self.entrar(nome)
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+            finally:
+                self.sair()
+            dados['itens'] += 1
+            yield item
+
+    def contar(self, nome, quantidade=1):
+        """Soma `quantidade` ao contador `nome` (ex.: linhas gravadas)."""
+        self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def como_dict(self):
+        """
+        Resumo serializável em JSON.
+
+        `segundos_fora_de_etapas` inclui o custo da própria medição (duas
+        leituras de relógio por troca de etapa).
+        """
+        parede = time.perf_counter() - self._parede_inicial
+        cpu = time.process_time() - self._cpu_inicial
+        medido = sum(d['segundos'] for d in self.etapas.values())
+        etapas = {
+            nome: {**dados, 'segundos': round(dados['segundos'], 6),
+                   'cpu_segundos': round(dados['cpu_segundos'], 6)}
+            for nome, dados in self.etapas.items()
+        }
+        resumo = {
+            'comando': self.comando,
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'segundos': round(parede, 6),
+            'cpu_segundos': round(cpu, 6),
+            'segundos_fora_de_etapas': round(max(parede - medido, 0.0), 6),
+            'etapas': etapas,
+            'contadores': dict(self.contadores),
+        }
+        if self.memoria:
+            resumo['pico_memoria_bytes'] = max(self.pico_memoria, tracemalloc.get_traced_memory()[1])
+        return resumo
+
+    def encerrar(self):
+        """Fecha etapas abertas e para o tracemalloc/cProfile."""
+        while self.pilha:
+            self.sair()
+        if self.perfil is not None:
+            self.perfil.disable()
+        resumo = self.como_dict()
+        if self.memoria:
+            tracemalloc.stop()
+        return resumo
+
+
+class _MetricasDesativadas:
+    """Mesma interface de Metricas, sem medir nada."""
+
+    ativa = False
+
+    def entrar(self, nome):
+        pass
+
+    def sair(self):
+        pass
+
+    def etapa(self, nome):
+        return contextlib.nullcontext()
+
+    def medir_iterador(self, nome, iteravel):
+        return iteravel
+
+    def contar(self, nome, quantidade=1):
+        pass
+
+
+DESATIVADAS = _MetricasDesativadas()
+_atuais = DESATIVADAS
+
+
+def atuais():
+    """Métricas ativas no processo (ou o objeto desativado)."""
+    return _atuais
+
+
+def ativar(metricas):
+    """Torna `metricas` as métricas atuais do processo."""
+    global _atuais
+    _atuais = metricas
+    return metricas
+
+
+def desativar():
+    global _atuais
+    _atuais = DESATIVADAS
+
+
+def adicionar_argumentos(parser):
+    """Acrescenta --metrics, --metricas-memoria e --perfilar ao argparse."""
+    grupo = parser.add_argument_group('métricas')
+    grupo.add_argument('--metrics', '--metricas', dest='metricas', metavar='ARQUIVO.json',
+                       help='Grava tempo/CPU/itens por etapa em JSON')
+    grupo.add_argument('--metricas-memoria', action='store_true',
+                       help='Inclui o pico de memória por etapa (tracemalloc; deixa a execução mais lenta)')
+    grupo.add_argument('--perfilar', metavar='ETAPA',
+                       help='Liga o cProfile só durante ETAPA e grava <ARQUIVO>.prof')
+    # Para iniciar() recusar --metricas-memoria/--perfilar sem --metrics pelo próprio parser
+    parser.set_defaults(_parser_metricas=parser)
+
+
+def iniciar(args, comando=None):
+    """
+    Ativa as métricas se `--metrics` foi informado. Retorna as métricas atuais.
+
+    --metricas-memoria e --perfilar só valem com --metrics (sem o JSON, nada
+    seria coletado nem gravado): sem ele, encerra com o erro do argparse.
+    """
+    if not getattr(args, 'metricas', None):
+        if getattr(args, 'metricas_memoria', False) or getattr(args, 'perfilar', None):
+            parser = getattr(args, '_parser_metricas', None)
+            mensagem = '--perfilar/--metricas-memoria exigem --metrics'
+            if parser is None:
+                raise ValueError(mensagem)
+            parser.error(mensagem)
+        return atuais()
+    comando = comando or ' '.join(sys.argv)
+    return ativar(Metricas(comando, memoria=args.metricas_memoria, perfilar=args.perfilar))
+
+
+def finalizar(args, **extras):
+    """Encerra as métricas ativas e grava o JSON (e o .prof). Retorna o resumo ou None."""
+    metricas = atuais()
+    if not metricas.ativa:
+        return None
+    desativar()
+    resumo = metricas.encerrar()
+    resumo.update(extras)
+    if metricas.perfil is not None:
+        caminho_perfil = args.metricas.rsplit('.', 1)[0] + '.prof'
+        metricas.perfil.dump_stats(caminho_perfil)
+        resumo['perfil'] = {'etapa': metricas.perfilar, 'arquivo': caminho_perfil}
+    with open(args.metricas, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+    print(f"📈 Métricas: {args.metricas}")
+    return resumo
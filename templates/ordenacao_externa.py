@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Ordenação externa para gravar clientes e vendas na ordem da chave primária.
+
+Inserir linhas fora de ordem em `tab_cliente` (chave `cliente`) e `vendas`
+(chave `chave_primaria`) espalha as escritas pela B-tree da chave. Cada
+inserção cai em uma página diferente, e com tabelas maiores que o cache do
+SQLite isso vira leitura e escrita aleatória em disco. Na ordem da chave, as
+páginas são preenchidas em sequência.
+
+As exportações combinadas das filiais não cabem na memória da VM de
+importação, então a ordenação é externa, com a memória limitada a
+`--memoria-mb`:
+
+1. os registros são acumulados até o limite, ordenados com o sort do Python
+   e gravados em um arquivo temporário (uma "execução" ordenada);
+2. no final, as execuções são intercaladas por um merge k-way com heap
+   (heapq.merge), lendo cada arquivo em blocos;
+3. no merge, registros com a mesma chave ficam juntos, na ordem de entrada,
+   e as duplicatas são resolvidas ali mesmo: nos clientes vence a última
+   ocorrência (como o upsert do carregar_sqlite.py); nas vendas, a primeira
+   (como o INSERT OR IGNORE).
+
+Se tudo couber no limite, nada vai para o disco. A memória é estimada pelo
+tamanho médio de uma amostra de registros de cada execução.
+
+Usado por `converter_clientes.py --ordenar`, `carregar_sqlite.py carregar
+--ordenar` e `transformar_vendas.py --banco --ordenar`. Pela linha de
+comando, mede a inserção em SQLite local com e sem ordenação:
+
+    python3 ordenacao_externa.py --linhas 1000000 --memoria-mb 64
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+import pickle
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import metricas
+
+MEMORIA_MB = 256
+# Registros por pickle nos arquivos temporários (a leitura do merge é por bloco)
+REGISTROS_POR_BLOCO = 4096
+REGISTROS_AMOSTRA = 1000
+TAMANHO_BUFFER = 1024 * 1024
+
+
+def tamanho_registro(registro):
+    """Bytes aproximados de um registro na memória (texto ou tupla de valores)."""
+    tamanho = sys.getsizeof(registro)
+    if isinstance(registro, (tuple, list)):
+        tamanho += sum(sys.getsizeof(valor) for valor in registro)
+    # Mais a posição na lista de pendentes
+    return tamanho + 8
+
+
+class OrdenacaoExterna:
+    """Acumula registros em execuções ordenadas em disco e devolve o merge em ordem."""
+
+    def __init__(self, chave, memoria_mb=MEMORIA_MB, pasta=None):
+        self.chave = chave
+        self.limite_bytes = memoria_mb * 1024 * 1024
+        self.pasta_base = pasta
+        self.pasta = None
+        self.execucoes = []
+        self.pendentes = []
+        self.limite_registros = None
+        self.registros = 0
+        self.bytes_gravados = 0
+        self.duplicados = 0
+
+    def acrescentar_todos(self, registros):
+        acrescentar = self.pendentes.append
+        for registro in registros:
+            acrescentar(registro)
+            if self.limite_registros is None:
+                if len(self.pendentes) == REGISTROS_AMOSTRA:
+                    self._estimar_limite()
+            elif len(self.pendentes) >= self.limite_registros:
+                self._gravar_execucao()
+                acrescentar = self.pendentes.append
+
+    def _estimar_limite(self):
+        media = sum(map(tamanho_registro, self.pendentes)) / len(self.pendentes)
+        self.limite_registros = max(int(self.limite_bytes / media), REGISTROS_AMOSTRA)
+
+    def _gravar_execucao(self):
+        with metricas.atuais().etapa('ordenacao'):
+            self.pendentes.sort(key=self.chave)
+            if self.pasta is None:
+                self.pasta = tempfile.mkdtemp(prefix='ordenacao_', dir=self.pasta_base)
+            caminho = os.path.join(self.pasta, f'{len(self.execucoes):05d}.run')
+            with open(caminho, 'wb', buffering=TAMANHO_BUFFER) as f:
+                for inicio in range(0, len(self.pendentes), REGISTROS_POR_BLOCO):
+                    pickle.dump(self.pendentes[inicio:inicio + REGISTROS_POR_BLOCO], f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+                self.bytes_gravados += f.tell()
+        self.registros += len(self.pendentes)
+        self.execucoes.append(caminho)
+        # Lista nova: a antiga é liberada de uma vez
+        self.pendentes = []
+        self.limite_registros = None
+
+    @staticmethod
+    def _ler_execucao(caminho, buffer):
+        with open(caminho, 'rb', buffering=buffer) as f:
+            while True:
+                try:
+                    bloco = pickle.load(f)
+                except EOFError:
+                    return
+                yield from bloco
+
+    def ordenados(self, manter=None):
+        """
+        Gera os registros na ordem da chave.
+
+        `manter` resolve chaves repetidas: 'primeiro' ou 'ultimo' (na ordem de
+        entrada); None mantém todas.
+        """
+        if not self.execucoes:
+            with metricas.atuais().etapa('ordenacao'):
+                self.pendentes.sort(key=self.chave)
+            self.registros += len(self.pendentes)
+            fluxo, self.pendentes = self.pendentes, []
+        else:
+            if self.pendentes:
+                self._gravar_execucao()
+            # Metade do limite vai para os buffers de leitura das execuções
+            buffer = max(self.limite_bytes // 2 // len(self.execucoes), 64 * 1024)
+            # Em chaves iguais, heapq.merge devolve primeiro a execução mais antiga
+            fluxo = metricas.atuais().medir_iterador('merge', heapq.merge(
+                *(self._ler_execucao(caminho, buffer) for caminho in self.execucoes), key=self.chave
+            ))
+        if manter is None:
+            yield from fluxo
+            return
+        for _, grupo in itertools.groupby(fluxo, self.chave):
+            escolhido = next(grupo)
+            for escolhido_depois in grupo:
+                self.duplicados += 1
+                if manter == 'ultimo':
+                    escolhido = escolhido_depois
+            yield escolhido
+
+    def resumo(self):
+        return {
+            'registros': self.registros,
+            'execucoes': len(self.execucoes),
+            'bytes_temporarios': self.bytes_gravados,
+            'duplicados': self.duplicados,
+        }
+
+    def fechar(self):
+        self.pendentes = []
+        if self.pasta is not None:
+            shutil.rmtree(self.pasta, ignore_errors=True)
+            self.pasta = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+def ordenar(registros, chave, memoria_mb=MEMORIA_MB, manter=None, pasta=None, estatisticas=None):
+    """
+    Gera `registros` ordenados por `chave`, com no máximo ~`memoria_mb` em memória.
+
+    Se `estatisticas` for um dicionário, recebe o resumo no final (ver
+    `OrdenacaoExterna.resumo`).
+    """
+    with OrdenacaoExterna(chave, memoria_mb, pasta) as ordenacao:
+        ordenacao.acrescentar_todos(registros)
+        yield from ordenacao.ordenados(manter)
+        if estatisticas is not None:
+            estatisticas.update(ordenacao.resumo())
+
+
+def chave_linha_txt(linha):
+    """Primeiro campo de uma linha já formatada do .txt ("cliente"<TAB>...), sem as aspas."""
+    # Aspas dentro dos valores já viraram apóstrofo: a próxima aspa fecha o campo
+    return linha[1:linha.index('"', 1)]
+
+
+def ordenar_linhas_txt(linhas, memoria_mb=MEMORIA_MB, pasta=None, estatisticas=None):
+    """
+    Ordena linhas formatadas do .txt de clientes por `cliente`, última ocorrência vencendo.
+
+    Linhas sem cliente não entram na importação e são descartadas
+    (contadas em `estatisticas['sem_chave']`).
+    """
+    contagem = {'sem_chave': 0}
+
+    def com_cliente():
+        for linha in linhas:
+            if linha.startswith('""'):
+                contagem['sem_chave'] += 1
+                continue
+            yield linha
+
+    yield from ordenar(com_cliente(), chave_linha_txt, memoria_mb, 'ultimo', pasta, estatisticas)
+    if estatisticas is not None:
+        estatisticas.update(contagem)
+
+
+def ordenar_clientes(linhas, memoria_mb=MEMORIA_MB, pasta=None, estatisticas=None):
+    """Tuplas de tab_cliente (cliente primeiro) por cliente, última ocorrência vencendo; sem cliente, descartadas."""
+    contagem = {'sem_chave': 0}
+
+    def com_cliente():
+        for linha in linhas:
+            if linha[0] is None:
+                contagem['sem_chave'] += 1
+                continue
+            yield linha
+
+    yield from ordenar(com_cliente(), primeiro_campo, memoria_mb, 'ultimo', pasta, estatisticas)
+    if estatisticas is not None:
+        estatisticas.update(contagem)
+
+
+def ordenar_vendas(registros, memoria_mb=MEMORIA_MB, pasta=None, estatisticas=None):
+    """Tuplas do INSERT de vendas (chave_primaria primeiro) por chave, primeira ocorrência vencendo."""
+    return ordenar(registros, primeiro_campo, memoria_mb, 'primeiro', pasta, estatisticas)
+
+
+def primeiro_campo(registro):
+    """Chave das tuplas de tab_cliente e de vendas (cliente / chave_primaria vêm primeiro)."""
+    return registro[0]
+
+
+def descrever(estatisticas):
+    """Linha de resumo para os CLIs."""
+    if estatisticas.get('execucoes'):
+        local = (f"em disco, {estatisticas['execucoes']} execuções "
+                 f"({estatisticas['bytes_temporarios'] / 1024 / 1024:,.1f} MB temporários)")
+    else:
+        local = "em memória"
+    texto = f"🔃 Ordenado {local}; duplicados resolvidos: {estatisticas.get('duplicados', 0)}"
+    if estatisticas.get('sem_chave'):
+        texto += f"; sem chave (descartados): {estatisticas['sem_chave']}"
+    return texto
+
+
+# ---------------------------------------------------------------------------
+# Comparação: inserção em SQLite com e sem ordenação
+# ---------------------------------------------------------------------------
+
+def _clientes_sinteticos(quantidade, semente=11):
+    """Clientes em ordem aleatória de código, ~2% repetidos."""
+    aleatorio = random.Random(semente)
+    codigos = list(range(quantidade))
+    aleatorio.shuffle(codigos)
+    for n in codigos:
+        if aleatorio.random() < 0.02:
+            n = aleatorio.randrange(quantidade)
+        yield (f'{n:08d}', f'CLIENTE {n} LTDA', f'Fantasia {n}', str(100000000 + n),
+               f'{n % 100:02d}.345.678/0001-{n % 90 + 10}', f'GRP{n % 20:02d}', 'AVENIDA BRASIL',
+               f'{n % 99999:05d}-000', 'Centro', 'Chapecó', 'Distribuição', f'R{n % 30:02d}', 'ATIVO',
+               f'SR{n % 60:02d}', str(n % 2000))
+
+
+def _vendas_sinteticas(quantidade, colunas, semente=13):
+    """Registros do INSERT de vendas com notas em ordem aleatória, ~1,5% repetidos (itens que repetem o primeiro)."""
+    aleatorio = random.Random(semente)
+    notas = list(range(quantidade // 4 + 1))
+    aleatorio.shuffle(notas)
+    extras = len(colunas) - 1
+    for nota in notas:
+        for item in range(4):
+            if aleatorio.random() < 0.02:
+                item = 0  # repete a chave do primeiro item da nota
+            produto = (nota * 7 + item * 131) % 9000
+            yield (f'{nota:08d}PROD{produto:04d}',) + tuple(
+                round(aleatorio.uniform(1, 500), 2) if i % 3 == 0 else f'V{(nota + i) % 997}'
+                for i in range(extras)
+            )
+
+
+def _medir(criar, inserir, linhas, pasta, nome):
+    banco = os.path.join(pasta, nome + '.db')
+    conn = sqlite3.connect(banco)
+    try:
+        criar(conn)
+        comeco = time.perf_counter()
+        inseridos = inserir(conn, linhas)
+        return time.perf_counter() - comeco, inseridos, os.path.getsize(banco)
+    finally:
+        conn.close()
+
+
+def comparar_insercao(quantidade, memoria_mb=MEMORIA_MB, pasta=None):
+    """
+    Para clientes e vendas sintéticos em ordem aleatória, mede a carga em um
+    banco novo sem ordenar e ordenando antes (ordenação + carga).
+    """
+    from carregar_sqlite import carregar, criar_tabela_clientes
+    from transformar_vendas import COLUNAS_INSERT, inserir_registros
+
+    def criar_vendas(conn):
+        conn.execute(f"CREATE TABLE vendas ({COLUNAS_INSERT[0]} TEXT PRIMARY KEY, "
+                     f"{', '.join(COLUNAS_INSERT[1:])})")
+
+    def carregar_clientes(conn, linhas):
+        return carregar(conn, linhas)['linhas']
+
+    # Clientes: última ocorrência vence (upsert); vendas: primeira (INSERT OR IGNORE)
+    cenarios = [
+        ('tab_cliente', criar_tabela_clientes, carregar_clientes, lambda: _clientes_sinteticos(quantidade), 'ultimo'),
+        ('vendas', criar_vendas, inserir_registros, lambda: _vendas_sinteticas(quantidade, COLUNAS_INSERT),
+         'primeiro'),
+    ]
+    resultados = []
+    with tempfile.TemporaryDirectory(dir=pasta) as temporaria:
+        for tabela, criar, inserir, gerar, manter in cenarios:
+            sem_ordem, _, tamanho = _medir(criar, inserir, gerar(), temporaria, tabela + '_sem_ordem')
+            # Execuções e carga medidas separadamente: a carga consome o merge em streaming
+            comeco = time.perf_counter()
+            with OrdenacaoExterna(primeiro_campo, memoria_mb, temporaria) as ordenacao:
+                ordenacao.acrescentar_todos(gerar())
+                tempo_execucoes = time.perf_counter() - comeco
+                com_ordem, _, tamanho_ordenado = _medir(criar, inserir, ordenacao.ordenados(manter),
+                                                        temporaria, tabela + '_ordenado')
+                estatisticas = ordenacao.resumo()
+            resultados.append({
+                'tabela': tabela,
+                'sem_ordem': sem_ordem,
+                'execucoes_ordenadas': tempo_execucoes,
+                'com_ordem': com_ordem,
+                'bytes_sem_ordem': tamanho,
+                'bytes_com_ordem': tamanho_ordenado,
+                **estatisticas,
+            })
+    return resultados
+
+
+def main(argv=None):
+    """Função principal: compara a inserção em SQLite com e sem ordenação."""
+    parser = argparse.ArgumentParser(
+        description='Mede a carga de tab_cliente e vendas em SQLite local com e sem ordenação externa.'
+    )
+    parser.add_argument('--linhas', type=int, default=1000000, help='Registros por tabela (padrão: 1000000)')
+    parser.add_argument('--memoria-mb', type=int, default=MEMORIA_MB,
+                        help=f'Memória para a ordenação (padrão: {MEMORIA_MB})')
+    parser.add_argument('--pasta-temporaria', help='Pasta dos bancos e execuções temporárias')
+    args = parser.parse_args(argv)
+
+    print(f"🧪 {args.linhas} registros por tabela, ordenação com {args.memoria_mb} MB")
+    for r in comparar_insercao(args.linhas, args.memoria_mb, args.pasta_temporaria):
+        ordenado = r['execucoes_ordenadas'] + r['com_ordem']
+        print(f"\n📊 {r['tabela']}")
+        print(f"   Sem ordem:  {r['sem_ordem']:7.2f}s ({args.linhas / r['sem_ordem']:,.0f} linhas/s), "
+              f"banco {r['bytes_sem_ordem'] / 1024 / 1024:,.0f} MB")
+        print(f"   Ordenado:   {ordenado:7.2f}s = {r['execucoes_ordenadas']:.2f}s lendo e gravando execuções + "
+              f"{r['com_ordem']:.2f}s de merge e carga, banco {r['bytes_com_ordem'] / 1024 / 1024:,.0f} MB")
+        print(f"   {descrever(r)}")
+        print(f"   Ganho: {r['sem_ordem'] / ordenado:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Montagem do .xlsm em uma passada, sem extrair a planilha para o disco.
+
+Um .xlsm é um .xlsx (ZIP) com três diferenças: o tipo de conteúdo do
+workbook é "macroEnabled", existe a parte xl/vbaProject.bin e uma relação do
+workbook aponta para ela. Aqui o ZIP de origem é lido e o de destino é escrito
+ao mesmo tempo:
+
+- [Content_Types].xml e xl/_rels/workbook.xml.rels são ajustados em memória;
+- todos os outros membros (abas, estilos, textos) são copiados com os bytes
+  já comprimidos, sem descompactar nem recomprimir;
+- o vbaProject.bin pronto é acrescentado no final.
+
+Com `data_hora`, todos os membros saem com o mesmo horário fixo (e as datas
+de docProps/core.xml também), então o mesmo conteúdo gera sempre os mesmos
+bytes — ver `normalizar_pacote`.
+
+O vbaProject.bin não pode ser compilado fora do Excel: ele é lido de um
+arquivo .bin ou de um .xlsm que já tenha a macro (salvo uma vez pelo Excel).
+
+Uso:
+    python3 pacote_xlsm.py template_importacao_clientes.xlsx template_importacao_clientes.xlsm
+    python3 pacote_xlsm.py clientes_preenchido.xlsx clientes_preenchido.xlsm --vba vbaProject.bin
+    python3 pacote_xlsm.py entrada.xlsx saida.xlsm --vba template_com_macro.xlsm
+"""
+
+import argparse
+import os
+import re
+import struct
+import sys
+import zipfile
+from xml.etree import ElementTree as ET
+
+import metricas
+
+CONTENT_TYPES = '[Content_Types].xml'
+RELACOES_WORKBOOK = 'xl/_rels/workbook.xml.rels'
+PARTE_VBA = 'xl/vbaProject.bin'
+
+NS_CONTENT_TYPES = 'http://schemas.openxmlformats.org/package/2006/content-types'
+NS_RELACOES = 'http://schemas.openxmlformats.org/package/2006/relationships'
+TIPO_WORKBOOK_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml'
+TIPO_WORKBOOK_XLSM = 'application/vnd.ms-excel.sheet.macroEnabled.main+xml'
+TIPO_VBA = 'application/vnd.ms-office.vbaProject'
+RELACAO_VBA = 'http://schemas.microsoft.com/office/2006/relationships/vbaProject'
+PROPRIEDADES = 'docProps/core.xml'
+
+# Menor data aceita pelo formato ZIP; usada nos pacotes reprodutíveis
+DATA_REPRODUTIVEL = (1980, 1, 1, 0, 0, 0)
+_RE_DATAS_CORE = re.compile(rb'(<dcterms:(?:created|modified)\b[^>]*>)[^<]*(</dcterms:)')
+
+_CABECALHO_LOCAL = struct.Struct('<4s5H3L2H')
+
+
+def _serializar(raiz, namespace):
+    ET.register_namespace('', namespace)
+    return ET.tostring(raiz, encoding='UTF-8', xml_declaration=True)
+
+
+def atualizar_content_types(dados, com_vba=True):
+    """Marca o workbook como macroEnabled e registra o vbaProject.bin."""
+    raiz = ET.fromstring(dados)
+    override = f'{{{NS_CONTENT_TYPES}}}Override'
+    tem_vba = False
+    for item in raiz.iter(override):
+        if item.get('ContentType') == TIPO_WORKBOOK_XLSX:
+            item.set('ContentType', TIPO_WORKBOOK_XLSM)
+        if item.get('PartName') == '/' + PARTE_VBA:
+            tem_vba = True
+
+    if com_vba and not tem_vba:
+        ET.SubElement(raiz, override, PartName='/' + PARTE_VBA, ContentType=TIPO_VBA)
+    return _serializar(raiz, NS_CONTENT_TYPES)
+
+
+def atualizar_relacoes_workbook(dados):
+    """Acrescenta a relação workbook → vbaProject.bin com o próximo rId livre."""
+    raiz = ET.fromstring(dados)
+    relacao = f'{{{NS_RELACOES}}}Relationship'
+    maior = 0
+    for item in raiz.iter(relacao):
+        if item.get('Type') == RELACAO_VBA:
+            return dados
+        identificador = item.get('Id', '')
+        if identificador.startswith('rId') and identificador[3:].isdigit():
+            maior = max(maior, int(identificador[3:]))
+
+    ET.SubElement(raiz, relacao, Id=f'rId{maior + 1}', Type=RELACAO_VBA, Target='vbaProject.bin')
+    return _serializar(raiz, NS_RELACOES)
+
+
+def ajustar_parte(nome, dados, com_vba=True):
+    """Aplica o ajuste de .xlsx → .xlsm à parte `nome` (as demais voltam iguais)."""
+    if nome == CONTENT_TYPES:
+        return atualizar_content_types(dados, com_vba)
+    if nome == RELACOES_WORKBOOK and com_vba:
+        return atualizar_relacoes_workbook(dados)
+    return dados
+
+
+def partes_ajustadas(com_vba=True):
+    """Nomes das partes que `ajustar_parte` altera."""
+    return {CONTENT_TYPES, RELACOES_WORKBOOK} if com_vba else {CONTENT_TYPES}
+
+
+def fixar_datas_propriedades(dados, data_hora=DATA_REPRODUTIVEL):
+    """Troca as datas de criação/modificação de docProps/core.xml por `data_hora`."""
+    texto = '%04d-%02d-%02dT%02d:%02d:%02dZ' % data_hora
+    return _RE_DATAS_CORE.sub(rb'\g<1>' + texto.encode('ascii') + rb'\g<2>', dados)
+
+
+def ler_vba_project(caminho):
+    """Lê o vbaProject.bin de um arquivo .bin ou de um .xlsm que já tenha a macro."""
+    if zipfile.is_zipfile(caminho):
+        with zipfile.ZipFile(caminho) as zf:
+            if PARTE_VBA not in zf.namelist():
+                raise ValueError(f"{caminho} não contém {PARTE_VBA}")
+            return zf.read(PARTE_VBA)
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+
+def copiar_membro_bruto(origem, saida, info, data_hora=None):
+    """
+    Copia um membro de `origem` para `saida` sem descompactar/recomprimir.
+
+    Lê os bytes comprimidos logo após o cabeçalho local e grava um cabeçalho
+    novo com o mesmo CRC e tamanhos. O zipfile não expõe essa cópia, então
+    `saida.fp`/`filelist` são usados como em ZipFile.writestr.
+    """
+    origem.fp.seek(info.header_offset)
+    cabecalho = _CABECALHO_LOCAL.unpack(origem.fp.read(_CABECALHO_LOCAL.size))
+    tamanho_nome, tamanho_extra = cabecalho[-2:]
+    origem.fp.seek(tamanho_nome + tamanho_extra, os.SEEK_CUR)
+
+    novo = zipfile.ZipInfo(info.filename, data_hora or info.date_time)
+    novo.compress_type = info.compress_type
+    novo.CRC = info.CRC
+    novo.compress_size = info.compress_size
+    novo.file_size = info.file_size
+    novo.external_attr = info.external_attr
+    novo.create_system = info.create_system
+    novo.flag_bits = info.flag_bits & 0x800  # mantém só o bit UTF-8 (sem data descriptor)
+    novo.header_offset = saida.fp.tell()
+
+    saida.fp.write(novo.FileHeader())
+    restante = info.compress_size
+    while restante:
+        bloco = origem.fp.read(min(restante, 1024 * 1024))
+        if not bloco:
+            raise zipfile.BadZipFile(f"Membro truncado: {info.filename}")
+        saida.fp.write(bloco)
+        restante -= len(bloco)
+
+    saida.filelist.append(novo)
+    saida.NameToInfo[novo.filename] = novo
+    saida.start_dir = saida.fp.tell()
+
+
+def reescrever_pacote(origem, destino, ajustes=None, extras=(), data_hora=None):
+    """
+    Copia o ZIP `origem` para `destino` em uma passada, na mesma ordem.
+
+    `ajustes` é {membro: função(bytes) → bytes ou None}; None remove o membro.
+    Os demais são copiados sem recompressão. `extras` são pares (nome, bytes)
+    acrescentados no final. Retorna (membros copiados, membros ajustados).
+    """
+    ajustes = ajustes or {}
+    copiados = ajustados = 0
+    medicao = metricas.atuais()
+
+    with medicao.etapa('escrita'), zipfile.ZipFile(origem) as entrada, \
+            zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as saida:
+        for info in entrada.infolist():
+            ajuste = ajustes.get(info.filename)
+            if ajuste is None:
+                copiar_membro_bruto(entrada, saida, info, data_hora)
+                copiados += 1
+                continue
+            with medicao.etapa('descompactar'):
+                dados = entrada.read(info)
+            with medicao.etapa('xml'):
+                dados = ajuste(dados)
+            if dados is not None:
+                parte = zipfile.ZipInfo(info.filename, data_hora or info.date_time)
+                parte.compress_type = zipfile.ZIP_DEFLATED
+                saida.writestr(parte, dados)
+            ajustados += 1
+        for nome, dados in extras:
+            parte = zipfile.ZipInfo(nome, data_hora or DATA_REPRODUTIVEL)
+            parte.compress_type = zipfile.ZIP_DEFLATED
+            saida.writestr(parte, dados)
+    return copiados, ajustados
+
+
+def normalizar_pacote(origem, destino, data_hora=DATA_REPRODUTIVEL):
+    """
+    Reescreve `origem` de forma reprodutível: horário fixo em todos os membros
+    e nas datas de docProps/core.xml (o openpyxl grava o horário do save).
+    """
+    ajustes = {PROPRIEDADES: lambda dados: fixar_datas_propriedades(dados, data_hora)}
+    return reescrever_pacote(origem, destino, ajustes, data_hora=data_hora)
+
+
+def gerar_xlsm(origem, destino, vba_project=None, data_hora=None):
+    """
+    Gera `destino` (.xlsm) a partir de `origem` (.xlsx/.xlsm) em uma passada.
+
+    `vba_project` são os bytes do vbaProject.bin; sem ele o arquivo sai como
+    .xlsm válido, porém sem macro. Com `data_hora`, a saída é reprodutível.
+    Retorna (membros copiados, membros ajustados).
+    """
+    com_vba = vba_project is not None
+    ajustes = {nome: (lambda dados, nome=nome: ajustar_parte(nome, dados, com_vba))
+               for nome in partes_ajustadas(com_vba)}
+    extras = []
+    if com_vba:
+        ajustes[PARTE_VBA] = lambda dados: None
+        extras.append((PARTE_VBA, vba_project))
+    if data_hora:
+        ajustes[PROPRIEDADES] = lambda dados: fixar_datas_propriedades(dados, data_hora)
+    return reescrever_pacote(origem, destino, ajustes, extras, data_hora)
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Gera um .xlsm a partir de um .xlsx sem extrair o ZIP.')
+    parser.add_argument('origem', help='Planilha de origem (.xlsx/.xlsm)')
+    parser.add_argument('destino', help='Arquivo .xlsm gerado')
+    parser.add_argument('--vba', help='vbaProject.bin (ou .xlsm com a macro) a incorporar')
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.origem) == os.path.abspath(args.destino):
+        print("❌ Erro: origem e destino devem ser arquivos diferentes")
+        return 1
+
+    try:
+        vba = ler_vba_project(args.vba) if args.vba else None
+        copiados, ajustados = gerar_xlsm(args.origem, args.destino, vba)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+
+    print(f"✅ {args.destino}: {copiados} partes copiadas sem recompressão, {ajustados} ajustadas")
+    if vba is None:
+        print("⚠️  Sem --vba: o arquivo não contém a macro")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+lkp_produtos_parados calculada em uma passada sobre as vendas.
+
+A view `vw_produtos_parados` (sql/views/create_view_produtos_parados.sql) faz
+duas varreduras completas de `vendas` e um ROW_NUMBER() por representante ×
+produto; por isso ela é materializada uma vez por semana em
+lkp_produtos_parados. Aqui a mesma tabela sai de uma única leitura das
+vendas (planilhas de vendas ou a tabela `vendas` de um banco local), com um
+acumulador por (representante, produto) guardando:
+
+- a última emissão e o cliente/família dessa venda (o ROW_NUMBER com rn = 1);
+- a quantidade de vendas e a soma de valor_bruto (o AVG);
+- a maior emissão geral (a data de referência da view).
+
+`qtd_semanas_parado` e `nivel_risco` seguem as expressões da view. Para que o
+resultado seja o mesmo da view no SQLite:
+
+- as datas são comparadas como texto e convertidas com o julianday() do
+  próprio SQLite (cacheado por data distinta, são poucas);
+- a média soma os valores como o AVG do SQLite (soma compensada a partir da
+  versão 3.43) e o arredondamento usa o round() do SQLite;
+- valor_bruto integral vira inteiro, como na coluna numeric da tabela;
+- em empates de emissão na última venda fica a primeira venda lida.
+
+Representantes, produtos e nomes de clientes (tab_representante, tab_produto,
+tab_cliente) vêm de um banco local (--banco); os nomes também podem vir do
+.txt de clientes (--clientes). As planilhas informadas devem formar o
+histórico completo de vendas; vendas repetidas (mesma chave_primaria) contam
+uma vez, como no INSERT OR IGNORE do importador.
+
+`--conferir` carrega as mesmas vendas em um SQLite em memória, cria a view e
+compara linha a linha.
+
+Uso:
+    python3 produtos_parados.py banco_local.db
+    python3 produtos_parados.py vendas_2024.xlsx vendas_2025.xlsx --banco banco_local.db
+    python3 produtos_parados.py banco_local.db --conferir --aplicar
+"""
+
+import argparse
+import functools
+import math
+import os
+import sqlite3
+import sys
+import time
+
+from lookups_clientes import gravar_sql
+import metricas
+
+TABELA = 'lkp_produtos_parados'
+COLUNAS = [
+    'rep_supervisor', 'desc_representante', 'cod_representante', 'sku_produto', 'desc_produto',
+    'categoria_produto', 'ultima_venda', 'ultimo_cliente_cod', 'ultimo_cliente_nome',
+    'qtd_semanas_parado', 'valor_medio_perdido', 'qtd_vendas_anteriores', 'nivel_risco',
+]
+# Mesma definição de sql/maintenance/04-create-lookup-tables.sql
+DDL_TABELA = f"""CREATE TABLE IF NOT EXISTS {TABELA} (
+    rep_supervisor TEXT, desc_representante TEXT, cod_representante TEXT, sku_produto TEXT,
+    desc_produto TEXT, categoria_produto TEXT, ultima_venda TEXT, ultimo_cliente_cod TEXT,
+    ultimo_cliente_nome TEXT, qtd_semanas_parado INTEGER, valor_medio_perdido REAL,
+    qtd_vendas_anteriores INTEGER, nivel_risco TEXT
+)"""
+ARQUIVO_VIEW = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'sql', 'views', 'create_view_produtos_parados.sql')
+ARQUIVO_SQL = 'lkp_produtos_parados.sql'
+TABELAS_DIMENSOES = ('tab_representante', 'tab_produto', 'tab_cliente')
+
+# (semanas mínimas, nível), do CASE da view; abaixo de 2 semanas é MÍNIMO
+NIVEIS_RISCO = [(6, 'EXTREMO'), (5, 'MUITO ALTO'), (4, 'ALTO'), (3, 'MODERADO'), (2, 'BAIXO')]
+NIVEL_MINIMO = 'MÍNIMO'
+
+# Reais integrais nesse intervalo viram INTEGER em colunas numeric (sqlite3RealSameAsInt)
+LIMITE_INTEIRO_REAL = 2 ** 51
+# O AVG do SQLite usa soma compensada (Kahan-Babuska-Neumaier) desde a 3.43
+SOMA_COMPENSADA = sqlite3.sqlite_version_info >= (3, 43, 0)
+
+
+# ---------------------------------------------------------------------------
+# Funções do SQLite
+# ---------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=1)
+def _sqlite_memoria():
+    return sqlite3.connect(':memory:')
+
+
+@functools.lru_cache(maxsize=None)
+def julianday(texto):
+    """julianday() do SQLite (None se o texto não for uma data)."""
+    return _sqlite_memoria().execute('SELECT julianday(?)', (texto,)).fetchone()[0]
+
+
+def arredondar(valor, casas=2):
+    """round() do SQLite."""
+    if valor is None:
+        return None
+    return _sqlite_memoria().execute('SELECT round(?, ?)', (valor, casas)).fetchone()[0]
+
+
+def nivel_risco(semanas):
+    for minimo, nivel in NIVEIS_RISCO:
+        if semanas >= minimo:
+            return nivel
+    return NIVEL_MINIMO
+
+
+def valor_numeric(valor):
+    """Valor como fica em uma coluna numeric: None para NaN, int para reais integrais."""
+    if valor is None or isinstance(valor, int):
+        return valor
+    if math.isnan(valor):
+        return None
+    if valor.is_integer() and -LIMITE_INTEIRO_REAL <= valor < LIMITE_INTEIRO_REAL:
+        return int(valor)
+    return valor
+
+
+# ---------------------------------------------------------------------------
+# Motor
+# ---------------------------------------------------------------------------
+
+class _Acumulado:
+    """Estado de um (representante, produto): última venda + soma do AVG."""
+
+    __slots__ = ('ultima', 'cliente', 'familia', 'vendas', 'valores',
+                 'soma_inteira', 'aproximada', 'soma', 'erro')
+
+    def __init__(self):
+        self.ultima = None
+        self.cliente = None
+        self.familia = None
+        self.vendas = 0
+        self.valores = 0
+        self.soma_inteira = 0
+        self.aproximada = False
+        self.soma = 0.0
+        self.erro = 0.0
+
+    def _passo(self, valor):
+        # kahanBabuskaNeumaierStep do func.c
+        s = self.soma
+        t = s + valor
+        if abs(s) > abs(valor):
+            self.erro += (s - t) + valor
+        else:
+            self.erro += (valor - t) + s
+        self.soma = t
+
+    def somar(self, valor):
+        """Acrescenta um valor não nulo à soma, como o sumStep do SQLite."""
+        self.valores += 1
+        if not SOMA_COMPENSADA:
+            self.soma += valor
+            return
+        if isinstance(valor, int):
+            if not self.aproximada:
+                self.soma_inteira += valor
+                return
+            self._passo(float(valor))
+            return
+        if not self.aproximada:
+            self.aproximada = True
+            self.soma = float(self.soma_inteira)
+        self._passo(valor)
+
+    def media(self):
+        if not self.valores:
+            return None
+        if not SOMA_COMPENSADA:
+            return self.soma / self.valores
+        total = self.soma + self.erro if self.aproximada else float(self.soma_inteira)
+        return total / self.valores
+
+
+class MotorProdutosParados:
+    """Acumula as vendas e gera as linhas de lkp_produtos_parados."""
+
+    def __init__(self):
+        self.acumulados = {}
+        self.data_maxima = None
+        self.linhas = 0
+
+    def acrescentar(self, emissao, representante, produto, cliente, familia, valor_bruto):
+        """Registra uma venda (valores como estão na tabela vendas)."""
+        self.linhas += 1
+        # emissao != '' também descarta NULL
+        if emissao is None or emissao == '':
+            return
+        if self.data_maxima is None or emissao > self.data_maxima:
+            self.data_maxima = emissao
+        if representante is None or representante == '':
+            return
+
+        chave = (representante, produto)
+        acumulado = self.acumulados.get(chave)
+        if acumulado is None:
+            acumulado = self.acumulados[chave] = _Acumulado()
+        acumulado.vendas += 1
+        if valor_bruto is not None:
+            acumulado.somar(valor_bruto)
+        # ORDER BY emissao DESC: em empate, fica a primeira venda lida
+        if acumulado.ultima is None or emissao > acumulado.ultima:
+            acumulado.ultima = emissao
+            acumulado.cliente = cliente
+            acumulado.familia = familia
+
+    def resultado(self, representantes, produtos, clientes):
+        """
+        Linhas de lkp_produtos_parados (na ordem de COLUNAS).
+
+        `representantes` é {representante: (desc_representante, rep_supervisor)},
+        `produtos` é {produto: (desc_produto, desc_familia)} e `clientes` é
+        {cliente: nome}. Ordem da view (semanas e valor decrescentes), com
+        representante e produto desempatando.
+        """
+        referencia = julianday(self.data_maxima) if self.data_maxima is not None else None
+        if referencia is None:
+            return []
+        linhas = []
+        for (representante, produto), acumulado in self.acumulados.items():
+            # INNER JOIN tab_representante e JOIN por produto (NULL não casa)
+            if produto is None or representante not in representantes:
+                continue
+            ultima = julianday(acumulado.ultima)
+            if ultima is None:
+                continue
+            semanas = int((referencia - ultima) / 7)
+            if semanas < 1:
+                continue
+            desc_representante, rep_supervisor = representantes[representante]
+            desc_produto, desc_familia = produtos.get(produto, (None, None))
+            linhas.append((
+                rep_supervisor, desc_representante, representante, produto, desc_produto,
+                desc_familia if desc_familia is not None else acumulado.familia,
+                acumulado.ultima, acumulado.cliente, clientes.get(acumulado.cliente),
+                semanas, arredondar(acumulado.media()), acumulado.vendas, nivel_risco(semanas),
+            ))
+        linhas.sort(key=lambda l: (-l[9], l[10] is None, -(l[10] or 0), l[2], l[3]))
+        return linhas
+
+
+# ---------------------------------------------------------------------------
+# Origens
+# ---------------------------------------------------------------------------
+
+def eh_banco(caminho):
+    return caminho.lower().endswith(('.db', '.sqlite', '.sqlite3'))
+
+
+def _consultar(conn, sql, tabela, vazias):
+    """Linhas da consulta; se a tabela não existir ou estiver vazia, anota em `vazias`."""
+    try:
+        linhas = conn.execute(sql).fetchall()
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+        vazias.append(f"{tabela} (não existe)")
+        return []
+    if not linhas:
+        vazias.append(f"{tabela} (vazia)")
+    return linhas
+
+
+def ler_dimensoes(banco, vazias=None):
+    """
+    (representantes, produtos, clientes) de tab_representante, tab_produto e tab_cliente.
+
+    Se `vazias` for uma lista, recebe as tabelas que não existem ou estão vazias.
+    """
+    representantes, produtos, clientes = {}, {}, {}
+    vazias = [] if vazias is None else vazias
+    if not banco:
+        vazias.extend(f"{tabela} (sem --banco)" for tabela in TABELAS_DIMENSOES)
+        return representantes, produtos, clientes
+    conn = sqlite3.connect(banco)
+    try:
+        for representante, desc, supervisor in _consultar(
+                conn, "SELECT representante, desc_representante, rep_supervisor FROM tab_representante",
+                'tab_representante', vazias):
+            representantes.setdefault(representante, (desc, supervisor))
+        for produto, desc, familia in _consultar(
+                conn, "SELECT produto, desc_produto, desc_familia FROM tab_produto", 'tab_produto', vazias):
+            produtos.setdefault(produto, (desc, familia))
+        for cliente, nome in _consultar(conn, "SELECT cliente, nome FROM tab_cliente", 'tab_cliente', vazias):
+            clientes.setdefault(cliente, nome)
+    finally:
+        conn.close()
+    return representantes, produtos, clientes
+
+
+def ler_nomes_clientes(caminho):
+    """{cliente: nome} do .txt convertido ou da planilha (a última ocorrência vence)."""
+    from carregar_sqlite import ler_origem
+    from mapeamentos import COLUNAS_CLIENTES
+
+    i_cliente = COLUNAS_CLIENTES.index('cliente')
+    i_nome = COLUNAS_CLIENTES.index('nome')
+    return {valores[i_cliente]: valores[i_nome] for valores in ler_origem(caminho)
+            if valores[i_cliente] is not None}
+
+
+COLUNAS_MOTOR = ['emissao', 'representante', 'produto', 'cliente', 'familia', 'valor_bruto']
+
+
+def ler_vendas(origens):
+    """
+    Gera (emissao, representante, produto, cliente, familia, valor_bruto) de
+    bancos (tabela vendas, na ordem de inserção) e planilhas de vendas
+    (transformadas como no importador, sem repetir chave_primaria).
+    """
+    vistas = set()
+    for origem in origens:
+        if eh_banco(origem):
+            conn = sqlite3.connect(origem)
+            try:
+                yield from conn.execute(f"SELECT {', '.join(COLUNAS_MOTOR)} FROM vendas")
+            finally:
+                conn.close()
+            continue
+
+        from transformar_vendas import ler_lotes_vendas, transformar_lote
+        for numeros, colunas in ler_lotes_vendas(origem):
+            lote = transformar_lote(numeros, colunas)['colunas']
+            chaves = lote['chave_primaria']
+            valores = lote['valor_bruto'].tolist()
+            colunas_texto = [lote[c] for c in COLUNAS_MOTOR[:-1]]
+            for i, chave in enumerate(chaves):
+                if chave in vistas:
+                    continue
+                vistas.add(chave)
+                yield (*(coluna[i] for coluna in colunas_texto), valor_numeric(valores[i]))
+
+
+# ---------------------------------------------------------------------------
+# Conferência com a view
+# ---------------------------------------------------------------------------
+
+def sql_view(caminho=ARQUIVO_VIEW):
+    """O CREATE VIEW de create_view_produtos_parados.sql (sem os SELECTs de teste)."""
+    with open(caminho, encoding='utf-8') as f:
+        texto = f.read()
+    inicio = texto.index('CREATE VIEW')
+    return texto[inicio:texto.index(';', inicio) + 1]
+
+
+def banco_referencia(origens, representantes, produtos, clientes):
+    """SQLite em memória com as vendas, as dimensões e a view."""
+    from carregar_sqlite import colunas_tabela
+
+    conn = sqlite3.connect(':memory:')
+    definicoes = [f"{coluna} {tipo}{' PRIMARY KEY' if coluna == 'chave_primaria' else ''}"
+                  for coluna, tipo in colunas_tabela('vendas')]
+    conn.execute(f"CREATE TABLE vendas ({', '.join(definicoes)})")
+    conn.execute("CREATE TABLE tab_representante (representante TEXT, desc_representante TEXT, rep_supervisor TEXT)")
+    conn.execute("CREATE TABLE tab_produto (produto TEXT, desc_produto TEXT, desc_familia TEXT)")
+    conn.execute("CREATE TABLE tab_cliente (cliente TEXT PRIMARY KEY, nome TEXT)")
+    conn.executemany("INSERT INTO tab_representante VALUES (?, ?, ?)",
+                     ((r, *valores) for r, valores in representantes.items()))
+    conn.executemany("INSERT INTO tab_produto VALUES (?, ?, ?)", ((p, *v) for p, v in produtos.items()))
+    conn.executemany("INSERT INTO tab_cliente VALUES (?, ?)", clientes.items())
+
+    for origem in origens:
+        if eh_banco(origem):
+            conn.execute("ATTACH DATABASE ? AS origem", (origem,))
+            with conn:
+                conn.execute(f"INSERT OR IGNORE INTO vendas ({', '.join(COLUNAS_MOTOR)}) "
+                             f"SELECT {', '.join(COLUNAS_MOTOR)} FROM origem.vendas ORDER BY rowid")
+            conn.execute("DETACH DATABASE origem")
+        else:
+            from transformar_vendas import inserir_sqlite, ler_lotes_vendas, transformar_lote
+            for numeros, colunas in ler_lotes_vendas(origem):
+                inserir_sqlite(conn, transformar_lote(numeros, colunas))
+    conn.execute(sql_view())
+    return conn
+
+
+def conferir(conn, linhas):
+    """
+    Compara `linhas` com a view. Retorna (iguais, empates, divergências).
+
+    Empate: só o último cliente difere e os dois compraram o produto na mesma
+    última data (o ROW_NUMBER da view não define qual fica).
+    """
+    esperadas = {(l[2], l[3]): l for l in conn.execute("SELECT * FROM vw_produtos_parados")}
+    obtidas = {(l[2], l[3]): l for l in linhas}
+    iguais, empates, divergencias = 0, 0, []
+    for chave in sorted(esperadas.keys() | obtidas.keys(), key=str):
+        esperada, obtida = esperadas.get(chave), obtidas.get(chave)
+        if esperada == obtida:
+            iguais += 1
+            continue
+        if esperada is not None and obtida is not None and esperada[:7] + esperada[9:] == obtida[:7] + obtida[9:]:
+            compradores = {c for c, in conn.execute(
+                "SELECT cliente FROM vendas WHERE representante = ? AND produto = ? AND emissao = ?",
+                (chave[0], chave[1], esperada[6]))}
+            if obtida[7] in compradores:
+                empates += 1
+                continue
+        divergencias.append(f"{chave}: view={esperada} motor={obtida}")
+    return iguais, empates, divergencias
+
+
+def aplicar_sqlite(conn, linhas):
+    """Recarrega lkp_produtos_parados (DELETE + INSERT atômico)."""
+    with conn:
+        conn.execute(DDL_TABELA)
+        conn.execute(f"DELETE FROM {TABELA}")
+        conn.executemany(f"INSERT INTO {TABELA} ({', '.join(COLUNAS)}) "
+                         f"VALUES ({', '.join('?' * len(COLUNAS))})", linhas)
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Calcula lkp_produtos_parados em uma passada sobre as vendas.')
+    parser.add_argument('origens', nargs='+', help='Banco com a tabela vendas e/ou planilhas de vendas (.xlsx)')
+    parser.add_argument('--banco', help='Banco com tab_representante, tab_produto e tab_cliente '
+                                        '(padrão: a origem, se for um banco)')
+    parser.add_argument('--clientes', help='Nomes dos clientes de um .txt convertido ou planilha')
+    parser.add_argument('-o', '--saida', default=ARQUIVO_SQL, help=f'SQL gerado (padrão: {ARQUIVO_SQL})')
+    parser.add_argument('--aplicar', action='store_true', help='Grava a tabela também no --banco')
+    parser.add_argument('--conferir', action='store_true',
+                        help='Compara com a view vw_produtos_parados em um SQLite em memória')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    banco = args.banco or next((o for o in args.origens if eh_banco(o)), None)
+    for caminho in [*args.origens, banco, args.clientes]:
+        if caminho and not os.path.exists(caminho):
+            print(f"❌ Erro: Arquivo não encontrado: {caminho}")
+            return 1
+    if args.aplicar and not banco:
+        parser.error('--aplicar requer --banco')
+
+    medicao = metricas.iniciar(args)
+    inicio = time.perf_counter()
+    motor = MotorProdutosParados()
+    try:
+        vazias = []
+        representantes, produtos, clientes = ler_dimensoes(banco, vazias)
+        if args.clientes:
+            clientes.update(ler_nomes_clientes(args.clientes))
+            if clientes:
+                vazias = [tabela for tabela in vazias if not tabela.startswith('tab_cliente')]
+        for tabela in vazias:
+            print(f"⚠️  Dimensão sem dados: {tabela}")
+        if not representantes:
+            print("⚠️  Nenhum representante em tab_representante: a tabela sairá vazia")
+
+        print(f"📖 Lendo vendas: {', '.join(args.origens)}")
+        for venda in medicao.medir_iterador('leitura', ler_vendas(args.origens)):
+            with medicao.etapa('agregacao'):
+                motor.acrescentar(*venda)
+        with medicao.etapa('resultado'):
+            linhas = motor.resultado(representantes, produtos, clientes)
+        segundos = time.perf_counter() - inicio
+
+        with medicao.etapa('escrita'):
+            gravar_sql(args.saida, {TABELA: (COLUNAS, linhas)},
+                       gerador='produtos_parados.py a partir das vendas')
+            if args.aplicar:
+                conn = sqlite3.connect(banco)
+                try:
+                    aplicar_sqlite(conn, linhas)
+                finally:
+                    conn.close()
+
+        resultado_conferencia = None
+        if args.conferir:
+            print("🔎 Conferindo com a view no SQLite...")
+            with medicao.etapa('conferencia'):
+                conn = banco_referencia(args.origens, representantes, produtos, clientes)
+                try:
+                    resultado_conferencia = conferir(conn, linhas)
+                finally:
+                    conn.close()
+    except sqlite3.Error as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    print(f"✅ {motor.linhas} vendas, {len(motor.acumulados)} representante × produto em {segundos:.2f}s")
+    print(f"   - Data de referência: {motor.data_maxima}")
+    print(f"   - Produtos parados: {len(linhas)}")
+    for minimo, nivel in NIVEIS_RISCO + [(1, NIVEL_MINIMO)]:
+        print(f"     {nivel:<10} {sum(1 for l in linhas if l[12] == nivel):>7}")
+    print(f"📁 SQL: {args.saida}")
+    if args.aplicar:
+        print(f"💾 Aplicado em {banco}")
+
+    if resultado_conferencia is not None:
+        iguais, empates, divergencias = resultado_conferencia
+        print(f"   Iguais à view: {iguais}  Empates no último cliente: {empates}")
+        if divergencias:
+            print(f"❌ {len(divergencias)} divergência(s):")
+            for divergencia in divergencias[:10]:
+                print(f"   - {divergencia}")
+            return 1
+        if not iguais + empates:
+            print("❌ Nada foi conferido: nem a view nem o cálculo geraram linhas "
+                  f"(confira {', '.join(TABELAS_DIMENSOES)} e as vendas)")
+            return 1
+        print("✅ Resultado idêntico à view vw_produtos_parados")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Totais de vendas por mês publicados como arquivos JSON estáticos.
+
+Cada abertura dos dashboards de vendas (região, equipe, análise de produtos)
+soma linhas de `vendas` no Turso para o período escolhido. Aqui as vendas são
+lidas uma vez (planilhas de vendas ou a tabela `vendas` de uma réplica
+local) e somadas por mês × representante × cidade × produto:
+qtde_faturada, peso_liq, valor_liquido e quantidade de vendas. Cada mês vira
+um arquivo `dados/vendas/AAAA-MM.json`, servido direto pelo GitHub Pages, e
+`indice.json` lista os meses com totais e um hash de cada arquivo.
+
+Os arquivos são colunares e codificados por dicionário:
+
+    {"mes": "2024-01", "vendas": 1234,
+     "dimensoes": {"representante": [...], "cidade": [...], "produto": [...]},
+     "colunas": {"representante": [0, 0, 1, ...], "cidade": [...], "produto": [...],
+                 "qtde_faturada": [...], "peso_liq": [...], "valor_liquido": [...],
+                 "vendas": [...]}}
+
+A atualização é incremental. A pasta de estado guarda, ordenado, o hash de
+64 bits da chave_primaria de cada venda já somada. Assim:
+
+- vendas já conhecidas são ignoradas, como no INSERT OR IGNORE do importador;
+- só os meses com vendas novas são recalculados e regravados.
+
+Sem o estado, com meses já publicados, a atualização para e pede
+`--reconstruir` com o histórico completo. Vazios contam como 0 nas somas;
+emissões que não começam com AAAA-MM são ignoradas.
+
+Uso:
+    python3 rollups_vendas.py vendas_2025_03.xlsx
+    python3 rollups_vendas.py banco_local.db --reconstruir
+    python3 rollups_vendas.py vendas.xlsx --saida ../dados/vendas --estado /tmp/estado
+"""
+
+import argparse
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+import metricas
+
+PASTA_TEMPLATES = os.path.dirname(os.path.abspath(__file__))
+PASTA_SAIDA = os.path.join(PASTA_TEMPLATES, '..', 'dados', 'vendas')
+PASTA_ESTADO = os.path.join(PASTA_TEMPLATES, '.cache', 'rollups_vendas')
+ARQUIVO_INDICE = 'indice.json'
+ARQUIVO_ESTADO = 'chaves.npy'
+TAMANHO_LOTE = 50000
+VERSAO = 1
+
+DIMENSOES = ['representante', 'cidade', 'produto']
+METRICAS = ['qtde_faturada', 'peso_liq', 'valor_liquido']
+CASAS_DECIMAIS = 6
+
+_RE_MES = re.compile(r'(\d{4}-\d{2})')
+_RE_ARQUIVO_MES = re.compile(r'^\d{4}-\d{2}\.json$')
+
+
+class ErroRollup(Exception):
+    """Estado incremental inconsistente (reportado ao usuário)."""
+
+
+def hash_chave(chave):
+    """Hash de 64 bits da chave_primaria (guardado no estado)."""
+    return int.from_bytes(hashlib.blake2b(chave.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def mes_da_emissao(emissao):
+    """'AAAA-MM' da emissão ('AAAA-MM-DD...'), ou None."""
+    if not emissao:
+        return None
+    marcador = _RE_MES.match(emissao)
+    return marcador.group(1) if marcador else None
+
+
+def _numero_json(valor):
+    valor = round(valor, CASAS_DECIMAIS)
+    return int(valor) if valor.is_integer() else valor
+
+
+def _chave_ordem(grupo):
+    return tuple((v is not None, v or '') for v in grupo)
+
+
+# ---------------------------------------------------------------------------
+# Totais de um mês
+# ---------------------------------------------------------------------------
+
+class TotaisMes:
+    """Somas de um mês por (representante, cidade, produto)."""
+
+    def __init__(self, mes):
+        self.mes = mes
+        self.grupos = {}
+        self.vendas = 0
+
+    def acrescentar(self, grupo, qtde, peso, valor):
+        somas = self.grupos.get(grupo)
+        if somas is None:
+            somas = self.grupos[grupo] = [0.0, 0.0, 0.0, 0]
+        somas[0] += qtde or 0.0
+        somas[1] += peso or 0.0
+        somas[2] += valor or 0.0
+        somas[3] += 1
+        self.vendas += 1
+
+    def juntar(self, outro):
+        for grupo, (qtde, peso, valor, vendas) in outro.grupos.items():
+            somas = self.grupos.get(grupo)
+            if somas is None:
+                somas = self.grupos[grupo] = [0.0, 0.0, 0.0, 0]
+            somas[0] += qtde
+            somas[1] += peso
+            somas[2] += valor
+            somas[3] += vendas
+        self.vendas += outro.vendas
+
+    def como_json(self):
+        """Dicionário colunar (dimensões codificadas por dicionário), grupos ordenados."""
+        grupos = sorted(self.grupos, key=_chave_ordem)
+        dimensoes = {}
+        colunas = {}
+        for i, nome in enumerate(DIMENSOES):
+            valores = sorted({g[i] for g in grupos}, key=lambda v: (v is not None, v or ''))
+            codigos = {v: n for n, v in enumerate(valores)}
+            dimensoes[nome] = valores
+            colunas[nome] = [codigos[g[i]] for g in grupos]
+        for i, nome in enumerate(METRICAS):
+            colunas[nome] = [_numero_json(self.grupos[g][i]) for g in grupos]
+        colunas['vendas'] = [self.grupos[g][3] for g in grupos]
+        return {'versao': VERSAO, 'mes': self.mes, 'vendas': self.vendas,
+                'dimensoes': dimensoes, 'colunas': colunas}
+
+    @classmethod
+    def do_json(cls, dados):
+        totais = cls(dados['mes'])
+        colunas = dados['colunas']
+        dimensoes = [dados['dimensoes'][nome] for nome in DIMENSOES]
+        codigos = zip(*(colunas[nome] for nome in DIMENSOES))
+        metricas_grupo = zip(*(colunas[nome] for nome in METRICAS + ['vendas']))
+        for codigo, (qtde, peso, valor, vendas) in zip(codigos, metricas_grupo):
+            grupo = tuple(valores[c] for valores, c in zip(dimensoes, codigo))
+            totais.grupos[grupo] = [float(qtde), float(peso), float(valor), vendas]
+        totais.vendas = dados['vendas']
+        return totais
+
+    def resumo(self):
+        """Totais do mês para o índice."""
+        resumo = {'vendas': self.vendas, 'grupos': len(self.grupos)}
+        for i, nome in enumerate(METRICAS):
+            resumo[nome] = _numero_json(sum(somas[i] for somas in self.grupos.values()))
+        return resumo
+
+
+# ---------------------------------------------------------------------------
+# Origens
+# ---------------------------------------------------------------------------
+
+COLUNAS_LEITURA = ['chave_primaria', 'emissao'] + DIMENSOES + METRICAS
+
+
+def ler_vendas(origens):
+    """
+    Gera (chave_primaria, emissao, representante, cidade, produto, qtde,
+    peso, valor) de bancos (tabela vendas) e planilhas de vendas
+    (transformadas como no importador).
+    """
+    for origem in origens:
+        if origem.lower().endswith(('.db', '.sqlite', '.sqlite3')):
+            conn = sqlite3.connect(origem)
+            try:
+                yield from conn.execute(f"SELECT {', '.join(COLUNAS_LEITURA)} FROM vendas ORDER BY rowid")
+            finally:
+                conn.close()
+            continue
+
+        from transformar_vendas import ler_lotes_vendas, transformar_lote
+        for numeros, colunas in ler_lotes_vendas(origem):
+            lote = transformar_lote(numeros, colunas)['colunas']
+            textos = [lote[c] for c in COLUNAS_LEITURA[:-len(METRICAS)]]
+            # NaN (vazio) vira None
+            numericas = [np.where(np.isnan(lote[c]), None, lote[c]).tolist() for c in METRICAS]
+            yield from zip(*textos, *numericas)
+
+
+# ---------------------------------------------------------------------------
+# Estado e arquivos
+# ---------------------------------------------------------------------------
+
+def caminho_mes(pasta, mes):
+    return os.path.join(pasta, f'{mes}.json')
+
+
+def caminho_estado(pasta):
+    return os.path.join(pasta, ARQUIVO_ESTADO)
+
+
+def ler_estado(pasta):
+    """Hashes ordenados das vendas já somadas (vazio se não houver estado)."""
+    caminho = caminho_estado(pasta)
+    if not os.path.exists(caminho):
+        return np.empty(0, dtype=np.uint64)
+    return np.load(caminho)
+
+
+def gravar_estado(pasta, conhecidas, novas):
+    os.makedirs(pasta, exist_ok=True)
+    novas = np.fromiter(novas, dtype=np.uint64, count=len(novas))
+    temporario = caminho_estado(pasta) + '.tmp.npy'
+    np.save(temporario, np.sort(np.concatenate([conhecidas, novas])))
+    os.replace(temporario, caminho_estado(pasta))
+
+
+def gravar_json(caminho, dados):
+    """Grava JSON compacto de forma atômica. Retorna os bytes gravados."""
+    conteudo = json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+    return conteudo
+
+
+def meses_publicados(pasta):
+    try:
+        return sorted(nome[:-5] for nome in os.listdir(pasta) if _RE_ARQUIVO_MES.match(nome))
+    except FileNotFoundError:
+        return []
+
+
+def ler_indice(pasta):
+    try:
+        with open(os.path.join(pasta, ARQUIVO_INDICE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'versao': VERSAO, 'meses': {}}
+
+
+def limpar(pasta_saida, pasta_estado):
+    """Remove os meses publicados, o índice e o estado (para --reconstruir)."""
+    for mes in meses_publicados(pasta_saida):
+        os.remove(caminho_mes(pasta_saida, mes))
+    indice = os.path.join(pasta_saida, ARQUIVO_INDICE)
+    if os.path.exists(indice):
+        os.remove(indice)
+    if os.path.exists(caminho_estado(pasta_estado)):
+        os.remove(caminho_estado(pasta_estado))
+
+
+# ---------------------------------------------------------------------------
+# Atualização
+# ---------------------------------------------------------------------------
+
+def somar_novas(vendas, conhecidas, tamanho_lote=TAMANHO_LOTE):
+    """
+    Soma as vendas cujo hash não está em `conhecidas` (array ordenado).
+
+    A mesma chave_primaria pode aparecer em meses diferentes; como no INSERT
+    OR IGNORE, só a primeira ocorrência conta. Retorna ({mês: TotaisMes das
+    novas}, hashes novos, estatísticas).
+    """
+    medicao = metricas.atuais()
+    novas = {}
+    hashes_novos = set()
+    lidas = repetidas = ignoradas = 0
+    while True:
+        lote = list(itertools.islice(vendas, tamanho_lote))
+        if not lote:
+            break
+        with medicao.etapa('agregacao'):
+            lidas += len(lote)
+            hashes = np.fromiter((hash_chave(venda[0] or '') for venda in lote),
+                                 dtype=np.uint64, count=len(lote))
+            posicoes = np.searchsorted(conhecidas, hashes)
+            posicoes[posicoes == len(conhecidas)] = 0
+            ja_somadas = (conhecidas[posicoes] == hashes) if len(conhecidas) else np.zeros(len(lote), bool)
+            for venda, h, somada in zip(lote, hashes.tolist(), ja_somadas.tolist()):
+                chave, emissao, representante, cidade, produto, qtde, peso, valor = venda
+                mes = mes_da_emissao(emissao)
+                if mes is None or chave is None:
+                    ignoradas += 1
+                    continue
+                if somada or h in hashes_novos:
+                    repetidas += 1
+                    continue
+                hashes_novos.add(h)
+                totais = novas.get(mes)
+                if totais is None:
+                    totais = novas[mes] = TotaisMes(mes)
+                totais.acrescentar((representante, cidade, produto), qtde, peso, valor)
+    estatisticas = {'lidas': lidas, 'ja_somadas': repetidas, 'sem_emissao': ignoradas}
+    return novas, hashes_novos, estatisticas
+
+
+def atualizar(origens, pasta_saida=PASTA_SAIDA, pasta_estado=PASTA_ESTADO, reconstruir=False):
+    """
+    Soma as vendas de `origens` aos meses publicados em `pasta_saida`.
+
+    Retorna um dicionário com os meses regravados e as estatísticas da leitura.
+    """
+    medicao = metricas.atuais()
+    if reconstruir:
+        limpar(pasta_saida, pasta_estado)
+
+    publicados = set(meses_publicados(pasta_saida))
+    if publicados and not os.path.exists(caminho_estado(pasta_estado)):
+        raise ErroRollup(f"Sem estado incremental em {pasta_estado} para os meses publicados: "
+                         f"rode com --reconstruir e o histórico completo de vendas")
+    conhecidas = ler_estado(pasta_estado)
+
+    vendas = medicao.medir_iterador('leitura', ler_vendas(origens))
+    novas, hashes_novos, estatisticas = somar_novas(vendas, conhecidas)
+
+    os.makedirs(pasta_saida, exist_ok=True)
+    indice = ler_indice(pasta_saida)
+    with medicao.etapa('escrita'):
+        for mes in sorted(novas):
+            totais = novas[mes]
+            caminho = caminho_mes(pasta_saida, mes)
+            if mes in publicados:
+                with open(caminho, encoding='utf-8') as f:
+                    anteriores = TotaisMes.do_json(json.load(f))
+                anteriores.juntar(totais)
+                totais = anteriores
+            conteudo = gravar_json(caminho, totais.como_json())
+            indice['meses'][mes] = {
+                'arquivo': os.path.basename(caminho),
+                'sha256': hashlib.sha256(conteudo).hexdigest()[:16],
+                'bytes': len(conteudo),
+                **totais.resumo(),
+            }
+        indice['versao'] = VERSAO
+        indice['dimensoes'] = DIMENSOES
+        indice['metricas'] = METRICAS + ['vendas']
+        indice['meses'] = dict(sorted(indice['meses'].items()))
+        if novas or reconstruir:
+            indice['atualizado_em'] = datetime.datetime.now().isoformat(timespec='seconds')
+        gravar_json(os.path.join(pasta_saida, ARQUIVO_INDICE), indice)
+        # O estado só avança depois dos meses gravados
+        if hashes_novos or reconstruir:
+            gravar_estado(pasta_estado, conhecidas, hashes_novos)
+
+    return {'meses_atualizados': sorted(novas), 'meses_publicados': len(indice['meses']), **estatisticas}
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Publica totais mensais de vendas como JSON estático.')
+    parser.add_argument('origens', nargs='+', help='Planilhas de vendas (.xlsx) e/ou banco com a tabela vendas')
+    parser.add_argument('--saida', default=PASTA_SAIDA, help='Pasta publicada (padrão: dados/vendas)')
+    parser.add_argument('--estado', default=PASTA_ESTADO,
+                        help='Pasta do estado incremental (padrão: templates/.cache/rollups_vendas)')
+    parser.add_argument('--reconstruir', action='store_true',
+                        help='Apaga os meses publicados e o estado e recalcula tudo a partir das origens')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    for origem in args.origens:
+        if not os.path.exists(origem):
+            print(f"❌ Erro: Arquivo não encontrado: {origem}")
+            return 1
+
+    print(f"📖 Lendo vendas: {', '.join(args.origens)}")
+    metricas.iniciar(args)
+    inicio = time.perf_counter()
+    try:
+        resultado = atualizar(args.origens, args.saida, args.estado, args.reconstruir)
+    except (ErroRollup, sqlite3.Error) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    print(f"✅ {resultado['lidas']} vendas lidas em {time.perf_counter() - inicio:.2f}s")
+    print(f"   - Já somadas antes: {resultado['ja_somadas']}")
+    if resultado['sem_emissao']:
+        print(f"   ⚠️  Sem emissão AAAA-MM (ignoradas): {resultado['sem_emissao']}")
+    atualizados = resultado['meses_atualizados']
+    if atualizados:
+        print(f"📅 Meses recalculados: {', '.join(atualizados)}")
+    else:
+        print("♻️  Nenhuma venda nova - meses publicados sem alteração")
+    print(f"📁 {resultado['meses_publicados']} mês(es) em {os.path.normpath(args.saida)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
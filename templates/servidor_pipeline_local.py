@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que imita o endpoint `/v2/pipeline` do libSQL (Turso).
+
+Serve para testar e medir o `enviar_vendas.py` sem tocar no banco de
+produção. Implementa o subconjunto do protocolo Hrana sobre HTTP que o
+envio usa:
+
+- requisições `execute`, `batch` (passos com condição `ok`/`error`/`not`/
+  `and`/`or`) e `close`;
+- valores `null`, `integer`, `float`, `text` e `blob`.
+
+As instruções rodam em um SQLite local, uma por vez, como no banco real (um
+único escritor). As conexões HTTP/1.1 ficam abertas (keep-alive).
+
+Para simular a rede, `latencia` atrasa cada resposta. `falhas` devolve
+HTTP 503 para uma fração das requisições, para exercitar as novas
+tentativas do cliente.
+
+Uso:
+    python3 servidor_pipeline_local.py banco_local.db --porta 8080 --latencia 0.03
+    python3 enviar_vendas.py vendas.xlsx --url http://127.0.0.1:8080
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import sqlite3
+import sys
+
+ROTA_PIPELINE = '/v2/pipeline'
+TAMANHO_MAXIMO_CORPO = 64 * 1024 * 1024
+
+
+def valor_de_hrana(valor):
+    """Valor Hrana ({"type": ..., "value": ...}) → valor Python para o sqlite3."""
+    tipo = valor['type']
+    if tipo == 'null':
+        return None
+    if tipo == 'integer':
+        return int(valor['value'])
+    if tipo == 'float':
+        return float(valor['value'])
+    if tipo == 'blob':
+        return base64.b64decode(valor['base64'])
+    return valor['value']
+
+
+def valor_para_hrana(valor):
+    """Valor Python → valor Hrana."""
+    if valor is None:
+        return {'type': 'null'}
+    if isinstance(valor, int):
+        return {'type': 'integer', 'value': str(valor)}
+    if isinstance(valor, float):
+        return {'type': 'float', 'value': valor}
+    if isinstance(valor, bytes):
+        return {'type': 'blob', 'base64': base64.b64encode(valor).decode('ascii')}
+    return {'type': 'text', 'value': valor}
+
+
+class ErroHrana(Exception):
+    """Erro de instrução devolvido ao cliente como {"message": ...}."""
+
+
+class ServidorPipeline:
+    """Endpoint /v2/pipeline sobre um SQLite local."""
+
+    def __init__(self, banco=':memory:', latencia=0.0, falhas=0.0, semente=None):
+        # Sem transação implícita: BEGIN/COMMIT vêm do cliente, como no libSQL
+        self.conn = sqlite3.connect(banco, isolation_level=None, check_same_thread=False)
+        self.latencia = latencia
+        self.falhas = falhas
+        self.aleatorio = random.Random(semente)
+        self.servidor = None
+        self.atendimentos = set()
+        self.requisicoes = 0
+        self.falhas_simuladas = 0
+
+    # -- Execução ----------------------------------------------------------
+
+    def executar(self, stmt):
+        argumentos = [valor_de_hrana(v) for v in stmt.get('args', [])]
+        if stmt.get('named_args'):
+            argumentos = {a['name'].lstrip(':@$'): valor_de_hrana(a['value']) for a in stmt['named_args']}
+        try:
+            cursor = self.conn.execute(stmt['sql'], argumentos)
+            linhas = cursor.fetchall() if stmt.get('want_rows', True) else []
+        except sqlite3.Error as e:
+            raise ErroHrana(str(e))
+        return {
+            'cols': [{'name': d[0], 'decltype': None} for d in cursor.description or []],
+            'rows': [[valor_para_hrana(v) for v in linha] for linha in linhas],
+            'affected_row_count': max(cursor.rowcount, 0),
+            'last_insert_rowid': str(cursor.lastrowid) if cursor.lastrowid else None,
+            'replication_index': None,
+        }
+
+    @staticmethod
+    def _condicao(condicao, resultados, erros):
+        if condicao is None:
+            return True
+        tipo = condicao['type']
+        if tipo == 'ok':
+            return resultados[condicao['step']] is not None
+        if tipo == 'error':
+            return erros[condicao['step']] is not None
+        if tipo == 'not':
+            return not ServidorPipeline._condicao(condicao['cond'], resultados, erros)
+        if tipo == 'and':
+            return all(ServidorPipeline._condicao(c, resultados, erros) for c in condicao['conds'])
+        if tipo == 'or':
+            return any(ServidorPipeline._condicao(c, resultados, erros) for c in condicao['conds'])
+        raise ErroHrana(f"Condição não suportada: {tipo}")
+
+    def executar_batch(self, passos):
+        resultados = [None] * len(passos)
+        erros = [None] * len(passos)
+        for i, passo in enumerate(passos):
+            if not self._condicao(passo.get('condition'), resultados, erros):
+                continue
+            try:
+                resultados[i] = self.executar(passo['stmt'])
+            except ErroHrana as e:
+                erros[i] = {'message': str(e)}
+        return {'step_results': resultados, 'step_errors': erros}
+
+    def executar_pipeline(self, corpo):
+        """Corpo do POST /v2/pipeline → corpo da resposta."""
+        respostas = []
+        for requisicao in corpo.get('requests', []):
+            tipo = requisicao['type']
+            try:
+                if tipo == 'execute':
+                    resposta = {'type': 'execute', 'result': self.executar(requisicao['stmt'])}
+                elif tipo == 'batch':
+                    resposta = {'type': 'batch', 'result': self.executar_batch(requisicao['batch']['steps'])}
+                elif tipo == 'close':
+                    resposta = {'type': 'close'}
+                else:
+                    raise ErroHrana(f"Requisição não suportada: {tipo}")
+            except ErroHrana as e:
+                respostas.append({'type': 'error', 'error': {'message': str(e)}})
+                continue
+            respostas.append({'type': 'ok', 'response': resposta})
+        return {'baton': None, 'base_url': None, 'results': respostas}
+
+    # -- HTTP --------------------------------------------------------------
+
+    async def _responder(self, writer, status, corpo, motivo='OK'):
+        conteudo = json.dumps(corpo).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {motivo}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(conteudo)}\r\nConnection: keep-alive\r\n\r\n".encode('ascii') + conteudo
+        )
+        await writer.drain()
+
+    async def _atender(self, reader, writer):
+        self.atendimentos.add(asyncio.current_task())
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                metodo, rota, _ = linha.decode('latin-1').split(' ', 2)
+                cabecalhos = {}
+                while True:
+                    linha = await reader.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                tamanho = int(cabecalhos.get('content-length', 0))
+                if tamanho > TAMANHO_MAXIMO_CORPO:
+                    await self._responder(writer, 413, {'error': 'corpo grande demais'}, 'Payload Too Large')
+                    break
+                corpo = await reader.readexactly(tamanho) if tamanho else b''
+                self.requisicoes += 1
+
+                if self.latencia:
+                    await asyncio.sleep(self.latencia)
+                if metodo != 'POST' or rota.split('?')[0] != ROTA_PIPELINE:
+                    await self._responder(writer, 404, {'error': f'{metodo} {rota}'}, 'Not Found')
+                elif self.falhas and self.aleatorio.random() < self.falhas:
+                    self.falhas_simuladas += 1
+                    await self._responder(writer, 503, {'error': 'falha simulada'}, 'Service Unavailable')
+                else:
+                    try:
+                        resposta = self.executar_pipeline(json.loads(corpo))
+                    except (ValueError, KeyError, TypeError) as e:
+                        await self._responder(writer, 400, {'error': str(e)}, 'Bad Request')
+                    else:
+                        await self._responder(writer, 200, resposta)
+                if cabecalhos.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # parar() com o cliente ainda conectado
+            pass
+        finally:
+            self.atendimentos.discard(asyncio.current_task())
+            writer.close()
+
+    async def iniciar(self, host='127.0.0.1', porta=0):
+        """Começa a escutar. Retorna a URL base (http://host:porta)."""
+        self.servidor = await asyncio.start_server(self._atender, host, porta)
+        host, porta = self.servidor.sockets[0].getsockname()[:2]
+        return f'http://{host}:{porta}'
+
+    async def parar(self):
+        if self.servidor is not None:
+            self.servidor.close()
+            for atendimento in list(self.atendimentos):
+                atendimento.cancel()
+            await asyncio.gather(*self.atendimentos, return_exceptions=True)
+            await self.servidor.wait_closed()
+        self.conn.close()
+
+
+async def _servir(args):
+    servidor = ServidorPipeline(args.banco, args.latencia, args.falhas)
+    url = await servidor.iniciar(args.host, args.porta)
+    print(f"🌐 Pipeline libSQL local em {url}{ROTA_PIPELINE} (banco: {args.banco})")
+    try:
+        await servidor.servidor.serve_forever()
+    finally:
+        await servidor.parar()
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Servidor local que imita o /v2/pipeline do libSQL.')
+    parser.add_argument('banco', nargs='?', default=':memory:', help='Banco SQLite (padrão: em memória)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--latencia', type=float, default=0.0, help='Atraso por resposta em segundos')
+    parser.add_argument('--falhas', type=float, default=0.0, help='Fração de requisições respondidas com 503')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_servir(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Tabela de clientes compacta em memória, colunar e codificada por dicionário.
+
+Cruzar, consultar ou enriquecer a base convertida dentro do Python hoje
+significa uma lista de dicionários, com um objeto str por célula: ~100 mil
+clientes × 15 colunas passam de 100 MB, embora `cidade`, `bairro`, `rota`,
+`sub_rota`, `grupo`, `grupo_desc` e `sit_cliente` tenham só algumas centenas
+de valores distintos cada. Aqui cada coluna fica em um vetor tipado
+(módulo array):
+
+- colunas categóricas: cada valor distinto é guardado uma vez (interning) em
+  um dicionário da coluna e as linhas guardam só o código (2 bytes; 4 se a
+  coluna passar de 65 mil valores distintos). O código 0 é o vazio (NULL);
+- demais colunas (nome, fantasia, endereço, documentos...): o texto UTF-8 de
+  todas as linhas fica em um único bytearray, com o deslocamento do fim de
+  cada valor em um vetor de 4 bytes. O texto só vira str quando é lido;
+- `cliente`: guardado como as demais colunas de texto, com um índice de
+  endereçamento aberto (hash do código → posição da linha, também em vetores
+  tipados), busca em O(1) sem manter um str e uma entrada de dict por cliente.
+
+Como no upsert do importador, um cliente repetido substitui o anterior
+(a linha antiga fica marcada como removida) e linhas sem cliente são
+descartadas. `LinhaCliente` é uma visão da linha (com __slots__, sem copiar
+valores): `tabela['00123'].cidade`. Os agrupamentos (`contar`, `agrupar`)
+trabalham direto sobre os códigos inteiros e só decodificam as chaves no fim.
+
+Uso (carrega, mede a memória contra a lista de dicionários e agrupa):
+    python3 tabela_clientes.py Clientes_20250101_120000.txt --agrupar rota cidade
+    python3 tabela_clientes.py banco_local.db --cliente 00123
+"""
+
+import argparse
+import collections
+import gc
+import itertools
+import sys
+import time
+import tracemalloc
+from array import array
+
+from converter_clientes import LEITORES, ErroConversao
+from duplicados_clientes import ler_clientes_origem
+from leitor_xlsx import ErroLeituraXlsx
+from mapeamentos import COLUNAS_CLIENTES
+import metricas
+
+COLUNAS_CATEGORICAS = ('grupo', 'bairro', 'cidade', 'grupo_desc', 'rota', 'sit_cliente', 'sub_rota')
+# Códigos de 2 bytes até este número de valores distintos; depois, 4 bytes
+LIMITE_CODIGO_CURTO = 0xFFFF
+CAPACIDADE_INICIAL = 1024
+
+
+class DicionarioColuna:
+    """Valores distintos de uma coluna categórica; o código 0 é o vazio (None)."""
+
+    __slots__ = ('valores', 'codigos')
+
+    def __init__(self):
+        self.valores = [None]
+        self.codigos = {None: 0}
+
+    def codificar(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = self.codigos[valor] = len(self.valores)
+            self.valores.append(sys.intern(valor))
+        return codigo
+
+    def __len__(self):
+        return len(self.valores)
+
+
+class LinhaCliente:
+    """Visão de uma linha da TabelaClientes; os atributos são as colunas de tab_cliente."""
+
+    __slots__ = ('tabela', 'posicao')
+
+    def __init__(self, tabela, posicao):
+        self.tabela = tabela
+        self.posicao = posicao
+
+    def como_tupla(self):
+        """Valores na ordem de COLUNAS_CLIENTES."""
+        return tuple(self.tabela.valor(coluna, self.posicao) for coluna in self.tabela.colunas)
+
+    def como_dict(self):
+        return dict(zip(self.tabela.colunas, self.como_tupla()))
+
+    def __eq__(self, outra):
+        return isinstance(outra, LinhaCliente) and self.como_tupla() == outra.como_tupla()
+
+    def __repr__(self):
+        return f"LinhaCliente({self.como_dict()!r})"
+
+
+def _atributo_coluna(coluna):
+    return property(lambda linha: linha.tabela.valor(coluna, linha.posicao), doc=f"Valor de `{coluna}`.")
+
+
+for _coluna in COLUNAS_CLIENTES:
+    setattr(LinhaCliente, _coluna, _atributo_coluna(_coluna))
+
+
+class TabelaClientes:
+    """Clientes em colunas tipadas, com índice por `cliente`."""
+
+    def __init__(self, colunas=COLUNAS_CLIENTES, categoricas=COLUNAS_CATEGORICAS):
+        if colunas[0] != 'cliente':
+            raise ValueError("a primeira coluna deve ser 'cliente'")
+        self.colunas = list(colunas)
+        self.categoricas = {coluna: DicionarioColuna() for coluna in colunas if coluna in categoricas}
+        self.codigos = {coluna: array('H') for coluna in self.categoricas}
+        self.textos = {coluna: bytearray() for coluna in colunas if coluna not in self.categoricas}
+        self.fins = {coluna: array('I') for coluna in self.textos}
+        # Índice por endereçamento aberto: posição da linha em cada slot (-1 = livre)
+        self.slots = array('i', [-1]) * CAPACIDADE_INICIAL
+        self.hashes = array('q')
+        # 1 = linha válida; 0 = substituída por uma ocorrência posterior do cliente
+        self.vivas = bytearray()
+        self.quantidade = 0
+        self.substituidos = 0
+        self.sem_cliente = 0
+
+    # --- índice por cliente -----------------------------------------------
+
+    def _slot(self, codigo, h):
+        """Slot do cliente `codigo` (UTF-8): o que já o contém ou o livre onde entraria."""
+        slots, hashes, mascara = self.slots, self.hashes, len(self.slots) - 1
+        i = h & mascara
+        while True:
+            posicao = slots[i]
+            if posicao < 0 or (hashes[posicao] == h and self._texto(self.textos['cliente'],
+                                                                    self.fins['cliente'], posicao) == codigo):
+                return i
+            i = (i + 1) & mascara
+
+    def _crescer(self):
+        slots = self.slots = array('i', [-1]) * (len(self.slots) * 2)
+        mascara = len(slots) - 1
+        for posicao in itertools.compress(itertools.count(), self.vivas):
+            i = self.hashes[posicao] & mascara
+            while slots[i] >= 0:
+                i = (i + 1) & mascara
+            slots[i] = posicao
+
+    def _posicao(self, cliente):
+        codigo = cliente.encode('utf-8')
+        return self.slots[self._slot(codigo, hash(codigo))]
+
+    # --- carga ------------------------------------------------------------
+
+    def acrescentar(self, valores):
+        """Acrescenta uma linha (tupla na ordem das colunas, vazio = None)."""
+        if valores[0] is None:
+            self.sem_cliente += 1
+            return
+        codigo = str(valores[0]).encode('utf-8')
+        h = hash(codigo)
+        posicao = len(self.vivas)
+        slot = self._slot(codigo, h)
+        anterior = self.slots[slot]
+        if anterior >= 0:
+            # Upsert: a última ocorrência vence
+            self.vivas[anterior] = 0
+            self.substituidos += 1
+        else:
+            self.quantidade += 1
+        self.slots[slot] = posicao
+        self.hashes.append(h)
+        self.vivas.append(1)
+        for coluna, valor in zip(self.colunas, valores):
+            if valor is not None and not isinstance(valor, str):
+                valor = str(valor)
+            dicionario = self.categoricas.get(coluna)
+            if dicionario is not None:
+                self._guardar_codigo(coluna, dicionario.codificar(valor))
+            else:
+                texto = self.textos[coluna]
+                if valor:
+                    texto += valor.encode('utf-8')
+                self.fins[coluna].append(len(texto))
+        # Carga máxima de 1/2 mantém as sondagens curtas
+        if self.quantidade * 2 > len(self.slots):
+            self._crescer()
+
+    def _guardar_codigo(self, coluna, codigo):
+        codigos = self.codigos[coluna]
+        if codigo > LIMITE_CODIGO_CURTO and codigos.typecode == 'H':
+            codigos = self.codigos[coluna] = array('I', codigos)
+        codigos.append(codigo)
+
+    def acrescentar_todas(self, linhas):
+        for valores in linhas:
+            self.acrescentar(valores)
+        return self
+
+    # --- acesso -----------------------------------------------------------
+
+    @staticmethod
+    def _texto(texto, fins, posicao):
+        return texto[fins[posicao - 1] if posicao else 0:fins[posicao]]
+
+    def valor(self, coluna, posicao):
+        """Valor de `coluna` na linha `posicao` (None = vazio)."""
+        dicionario = self.categoricas.get(coluna)
+        if dicionario is not None:
+            return dicionario.valores[self.codigos[coluna][posicao]]
+        return self._texto(self.textos[coluna], self.fins[coluna], posicao).decode('utf-8') or None
+
+    def __len__(self):
+        return self.quantidade
+
+    def __contains__(self, cliente):
+        return self._posicao(cliente) >= 0
+
+    def __getitem__(self, cliente):
+        """Linha do cliente (KeyError se não existir)."""
+        posicao = self._posicao(cliente)
+        if posicao < 0:
+            raise KeyError(cliente)
+        return LinhaCliente(self, posicao)
+
+    def get(self, cliente, padrao=None):
+        posicao = self._posicao(cliente)
+        return padrao if posicao < 0 else LinhaCliente(self, posicao)
+
+    def _posicoes_vivas(self):
+        return itertools.compress(itertools.count(), self.vivas)
+
+    def __iter__(self):
+        """Linhas válidas na ordem de chegada."""
+        return (LinhaCliente(self, posicao) for posicao in self._posicoes_vivas())
+
+    def coluna(self, coluna):
+        """Valores de `coluna` das linhas válidas, em lista."""
+        return [self.valor(coluna, posicao) for posicao in self._posicoes_vivas()]
+
+    def valores_distintos(self, coluna):
+        """Valores do dicionário de uma coluna categórica (sem o vazio)."""
+        return self.categoricas[coluna].valores[1:]
+
+    # --- agrupamentos -----------------------------------------------------
+
+    def _chaves_codigos(self, colunas):
+        for coluna in colunas:
+            if coluna not in self.categoricas:
+                raise KeyError(f"'{coluna}' não é uma coluna categórica ({', '.join(self.categoricas)})")
+        vetores = [self.codigos[coluna] for coluna in colunas]
+        return itertools.compress(zip(*vetores), self.vivas)
+
+    def _decodificar(self, colunas, codigos):
+        dicionarios = [self.categoricas[coluna].valores for coluna in colunas]
+        return tuple(dicionario[codigo] for dicionario, codigo in zip(dicionarios, codigos))
+
+    def contar(self, *colunas):
+        """{(valores das colunas): quantidade de clientes}, da maior contagem para a menor."""
+        contagem = collections.Counter(self._chaves_codigos(colunas))
+        return {self._decodificar(colunas, chave): quantidade for chave, quantidade in contagem.most_common()}
+
+    def agrupar(self, *colunas):
+        """{(valores das colunas): [códigos de cliente]}, na ordem de chegada dentro de cada grupo."""
+        grupos = collections.defaultdict(list)
+        for chave, cliente in zip(self._chaves_codigos(colunas), self.coluna('cliente')):
+            grupos[chave].append(cliente)
+        return {self._decodificar(colunas, chave): membros for chave, membros in grupos.items()}
+
+    def filtrar(self, coluna, valor):
+        """Linhas com `coluna` (categórica) igual a `valor`."""
+        codigo = self.categoricas[coluna].codigos.get(valor)
+        if codigo is None:
+            return
+        for posicao, (atual, viva) in enumerate(zip(self.codigos[coluna], self.vivas)):
+            if atual == codigo and viva:
+                yield LinhaCliente(self, posicao)
+
+    # --- memória ----------------------------------------------------------
+
+    def memoria(self):
+        """Bytes aproximados ocupados pela tabela (vetores, textos, dicionários e índice)."""
+        total = sys.getsizeof(self.vivas) + sys.getsizeof(self.slots) + sys.getsizeof(self.hashes)
+        for coluna, dicionario in self.categoricas.items():
+            total += sys.getsizeof(self.codigos[coluna]) + sys.getsizeof(dicionario.valores)
+            total += sys.getsizeof(dicionario.codigos) + sum(map(sys.getsizeof, dicionario.valores[1:]))
+        for coluna, texto in self.textos.items():
+            total += sys.getsizeof(texto) + sys.getsizeof(self.fins[coluna])
+        return total
+
+
+def carregar_tabela(origem, leitor=LEITORES['xml']):
+    """TabelaClientes a partir de um banco, .txt convertido ou planilha."""
+    medicao = metricas.atuais()
+    tabela = TabelaClientes()
+    linhas = medicao.medir_iterador('leitura', ler_clientes_origem(origem, leitor))
+    with medicao.etapa('tabela'):
+        tabela.acrescentar_todas(linhas)
+    return tabela
+
+
+def comparar_memoria(origem, leitor=LEITORES['xml']):
+    """
+    Pico de memória (tracemalloc) de manter a base como lista de dicionários
+    e como TabelaClientes. Retorna (bytes da lista, bytes da tabela, clientes).
+    """
+    def medir(montar):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            resultado = montar()
+            return tracemalloc.get_traced_memory()[0], resultado
+        finally:
+            tracemalloc.stop()
+
+    # Lista de dicionários com a mesma regra de upsert da tabela
+    def lista_dicts():
+        por_cliente = {}
+        for valores in ler_clientes_origem(origem, leitor):
+            if valores[0] is not None:
+                por_cliente[valores[0]] = dict(zip(COLUNAS_CLIENTES, valores))
+        return list(por_cliente.values())
+
+    bytes_lista, lista = medir(lista_dicts)
+    del lista
+    bytes_tabela, tabela = medir(lambda: TabelaClientes().acrescentar_todas(ler_clientes_origem(origem, leitor)))
+    return bytes_lista, bytes_tabela, len(tabela)
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description='Carrega a base de clientes em uma tabela colunar compacta e agrupa por colunas categóricas.'
+    )
+    parser.add_argument('origem', help='Banco SQLite/libSQL, Clientes_<timestamp>.txt ou planilha de clientes')
+    parser.add_argument('--agrupar', nargs='+', default=['rota', 'cidade'], metavar='COLUNA',
+                        choices=COLUNAS_CATEGORICAS,
+                        help=f'Colunas do agrupamento (padrão: rota cidade; opções: {", ".join(COLUNAS_CATEGORICAS)})')
+    parser.add_argument('--limite', type=int, default=15, help='Grupos a mostrar (padrão: 15)')
+    parser.add_argument('--cliente', action='append', default=[], help='Mostra a linha deste cliente (repetível)')
+    parser.add_argument('--comparar-memoria', action='store_true',
+                        help='Mede também a lista de dicionários equivalente (tracemalloc; mais lento)')
+    parser.add_argument('--leitor', choices=sorted(LEITORES), default='xml')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    print(f"📖 Lendo clientes: {args.origem}")
+    medicao = metricas.iniciar(args)
+    try:
+        inicio = time.perf_counter()
+        tabela = carregar_tabela(args.origem, LEITORES[args.leitor])
+        segundos_carga = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        with medicao.etapa('agrupamento'):
+            grupos = tabela.contar(*args.agrupar)
+        segundos_grupos = time.perf_counter() - inicio
+        comparacao = comparar_memoria(args.origem, LEITORES[args.leitor]) if args.comparar_memoria else None
+    except (OSError, ErroConversao, ErroLeituraXlsx) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    print(f"✅ {len(tabela)} clientes em {segundos_carga:.2f}s "
+          f"({tabela.substituidos} substituídos por ocorrência posterior, {tabela.sem_cliente} sem cliente)")
+    print(f"   Memória da tabela: {tabela.memoria() / 1024 / 1024:,.1f} MB")
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in tabela.categoricas:
+            print(f"   - {coluna}: {len(tabela.valores_distintos(coluna))} valores distintos")
+    if comparacao:
+        bytes_lista, bytes_tabela, _ = comparacao
+        print(f"📊 Lista de dicionários: {bytes_lista / 1024 / 1024:,.1f} MB  "
+              f"Tabela: {bytes_tabela / 1024 / 1024:,.1f} MB  "
+              f"({bytes_lista / bytes_tabela if bytes_tabela else 0:.1f}x menor)")
+
+    print(f"\n🗂️  {len(grupos)} grupos por {' × '.join(args.agrupar)} em {segundos_grupos * 1000:.1f} ms")
+    for chave, quantidade in itertools.islice(grupos.items(), args.limite):
+        print(f"   {quantidade:7d}  {' | '.join(valor or '(vazio)' for valor in chave)}")
+
+    for cliente in args.cliente:
+        linha = tabela.get(cliente)
+        if linha is None:
+            print(f"\n⚠️  Cliente {cliente} não encontrado")
+            continue
+        print(f"\n👤 {cliente}")
+        for coluna, valor in linha.como_dict().items():
+            print(f"   {coluna}: {valor if valor is not None else ''}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
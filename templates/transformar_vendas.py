@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Transformação de vendas vetorizada com NumPy (equivalente ao importador JS).
+
+`VendasImporter.transformRecord` em scripts/importar-vendas-excel.js trata
+uma linha por vez: filtra Série = "EP", monta chave_primaria = Nota Fiscal +
+Produto e aplica `parseNumber` em cada coluna numérica. Aqui as mesmas regras
+são aplicadas coluna a coluna sobre lotes de linhas:
+
+- a Série é comparada de uma vez e as linhas filtradas saem por máscara;
+- as dez colunas de NUMERIC_COLUMNS têm vírgula decimal e separador de milhar
+  convertidos com operações de string do NumPy e viram float64 (NaN = NULL);
+- as demais colunas são aparadas (trim) em bloco.
+
+`transformar_registro` e `parse_number` são o porte linha a linha do JS e
+servem de referência: `--conferir` compara as duas implementações.
+
+Células de data (valores datetime na planilha) viram 'AAAA-MM-DD', formato
+usado pelas consultas com julianday(emissao).
+
+Uso:
+    python3 transformar_vendas.py vendas_2024.xlsx
+    python3 transformar_vendas.py vendas_2024.xlsx --conferir
+    python3 transformar_vendas.py vendas_2024.xlsx --banco banco_local.db
+    python3 transformar_vendas.py vendas_filiais.csv --banco banco_local.db --ordenar
+"""
+
+import argparse
+import datetime
+import itertools
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from converter_clientes import leitor_para_arquivo, localizar_colunas
+from leitor_xlsx import ler_linhas_xml
+from mapeamentos import COLUNAS_NUMERICAS_VENDAS, COLUNAS_VENDAS, MAPEAMENTO_VENDAS
+import metricas
+from ordenacao_externa import MEMORIA_MB, OrdenacaoExterna, descrever, primeiro_campo
+
+SERIE_FILTRO = 'EP'
+TAMANHO_LOTE = 50000
+COLUNAS_INSERT = ['chave_primaria'] + COLUNAS_VENDAS
+SQL_INSERT = (f"INSERT OR IGNORE INTO vendas ({', '.join(COLUNAS_INSERT)}) "
+              f"VALUES ({', '.join('?' * len(COLUNAS_INSERT))})")
+
+# Prefixo aceito pelo parseFloat do JavaScript
+_RE_PARSE_FLOAT = re.compile(r'[+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+_RE_PONTOS_MILHAR = re.compile(r'\.(?=.*\.)')
+
+
+# ---------------------------------------------------------------------------
+# Referência linha a linha (porte direto do importador JS)
+# ---------------------------------------------------------------------------
+
+def _parse_float_js(texto):
+    """parseFloat do JavaScript: lê o maior prefixo numérico válido."""
+    correspondencia = _RE_PARSE_FLOAT.match(texto.lstrip())
+    if not correspondencia:
+        return None
+    return float(correspondencia.group().replace('Infinity', 'inf'))
+
+
+def parse_number(valor):
+    """Porte de VendasImporter.parseNumber."""
+    if valor is None or valor == '':
+        return None
+    texto = str(valor).strip().replace(',', '.', 1)
+    texto = _RE_PONTOS_MILHAR.sub('', texto)
+    return _parse_float_js(texto)
+
+
+def transformar_registro(linha, numero):
+    """
+    Porte de VendasImporter.transformRecord.
+
+    `linha` é {cabeçalho do Excel: texto}. Retorna o registro, None se a
+    Série não for EP ou levanta ValueError (NF/Produto ausente).
+    """
+    serie = linha.get('Série')
+    if (serie.strip() if serie is not None else None) != SERIE_FILTRO:
+        return None
+
+    nota_fiscal = (linha.get('Nota Fiscal') or '').strip()
+    produto = (linha.get('Produto') or '').strip()
+    if not nota_fiscal or not produto:
+        raise ValueError(f"Linha {numero}: Nota Fiscal ou Produto ausente")
+
+    registro = {'chave_primaria': nota_fiscal + produto}
+    for origem, destino in MAPEAMENTO_VENDAS:
+        valor = linha.get(origem)
+        if valor is None or valor == '':
+            valor = None
+        elif destino in COLUNAS_NUMERICAS_VENDAS:
+            valor = parse_number(valor)
+        else:
+            valor = valor.strip()
+        registro[destino] = valor
+    return registro
+
+
+# ---------------------------------------------------------------------------
+# Versão vetorizada
+# ---------------------------------------------------------------------------
+
+def texto_celula(valor):
+    """Valor da planilha → texto que o importador JS receberia (None = vazio)."""
+    if valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, bool):
+        return 'TRUE' if valor else 'FALSE'
+    if isinstance(valor, datetime.datetime):
+        if valor.time() == datetime.time():
+            return valor.strftime('%Y-%m-%d')
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, datetime.date):
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+_texto_celula_vetor = np.frompyfunc(texto_celula, 1, 1)
+
+
+def _datas_como_texto(valores):
+    """Coluna só de datetime → 'AAAA-MM-DD' vetorizado; None se não for o caso."""
+    if not valores or set(map(type, valores)) != {datetime.datetime}:
+        return None
+    datas = np.array(valores, dtype='datetime64[s]')
+    dias = datas.astype('datetime64[D]')
+    if (datas != dias).any():
+        return None
+    return np.datetime_as_string(dias).astype(object)
+
+
+def _como_texto(valores):
+    """
+    Converte a coluna bruta em array de str ('' = vazio) + máscara de vazios.
+
+    Colunas só com textos e inteiros vão direto para `astype(str)` em C;
+    colunas de datas são formatadas pelo datetime64; floats e células mistas
+    passam por `texto_celula` elemento a elemento.
+    """
+    brutos = _datas_como_texto(valores)
+    if brutos is None:
+        brutos = np.asarray(valores, dtype=object)
+        if set(map(type, valores)) - {str, int, type(None)}:
+            brutos = _texto_celula_vetor(brutos)
+    vazios = np.equal(brutos, None) | np.equal(brutos, '')
+    if vazios.any():
+        brutos = brutos.copy()
+        brutos[vazios] = ''
+    textos = brutos.astype(str)
+    if textos.dtype.kind != 'U':
+        textos = textos.astype('U')
+    return textos, vazios
+
+
+def _somente_numeros(valores):
+    """
+    Coluna numérica já gravada como número na planilha → float64 direto.
+
+    É o caso comum (o ERP exporta células numéricas) e dispensa a conversão
+    para texto: parseNumber(String(n)) devolve o próprio n. Retorna None se
+    houver algum texto ou booleano na coluna.
+    """
+    tipos = set(map(type, valores))
+    tipos.discard(type(None))
+    if not tipos <= {int, float}:
+        return None
+    return np.array([np.nan if v is None else v for v in valores], dtype=np.float64)
+
+
+def parse_numeros(textos, vazios):
+    """
+    parseNumber vetorizado sobre um array de str. Retorna float64 (NaN = NULL).
+
+    Caminho rápido em C para textos que, após a limpeza, são só dígitos com
+    sinal e um ponto opcionais; o restante (expoente, lixo no final, etc.) cai
+    no parseFloat linha a linha, que é raro.
+    """
+    resultado = np.full(textos.shape, np.nan)
+    limpos = np.char.strip(textos)
+    limpos = np.char.replace(limpos, ',', '.', count=1)
+    # Remove todos os pontos menos o último (separadores de milhar)
+    partes = np.char.rpartition(limpos, '.')
+    cabeca, separador, cauda = partes[..., 0], partes[..., 1], partes[..., 2]
+    limpos = np.char.add(np.char.add(np.char.replace(cabeca, '.', ''), separador), cauda)
+
+    sem_sinal = np.char.lstrip(limpos, '+-')
+    sinais = np.char.str_len(limpos) - np.char.str_len(sem_sinal)
+    simples = (sinais <= 1) & np.char.isdecimal(np.char.replace(sem_sinal, '.', '', count=1))
+    simples &= ~vazios
+    if simples.any():
+        resultado[simples] = limpos[simples].astype(np.float64)
+
+    for i in np.flatnonzero(~simples & ~vazios):
+        numero = _parse_float_js(str(limpos[i]))
+        if numero is not None:
+            resultado[i] = numero
+    return resultado
+
+
+def transformar_lote(numeros, colunas):
+    """
+    Aplica as regras do importador a um lote coluna a coluna.
+
+    `numeros` são os números das linhas na planilha e `colunas` é
+    {coluna de vendas: lista de valores brutos}. Retorna um dicionário com as
+    colunas transformadas (só linhas válidas), as linhas de origem, o total,
+    quantos foram filtrados e a lista de erros.
+    """
+    numeros = np.asarray(numeros)
+    total = len(numeros)
+    textos = {}
+    vazios = {}
+    numericos = {}
+    for coluna in COLUNAS_VENDAS:
+        if coluna in COLUNAS_NUMERICAS_VENDAS:
+            numericos[coluna] = _somente_numeros(colunas[coluna])
+            if numericos[coluna] is not None:
+                continue
+        textos[coluna], vazios[coluna] = _como_texto(colunas[coluna])
+
+    serie = np.char.strip(textos['serie'])
+    eh_ep = (serie == SERIE_FILTRO) & ~vazios['serie']
+
+    nota_fiscal = np.char.strip(textos['nota_fiscal'])
+    produto = np.char.strip(textos['produto'])
+    com_erro = eh_ep & ((nota_fiscal == '') | (produto == ''))
+    validas = eh_ep & ~com_erro
+
+    saida = {'chave_primaria': np.char.add(nota_fiscal[validas], produto[validas]).astype(object)}
+    for coluna in COLUNAS_VENDAS:
+        if numericos.get(coluna) is not None:
+            saida[coluna] = numericos[coluna][validas]
+        elif coluna in COLUNAS_NUMERICAS_VENDAS:
+            saida[coluna] = parse_numeros(textos[coluna][validas], vazios[coluna][validas])
+        else:
+            texto = np.char.strip(textos[coluna][validas]).astype(object)
+            texto[vazios[coluna][validas]] = None
+            saida[coluna] = texto
+
+    return {
+        'colunas': saida,
+        'linhas': numeros[validas],
+        'total': total,
+        'filtrados': int(total - eh_ep.sum()),
+        'erros': [f"Linha {n}: Nota Fiscal ou Produto ausente" for n in numeros[com_erro]],
+    }
+
+
+def registros(lote):
+    """Gera tuplas na ordem do INSERT do importador JS (NaN → None)."""
+    colunas = [lote['colunas'][c] for c in COLUNAS_INSERT]
+    numericas = {i for i, c in enumerate(COLUNAS_INSERT) if c in COLUNAS_NUMERICAS_VENDAS}
+    for i in range(len(lote['linhas'])):
+        yield tuple(
+            (None if math.isnan(coluna[i]) else float(coluna[i])) if j in numericas else coluna[i]
+            for j, coluna in enumerate(colunas)
+        )
+
+
+def ler_lotes_vendas(caminho, tamanho_lote=TAMANHO_LOTE, leitor=ler_linhas_xml, linha_inicial=2):
+    """
+    Lê a planilha de vendas (cabeçalho na linha 1) em lotes colunares.
+
+    Gera (números das linhas, {coluna: lista de valores}). Linhas totalmente
+    vazias são ignoradas, como no sheet_to_json. Com `linha_inicial` (retomada
+    por checkpoint), as linhas anteriores são puladas sem conversão. CSV e
+    .xls usam o leitor da extensão (converter_clientes.leitor_para_arquivo).
+    """
+    leitor = leitor_para_arquivo(caminho, leitor)
+    escolher = lambda cabecalho: localizar_colunas(cabecalho, MAPEAMENTO_VENDAS)
+    numeros = []
+    linhas = []
+    for numero, valores in leitor(caminho, escolher, linha_inicial):
+        if all(v is None or v == '' for v in valores):
+            continue
+        numeros.append(numero)
+        linhas.append(valores)
+        if len(linhas) >= tamanho_lote:
+            yield numeros, dict(zip(COLUNAS_VENDAS, map(list, zip(*linhas))))
+            numeros, linhas = [], []
+    if linhas:
+        yield numeros, dict(zip(COLUNAS_VENDAS, map(list, zip(*linhas))))
+
+
+def conferir_lote(numeros, colunas, lote):
+    """
+    Compara o lote vetorizado com a referência linha a linha.
+
+    Retorna a lista de divergências (vazia se tudo bate).
+    """
+    esperados = []
+    erros = []
+    filtrados = 0
+    for i, numero in enumerate(numeros):
+        linha = {origem: texto_celula(colunas[destino][i]) for origem, destino in MAPEAMENTO_VENDAS}
+        try:
+            registro = transformar_registro(linha, numero)
+        except ValueError as e:
+            erros.append(str(e))
+            continue
+        if registro is None:
+            filtrados += 1
+        else:
+            esperados.append(tuple(registro[c] for c in COLUNAS_INSERT))
+
+    divergencias = []
+    if filtrados != lote['filtrados']:
+        divergencias.append(f"filtrados: referência {filtrados}, vetorizado {lote['filtrados']}")
+    if erros != lote['erros']:
+        divergencias.append(f"erros: referência {len(erros)}, vetorizado {len(lote['erros'])}")
+    for numero, esperado, obtido in zip(lote['linhas'], esperados, registros(lote)):
+        if esperado != obtido:
+            divergencias.append(f"Linha {numero}: referência {esperado} ≠ vetorizado {obtido}")
+    if len(esperados) != len(lote['linhas']):
+        divergencias.append(f"registros: referência {len(esperados)}, vetorizado {len(lote['linhas'])}")
+    return divergencias
+
+
+def inserir_sqlite(conn, lote):
+    """INSERT OR IGNORE do lote na tabela vendas (mesmo SQL do importador JS)."""
+    with conn:
+        cursor = conn.executemany(SQL_INSERT, registros(lote))
+    return cursor.rowcount
+
+
+def inserir_registros(conn, registros_vendas, tamanho_lote=TAMANHO_LOTE):
+    """INSERT OR IGNORE de tuplas na ordem de COLUNAS_INSERT, um lote por transação. Retorna os inseridos."""
+    registros_vendas = iter(registros_vendas)
+    inseridos = 0
+    while True:
+        lote = list(itertools.islice(registros_vendas, tamanho_lote))
+        if not lote:
+            return inseridos
+        with conn:
+            inseridos += conn.executemany(SQL_INSERT, lote).rowcount
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Transforma planilhas de vendas (Série EP) em lotes vetorizados.')
+    parser.add_argument('origem', help='Planilha de vendas (.xlsx/.xls) ou exportação .csv')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE,
+                        help=f'Linhas por lote (padrão: {TAMANHO_LOTE})')
+    parser.add_argument('--conferir', action='store_true',
+                        help='Compara cada lote com a transformação linha a linha (porte do JS)')
+    parser.add_argument('--banco', help='Banco SQLite com a tabela vendas para INSERT OR IGNORE')
+    parser.add_argument('--checkpoint', metavar='ARQUIVO',
+                        help='Com --banco: grava o progresso a cada lote e retoma dele se existir '
+                             '(veja checkpoint_importacao.py)')
+    parser.add_argument('--ordenar', action='store_true',
+                        help='Com --banco: grava na ordem de chave_primaria (ordenação externa com memória '
+                             'limitada, veja ordenacao_externa.py)')
+    parser.add_argument('--memoria-mb', type=int, default=MEMORIA_MB,
+                        help=f'Memória da ordenação (padrão: {MEMORIA_MB})')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+    if args.checkpoint and not args.banco:
+        parser.error('--checkpoint exige --banco')
+    if args.ordenar and (not args.banco or args.checkpoint):
+        parser.error('--ordenar exige --banco e não vale com --checkpoint')
+    medicao = metricas.iniciar(args)
+
+    print(f"📖 Lendo arquivo: {args.origem}")
+    inicio = time.perf_counter()
+    tempo_transformacao = 0.0
+    total = filtrados = validos = inseridos = 0
+    erros = []
+    divergencias = []
+    conn = sqlite3.connect(args.banco) if args.banco else None
+    ordenacao = OrdenacaoExterna(primeiro_campo, args.memoria_mb) if args.ordenar else None
+    checkpoint = None
+    linha_inicial = 2
+    if args.checkpoint:
+        from checkpoint_importacao import Checkpoint
+        checkpoint = Checkpoint.abrir(args.checkpoint, args.origem, os.path.abspath(args.banco))
+        linha_inicial = checkpoint.linha_inicial(linha_inicial)
+        if checkpoint.descrever():
+            print(checkpoint.descrever())
+
+    try:
+        lotes = ler_lotes_vendas(args.origem, args.lote, linha_inicial=linha_inicial)
+        for numeros, colunas in medicao.medir_iterador('leitura', lotes):
+            comeco = time.perf_counter()
+            with medicao.etapa('conversao'):
+                lote = transformar_lote(numeros, colunas)
+            tempo_transformacao += time.perf_counter() - comeco
+
+            total += lote['total']
+            filtrados += lote['filtrados']
+            validos += len(lote['linhas'])
+            erros.extend(lote['erros'])
+            if args.conferir:
+                with medicao.etapa('conferencia'):
+                    divergencias.extend(conferir_lote(numeros, colunas, lote))
+            if ordenacao is not None:
+                ordenacao.acrescentar_todos(registros(lote))
+            elif conn is not None:
+                with medicao.etapa('escrita'):
+                    inseridos_lote = inserir_sqlite(conn, lote)
+                inseridos += inseridos_lote
+                if checkpoint is not None:
+                    checkpoint.confirmar(numeros[-1] + 1, lidos=lote['total'], inseridos=inseridos_lote)
+        if ordenacao is not None:
+            # A primeira ocorrência de cada chave vence, como no INSERT OR IGNORE sem ordenação
+            linhas_ordenadas = ordenacao.ordenados('primeiro')
+            with medicao.etapa('escrita'):
+                inseridos = inserir_registros(conn, linhas_ordenadas, args.lote)
+        if checkpoint is not None:
+            checkpoint.concluir()
+    finally:
+        if ordenacao is not None:
+            ordenacao.fechar()
+        if conn is not None:
+            conn.close()
+        medicao.contar('linhas_lidas', total)
+        medicao.contar('linhas_validas', validos)
+        metricas.finalizar(args)
+
+    print(f"✅ Processamento concluído:")
+    print(f"   - Total lidos: {total}")
+    print(f"   - Série != \"{SERIE_FILTRO}\": {filtrados}")
+    print(f"   - Válidos para importar: {validos}")
+    if erros:
+        print(f"   ⚠️  Erros: {len(erros)}")
+        for erro in erros[:10]:
+            print(f"      - {erro}")
+        if len(erros) > 10:
+            print(f"      ... e mais {len(erros) - 10} erros")
+    if conn is not None:
+        print(f"   - Inseridos: {inseridos}  Duplicados (ignorados): {validos - inseridos}")
+    if ordenacao is not None:
+        print(f"   {descrever(ordenacao.resumo())}")
+    if checkpoint is not None and checkpoint.retomado:
+        print(f"   - Nesta execução, a partir da linha {linha_inicial}; "
+              f"com as anteriores: {checkpoint.contagens.get('lidos', 0)} lidos, "
+              f"{checkpoint.contagens.get('inseridos', 0)} inseridos")
+
+    velocidade = total / tempo_transformacao if tempo_transformacao else 0
+    print(f"⏱️  Transformação: {tempo_transformacao:.2f}s ({velocidade:,.0f} linhas/s); "
+          f"total {time.perf_counter() - inicio:.2f}s")
+
+    if args.conferir:
+        if divergencias:
+            print(f"❌ {len(divergencias)} divergência(s) com a referência linha a linha:")
+            for divergencia in divergencias[:10]:
+                print(f"   - {divergencia}")
+            return 1
+        print("✅ Resultado idêntico à transformação linha a linha")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Validação em lote de CNPJ/CPF, CEP e Inscrição Estadual dos clientes.
+
+Documentos malformados em `cnpj_cpf`, `cep` e `insc_est` hoje só aparecem
+depois, como joins quebrados nos dashboards. Aqui as três colunas são
+validadas coluna a coluna, em lotes, sem laço Python por linha:
+
+- cada lote de textos vira uma matriz de códigos Unicode (n × largura) com
+  `view(uint32)`; separadores (. - / espaço) são descartados e os caracteres
+  restantes alinhados à esquerda com um argsort estável;
+- os dígitos verificadores de CPF e CNPJ saem de produtos matriciais com as
+  tabelas de pesos pré-calculadas (PESOS_*). O CNPJ alfanumérico (letras nas
+  12 primeiras posições, valor = código ASCII − 48) usa as mesmas tabelas;
+- o CEP é normalizado para NNNNN-NNN (um zero à esquerda perdido quando a
+  célula era numérica é recolocado);
+- a Inscrição Estadual tem só a estrutura conferida (ISENTO ou 8 a 14
+  caracteres, com o "P" do produtor rural de SP): o dígito verificador da IE
+  depende da UF, que não existe em tab_cliente.
+
+Documentos numéricos que perderam zeros à esquerda no Excel (9–10 dígitos
+para CPF, 12–13 para CNPJ) são completados antes do cálculo. O valor de
+`cnpj_cpf` não é alterado no .txt; o CEP válido sai normalizado.
+
+O relatório de erros é um TSV compacto, uma linha por erro:
+linha, cliente, coluna, erro, valor.
+
+Uso:
+    python3 converter_clientes.py clientes.xlsx --validar
+    python3 validar_clientes.py clientes.xlsx
+    python3 validar_clientes.py Clientes_20250101_120000.txt -o erros.tsv
+    python3 validar_clientes.py --medir 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from converter_clientes import LEITORES, ErroConversao, ler_clientes, valor_para_texto
+from leitor_xlsx import ErroLeituraXlsx, ler_linhas_xml
+from mapeamentos import COLUNAS_CLIENTES
+import metricas
+
+TAMANHO_LOTE = 50000
+
+# Pesos dos dígitos verificadores (módulo 11)
+PESOS_CPF_1 = np.arange(10, 1, -1)
+PESOS_CPF_2 = np.arange(11, 1, -1)
+PESOS_CNPJ_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_CNPJ_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+SEPARADORES = np.array([ord(c) for c in '.-/ \t'], dtype=np.uint32)
+INSCRICOES_ISENTAS = ('ISENTO', 'ISENTA', 'ISENTOS', 'ISENTAS')
+TAMANHOS_IE = (8, 14)
+
+# Códigos de erro (0 = válido)
+ERROS = ('', 'vazio', 'caractere_invalido', 'tamanho_invalido', 'digitos_repetidos', 'dv_invalido')
+VALIDO, VAZIO, CARACTERE_INVALIDO, TAMANHO_INVALIDO, DIGITOS_REPETIDOS, DV_INVALIDO = range(len(ERROS))
+
+CABECALHO_RELATORIO = ('linha', 'cliente', 'coluna', 'erro', 'valor')
+
+
+# ---------------------------------------------------------------------------
+# Matrizes de caracteres
+# ---------------------------------------------------------------------------
+
+def _matriz(textos, largura_minima):
+    """Textos → matriz uint32 (n × largura) de códigos Unicode, com zeros à direita."""
+    arr = np.asarray(textos, dtype=str)
+    largura = arr.dtype.itemsize // 4
+    if largura == 0:
+        return np.zeros((len(arr), largura_minima), dtype=np.uint32)
+    codigos = np.ascontiguousarray(arr).view(np.uint32).reshape(len(arr), largura)
+    if largura < largura_minima:
+        codigos = np.pad(codigos, ((0, 0), (0, largura_minima - largura)))
+    return codigos
+
+
+def compactar(textos, largura_minima=14):
+    """
+    Remove os separadores de cada texto.
+
+    Retorna (códigos alinhados à esquerda, tamanhos, tem caractere inválido,
+    tem letra, tem separador). Letras minúsculas e espaços nas pontas devem
+    vir tratados pelo chamador.
+    """
+    codigos = _matriz(textos, largura_minima)
+    digito = (codigos >= 48) & (codigos <= 57)
+    letra = (codigos >= 65) & (codigos <= 90)
+    mantido = digito | letra
+    separador = np.isin(codigos, SEPARADORES)
+    invalido = ~(mantido | separador | (codigos == 0))
+
+    ordem = np.argsort(~mantido, axis=1, kind='stable')
+    compactos = np.take_along_axis(codigos, ordem, axis=1)
+    compactos[~np.take_along_axis(mantido, ordem, axis=1)] = 0
+    return (compactos, mantido.sum(axis=1), invalido.any(axis=1), letra.any(axis=1),
+            separador.any(axis=1))
+
+
+def alinhar_direita(compactos, tamanhos, alvo):
+    """Primeiros `tamanhos` caracteres de cada linha em `alvo` colunas, com zeros ('0') à esquerda."""
+    origem = np.arange(alvo)[None, :] - (alvo - tamanhos)[:, None]
+    valores = np.take_along_axis(compactos, np.clip(origem, 0, compactos.shape[1] - 1), axis=1)
+    return np.where(origem >= 0, valores, 48)
+
+
+def _digito_verificador(valores, pesos):
+    resto = (valores[:, :len(pesos)] @ pesos) % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+
+# ---------------------------------------------------------------------------
+# Validações por coluna
+# ---------------------------------------------------------------------------
+
+def validar_cnpj_cpf(textos):
+    """Código de erro de cada CNPJ/CPF (array uint8; 0 = válido)."""
+    textos = np.char.upper(np.char.strip(np.asarray(textos, dtype=str)))
+    compactos, tamanhos, invalido, letra, separador = compactar(textos)
+    erros = np.zeros(len(textos), dtype=np.uint8)
+
+    # Só dígitos com 9–10 ou 12–13 posições: zeros à esquerda perdidos em
+    # células numéricas
+    numerico = ~letra & ~invalido
+    completar = numerico & ~separador
+    cpf = numerico & ((tamanhos == 11) | (completar & (tamanhos >= 9) & (tamanhos <= 10)))
+    cnpj = ~invalido & ((tamanhos == 14) | (completar & (tamanhos >= 12) & (tamanhos <= 13)))
+
+    for mascara, tamanho, pesos_1, pesos_2 in ((cpf, 11, PESOS_CPF_1, PESOS_CPF_2),
+                                               (cnpj, 14, PESOS_CNPJ_1, PESOS_CNPJ_2)):
+        if not mascara.any():
+            continue
+        valores = alinhar_direita(compactos[mascara], tamanhos[mascara], tamanho).astype(np.int64) - 48
+        codigo = np.zeros(len(valores), dtype=np.uint8)
+        errado = ((_digito_verificador(valores, pesos_1) != valores[:, -2]) |
+                  (_digito_verificador(valores, pesos_2) != valores[:, -1]))
+        codigo[errado] = DV_INVALIDO
+        codigo[~errado & (valores == valores[:, :1]).all(axis=1)] = DIGITOS_REPETIDOS
+        # Os dois últimos caracteres são sempre dígitos, mesmo no CNPJ alfanumérico
+        codigo[(valores[:, -2:] > 9).any(axis=1)] = CARACTERE_INVALIDO
+        erros[mascara] = codigo
+
+    erros[~cpf & ~cnpj] = TAMANHO_INVALIDO
+    erros[invalido] = CARACTERE_INVALIDO
+    erros[(tamanhos == 0) & ~invalido] = VAZIO
+    return erros
+
+
+def validar_cep(textos):
+    """
+    Valida e normaliza CEPs. Retorna (erros, CEPs normalizados 'NNNNN-NNN').
+
+    CEP vazio não é erro; nos inválidos e vazios o normalizado é ''.
+    """
+    textos = np.char.strip(np.asarray(textos, dtype=str))
+    compactos, tamanhos, invalido, letra, separador = compactar(textos, largura_minima=8)
+    erros = np.zeros(len(compactos), dtype=np.uint8)
+    # 7 dígitos sem separador: zero à esquerda perdido em célula numérica
+    erros[(tamanhos != 8) & ~((tamanhos == 7) & ~separador)] = TAMANHO_INVALIDO
+    erros[tamanhos == 0] = VALIDO
+    erros[invalido | letra] = CARACTERE_INVALIDO
+
+    digitos = alinhar_direita(compactos, np.minimum(tamanhos, 8), 8).astype(np.uint32)
+    hifen = np.full((len(digitos), 1), ord('-'), dtype=np.uint32)
+    formatados = np.ascontiguousarray(np.hstack([digitos[:, :5], hifen, digitos[:, 5:]]))
+    normalizados = formatados.view('<U9').ravel()
+    erros[(erros == VALIDO) & (tamanhos > 0) & (normalizados == '00000-000')] = DIGITOS_REPETIDOS
+    normalizados = np.where((erros == VALIDO) & (tamanhos > 0), normalizados, '')
+    return erros, normalizados
+
+
+def validar_inscricao_estadual(textos):
+    """Estrutura da Inscrição Estadual (ISENTO ou 8–14 caracteres). Vazia não é erro."""
+    textos = np.char.upper(np.char.strip(np.asarray(textos, dtype=str)))
+    compactos, tamanhos, invalido, letra, _ = compactar(textos)
+    erros = np.zeros(len(textos), dtype=np.uint8)
+
+    # Produtor rural de SP: P + 12 dígitos (letras só nessa posição)
+    rural = (compactos[:, 0] == ord('P')) & ~((compactos[:, 1:] >= 65).any(axis=1))
+    erros[(tamanhos < TAMANHOS_IE[0]) | (tamanhos > TAMANHOS_IE[1])] = TAMANHO_INVALIDO
+    erros[(letra & ~rural) | invalido] = CARACTERE_INVALIDO
+    erros[(tamanhos == 0) & ~invalido] = VALIDO
+    erros[np.isin(textos, INSCRICOES_ISENTAS)] = VALIDO
+    return erros
+
+
+# ---------------------------------------------------------------------------
+# Lotes de linhas e relatório
+# ---------------------------------------------------------------------------
+
+class RelatorioValidacao:
+    """TSV de erros (uma linha por erro) e contagem por coluna/erro."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.contagem = {}
+        self.arquivo = open(caminho, 'w', encoding='utf-8', newline='')
+        self.arquivo.write('\t'.join(CABECALHO_RELATORIO) + '\r\n')
+
+    def registrar(self, coluna, erros, numeros, clientes, textos):
+        """Grava as linhas com erro != 0 da coluna."""
+        posicoes = np.flatnonzero(erros)
+        for posicao in posicoes:
+            erro = ERROS[erros[posicao]]
+            valor = textos[posicao].replace('\t', ' ').replace('\r', ' ').replace('\n', ' ')
+            self.arquivo.write(f"{numeros[posicao]}\t{clientes[posicao]}\t{coluna}\t{erro}\t{valor}\r\n")
+            chave = (coluna, erro)
+            self.contagem[chave] = self.contagem.get(chave, 0) + 1
+        return len(posicoes)
+
+    @property
+    def total(self):
+        return sum(self.contagem.values())
+
+    def fechar(self):
+        self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+def validar_lote(lote, relatorio, colunas=COLUNAS_CLIENTES):
+    """
+    Valida um lote de (número, valores) e devolve as linhas com o CEP normalizado.
+
+    Os erros vão para `relatorio`.
+    """
+    i_cliente = colunas.index('cliente')
+    i_documento = colunas.index('cnpj_cpf')
+    i_cep = colunas.index('cep')
+    i_ie = colunas.index('insc_est')
+
+    numeros = [numero for numero, _ in lote]
+    clientes = [valor_para_texto(valores[i_cliente]) for _, valores in lote]
+    documentos = [valor_para_texto(valores[i_documento]) for _, valores in lote]
+    ceps = [valor_para_texto(valores[i_cep]) for _, valores in lote]
+    inscricoes = [valor_para_texto(valores[i_ie]) for _, valores in lote]
+
+    relatorio.registrar('cnpj_cpf', validar_cnpj_cpf(documentos), numeros, clientes, documentos)
+    erros_cep, normalizados = validar_cep(ceps)
+    relatorio.registrar('cep', erros_cep, numeros, clientes, ceps)
+    relatorio.registrar('insc_est', validar_inscricao_estadual(inscricoes), numeros, clientes, inscricoes)
+
+    for posicao in np.flatnonzero((normalizados != '') & (normalizados != np.asarray(ceps, dtype=str))):
+        numero, valores = lote[posicao]
+        lote[posicao] = numero, valores[:i_cep] + (str(normalizados[posicao]),) + valores[i_cep + 1:]
+    return lote
+
+
+def validar_linhas(linhas, relatorio, tamanho_lote=TAMANHO_LOTE, colunas=COLUNAS_CLIENTES):
+    """Valida `linhas` (número, valores) em lotes, gerando-as de volta na mesma ordem."""
+    medicao = metricas.atuais()
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            with medicao.etapa('validacao'):
+                lote = validar_lote(lote, relatorio, colunas)
+            yield from lote
+            lote = []
+    if lote:
+        with medicao.etapa('validacao'):
+            lote = validar_lote(lote, relatorio, colunas)
+        yield from lote
+
+
+def caminho_relatorio(destino):
+    """Clientes_<timestamp>.txt (ou clientes.xlsx) → <nome>_erros.txt, sempre texto."""
+    return os.path.splitext(destino)[0] + '_erros.txt'
+
+
+def ler_origem(caminho, leitor=ler_linhas_xml):
+    """(número da linha, valores) do .txt convertido ou da planilha original."""
+    if caminho.lower().endswith(('.txt', '.tsv', '.tab')):
+        from carregar_sqlite import ler_txt
+        return enumerate(ler_txt(caminho), 2)
+    return ler_clientes(caminho, leitor)
+
+
+def _documentos_sinteticos(quantidade, semente=11):
+    """Lote sintético com ~5% de documentos/CEPs inválidos (para --medir)."""
+    from benchmarks.geradores import gerar_cnpj, gerar_cpf
+
+    aleatorio = random.Random(semente)
+    documentos, ceps, inscricoes = [], [], []
+    for n in range(quantidade):
+        documento = gerar_cnpj(aleatorio) if n % 3 else gerar_cpf(aleatorio)
+        if n % 20 == 0:
+            documento = documento[:-1] + str((int(documento[-1]) + 1) % 10)
+        documentos.append(documento)
+        ceps.append(f"{aleatorio.randrange(1000000, 99999999):08d}" if n % 4 else
+                    f"{aleatorio.randrange(10000, 99999)}-{aleatorio.randrange(1000):03d}")
+        inscricoes.append('ISENTO' if n % 10 == 0 else str(aleatorio.randrange(10 ** 8, 10 ** 13)))
+    return documentos, ceps, inscricoes
+
+
+def medir(quantidade, tamanho_lote=TAMANHO_LOTE):
+    """Linhas/s das três validações sobre documentos sintéticos."""
+    documentos, ceps, inscricoes = _documentos_sinteticos(quantidade)
+    inicio = time.perf_counter()
+    for comeco in range(0, quantidade, tamanho_lote):
+        fim = comeco + tamanho_lote
+        validar_cnpj_cpf(documentos[comeco:fim])
+        validar_cep(ceps[comeco:fim])
+        validar_inscricao_estadual(inscricoes[comeco:fim])
+    return time.perf_counter() - inicio
+
+
+def main(argv=None):
+    """Função principal."""
+    parser = argparse.ArgumentParser(description='Valida CNPJ/CPF, CEP e Inscrição Estadual dos clientes.')
+    parser.add_argument('origem', nargs='?', help='Planilha de clientes ou .txt convertido')
+    parser.add_argument('-o', '--saida', help='Relatório de erros (padrão: <origem>_erros.txt)')
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE,
+                        help=f'Linhas por lote (padrão: {TAMANHO_LOTE})')
+    parser.add_argument('--medir', type=int, metavar='LINHAS',
+                        help='Mede a vazão com documentos sintéticos em vez de validar um arquivo')
+    parser.add_argument('--leitor', choices=sorted(LEITORES), default='xml',
+                        help='Leitor da planilha (cache = cache colunar por hash, veja cache_planilhas.py)')
+    metricas.adicionar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    if args.medir:
+        segundos = medir(args.medir, args.lote)
+        print(f"🧪 {args.medir} linhas validadas em {segundos:.2f}s "
+              f"({args.medir / segundos * 60:,.0f} linhas/min)")
+        return 0
+    if not args.origem:
+        parser.error('informe a origem ou --medir')
+
+    if not os.path.exists(args.origem):
+        print(f"❌ Erro: Arquivo não encontrado: {args.origem}")
+        return 1
+    destino = args.saida or caminho_relatorio(args.origem)
+    print(f"🔎 Validando: {args.origem}")
+    metricas.iniciar(args)
+    total = 0
+    try:
+        with RelatorioValidacao(destino) as relatorio:
+            for _ in validar_linhas(ler_origem(args.origem, LEITORES[args.leitor]), relatorio, args.lote):
+                total += 1
+    except (ErroConversao, ErroLeituraXlsx, OSError) as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    finally:
+        metricas.finalizar(args)
+
+    print(f"✅ {total} linhas validadas, {relatorio.total} erro(s)")
+    for (coluna, erro), quantidade in sorted(relatorio.contagem.items()):
+        print(f"   - {coluna}: {erro} = {quantidade}")
+    print(f"📁 Relatório: {destino}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())